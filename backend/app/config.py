@@ -21,6 +21,47 @@ OBSIDIAN_VAULT_PATH = os.getenv("OBSIDIAN_VAULT_PATH", "")
 # Anki
 ANKI_URL = os.getenv("ANKI_URL", "http://localhost:8765")
 SRS_STATE_FILE = Path(os.getenv("SRS_STATE_FILE", str(_BASE_DIR / "data" / "srs_state.json")))
+# Reviews journaled next to the SRS snapshot before it is rewritten
+SRS_JOURNAL_COMPACT_EVERY = int(os.getenv("SRS_JOURNAL_COMPACT_EVERY", "1000"))
+# Write-behind: journal lines are flushed once this many are pending, every
+# SRS_FLUSH_INTERVAL seconds, and at shutdown (1 writes every answer through)
+SRS_FLUSH_BATCH = int(os.getenv("SRS_FLUSH_BATCH", "64"))
+SRS_FLUSH_INTERVAL = float(os.getenv("SRS_FLUSH_INTERVAL", "1.0"))
+SRS_FSYNC = os.getenv("SRS_FSYNC", "off").lower() in ("1", "on", "true", "yes")
+# SRS state backend: json (snapshot + journal) | sqlite (shared by all workers)
+SRS_BACKEND = os.getenv("SRS_BACKEND", "json")
+SRS_DB_FILE = Path(os.getenv("SRS_DB_FILE", str(SRS_STATE_FILE.parent / "srs_state.sqlite")))
+
+# Card index — persistent parse cache next to the SRS state ("" disables it)
+_card_cache = os.getenv("CARD_CACHE_FILE", str(SRS_STATE_FILE.parent / "card_cache.sqlite"))
+CARD_CACHE_FILE = Path(_card_cache) if _card_cache else None
+# Background file watcher: off | auto | inotify | poll
+CARD_WATCHER = os.getenv("CARD_WATCHER", "off")
+CARD_WATCHER_DEBOUNCE = float(os.getenv("CARD_WATCHER_DEBOUNCE", "0.5"))
+CARD_WATCHER_INTERVAL = float(os.getenv("CARD_WATCHER_INTERVAL", "2.0"))
+# Parallel cold load: reader threads, files per chunk, parser processes (0 = parse in
+# threads; the default, since the process pool lost to threads in bench_card_load)
+CARD_LOAD_WORKERS = int(os.getenv("CARD_LOAD_WORKERS", str(min(8, os.cpu_count() or 1))))
+CARD_LOAD_CHUNK_SIZE = int(os.getenv("CARD_LOAD_CHUNK_SIZE", "256"))
+CARD_LOAD_PROCESSES = int(os.getenv("CARD_LOAD_PROCESSES", "0"))
+# Only card headers stay resident; prompt/solution bodies share this LRU budget
+CARD_BODY_CACHE_BYTES = int(os.getenv("CARD_BODY_CACHE_BYTES", str(16 * 1024 * 1024)))
+# Minimum trigram similarity (0..1) for fuzzy card search
+CARD_FUZZY_THRESHOLD = float(os.getenv("CARD_FUZZY_THRESHOLD", "0.3"))
+# Card store: memory (in-memory indexes only) | sqlite (also keep an indexed SQLite
+# mirror of the files; the API still answers from the in-memory indexes)
+CARD_STORE = os.getenv("CARD_STORE", "memory")
+CARD_STORE_FILE = Path(os.getenv("CARD_STORE_FILE", str(SRS_STATE_FILE.parent / "card_store.sqlite")))
+# Writer threads for POST /api/cards/bulk (1 writes the batch serially)
+CARD_BULK_WORKERS = int(os.getenv("CARD_BULK_WORKERS", "4"))
+
+# Cache-Control sent with ETag'd read routes, per route group
+# ("no-cache" = always revalidate, which is cheap: a match is a bodiless 304)
+CARDS_CACHE_CONTROL = os.getenv("CARDS_CACHE_CONTROL", "no-cache")
+GRAPH_CACHE_CONTROL = os.getenv("GRAPH_CACHE_CONTROL", "no-cache")
+FIRE_CACHE_CONTROL = os.getenv("FIRE_CACHE_CONTROL", "no-cache")
+# Memory budget for encoded bodies of those routes, keyed by ETag (0 disables)
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
 
 # Server
 PORT = int(os.getenv("PORT", "8000"))
@@ -0,0 +1,224 @@
+"""Conditional GET: strong ETags derived from data-store versions.
+
+A read route declares which versions its response depends on (the card
+index generation, a source file's stat, ...) through the ``conditional``
+dependency. The ETag is a hash of those versions plus the request path and
+normalized query, so it is known before any parsing or serialization: a
+request whose ``If-None-Match`` matches is answered 304 straight from the
+dependency, and the route body never runs.
+
+``CacheHeadersMiddleware`` stamps ``ETag`` and ``Cache-Control`` onto the
+200 responses of such routes, whatever response class they return.
+
+Versions such as the card index generation restart with the process, so
+every ETag also mixes in a per-process token: after a restart (or on
+another worker) clients get one full response instead of a false 304.
+
+The ETag doubles as the key of ``response_cache``, a byte-budgeted LRU of
+encoded response bodies: a client without the current version still gets
+bytes encoded by an earlier request for the same route, query and data
+version, with no model validation or JSON encoding (see ``cached``).
+"""
+
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from app.config import RESPONSE_CACHE_BYTES
+
+# Key in the request state under which a route's cache headers travel
+_STATE_KEY = "cache_headers"
+
+_INSTANCE = os.urandom(8).hex()
+
+
+def make_etag(request: Request, versions: tuple) -> str:
+    """Strong ETag for ``request`` given its data versions."""
+    query = sorted(request.query_params.multi_items())
+    raw = repr((_INSTANCE, request.url.path, query, versions)).encode()
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an ``If-None-Match`` header lists ``etag`` (or is ``*``).
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def conditional(*versions: Callable[[], object], cache_control: str = "no-cache"):
+    """Dependency making a GET route conditional on ``versions``.
+
+    Each callable returns a cheap, hashable version of one data source.
+    Plain functions run in the threadpool; coroutine functions are awaited
+    in the request's context, so context variables they set are visible to
+    the route body. ``cache_control`` is sent with both 200 and 304
+    responses.
+    """
+
+    async def dependency(request: Request) -> str:
+        values = []
+        for version in versions:
+            if inspect.iscoroutinefunction(version):
+                values.append(await version())
+            else:
+                values.append(await run_in_threadpool(version))
+        return check(request, tuple(values), cache_control)
+
+    return dependency
+
+
+def check(request: Request, versions: tuple, cache_control: str = "no-cache") -> str:
+    """Raise a 304 if the client already has this version, else remember
+    the headers for the response. Returns the ETag.
+
+    For routes whose versions need request data (e.g. a path parameter),
+    call this from their own dependency.
+    """
+    etag = make_etag(request, versions)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    request.state.cache_headers = headers
+    return etag
+
+
+class CacheHeadersMiddleware:
+    """Adds the headers chosen by ``conditional`` to successful responses."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                extra = state.get(_STATE_KEY)
+                if extra:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in extra.items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class ResponseCache:
+    """LRU of ``etag -> (body, media type, headers)`` bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, tuple[bytes, str | None, dict[str, str], int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Response | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        body, media_type, headers, _ = item
+        return Response(body, media_type=media_type, headers=headers)
+
+    def put(self, key: str, response: Response) -> None:
+        """Keep ``response``'s encoded body (and its extra headers) under ``key``."""
+        body = bytes(response.body)
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")
+        }
+        nbytes = len(body) + len(key) + sum(len(n) + len(v) for n, v in headers.items())
+        with self._lock:
+            self._discard(key)
+            if nbytes > self.max_bytes:
+                return
+            self._items[key] = (body, response.media_type, headers, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, _, _, evicted) = self._items.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._items.clear()
+            self.size = self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _discard(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.size -= item[3]
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+
+
+def cached(request: Request, build: Callable[[], Response]) -> Response:
+    """``build()``'s response for this request, from ``response_cache`` if
+    an earlier request with the same ETag already built it.
+
+    Only for routes behind ``conditional`` (or ``check``), whose ETag covers
+    everything the body depends on. Exceptions from ``build`` propagate and
+    nothing is cached; neither is a non-200 response.
+    """
+    headers = getattr(request.state, _STATE_KEY, None)
+    if not headers or response_cache.max_bytes <= 0:
+        return build()
+    key = headers["ETag"]
+    response = response_cache.get(key)
+    if response is None:
+        response = build()
+        if response.status_code == 200:
+            response_cache.put(key, response)
+    return response
+
+
+def model_response(type_: Any, value: Any) -> Response:
+    """JSON response for ``value`` serialized as ``type_`` (a route's
+    response model), encoded in one pass by pydantic-core."""
+    return Response(_adapter(type_).dump_json(value), media_type="application/json")
+
+
+@lru_cache(maxsize=None)
+def _adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
@@ -1,5 +1,6 @@
 """JobAcademy LMS — FastAPI backend."""
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Request
@@ -8,9 +9,22 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import CARDS_DIR, FRONTEND_URL
+from app.http_cache import CacheHeadersMiddleware, response_cache
 from app.routers import anki, cards, code, dashboard, fire, graph, sync
+from app.services import card_service, srs_service
 
-app = FastAPI(title="JobAcademy LMS", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    card_service.start_watcher()
+    yield
+    card_service.stop_watcher()
+    srs_service.close()
+
+
+app = FastAPI(title="JobAcademy LMS", version="0.1.0", lifespan=lifespan)
+
+app.add_middleware(CacheHeadersMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 app.include_router(cards.router)
@@ -34,6 +49,12 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/api/health/response-cache")
+def response_cache_stats():
+    """Hit/miss counters and size of the encoded response cache."""
+    return response_cache.stats()
+
+
 @app.get("/api/cards/images/{topic}/{filename:path}")
 async def serve_card_image(topic: str, filename: str):
     """Serve card images from topic/images/ subdirectories."""
@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+import sys
+from dataclasses import dataclass, field
+from typing import Annotated, Literal, Union
+
+from pydantic import BaseModel, Field
 
 
 class Card(BaseModel):
@@ -21,6 +25,89 @@ class Card(BaseModel):
     subtopic: str | None = None
 
 
+# Low-cardinality header fields; equal values share one interned string
+_CATEGORICAL = (
+    "deck",
+    "pillar",
+    "knowledge_layer",
+    "cognitive_layer",
+    "topic",
+    "concept",
+    "concept_node",
+    "subtopic",
+    "notion_last_edited",
+)
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(slots=True)
+class CardHeader:
+    """Card metadata without prompt/solution — what the card index keeps resident.
+
+    Compact by construction: ``__slots__`` instead of a per-instance dict,
+    categorical strings interned so thousands of headers share a handful of
+    objects, and tags held as a tuple of interned strings. Bodies are loaded
+    on demand; ``to_card`` builds the API model once they are available.
+    """
+
+    card_id: str
+    deck: str
+    tags: tuple[str, ...]
+    fire_weight: float
+    notion_last_edited: str
+    pillar: str | None = None
+    knowledge_layer: str | None = None
+    cognitive_layer: str | None = None
+    filename: str | None = None
+    topic: str | None = None
+    concept: str | None = None
+    has_visual: bool = False
+    concept_node: str | None = None
+    subtopic: str | None = None
+    # Source file; not part of the API model
+    path: str = field(default="", compare=False)
+
+    def __post_init__(self):
+        self.intern()
+
+    def intern(self) -> None:
+        """Point categorical fields and tags at the shared interned strings.
+
+        Runs on construction; call it again on a header that was unpickled
+        (e.g. returned by a parser process), since unpickling skips
+        ``__init__`` and leaves private copies of every string.
+        """
+        for name in _CATEGORICAL:
+            setattr(self, name, _intern(getattr(self, name)))
+        self.tags = tuple(sys.intern(t) for t in self.tags)
+
+    @classmethod
+    def from_card(cls, card: Card, path: str = "") -> "CardHeader":
+        data = card.model_dump(exclude={"prompt", "solution"})
+        return cls(**data, path=path)
+
+    def to_card(self, prompt: str, solution: str) -> Card:
+        return Card.model_construct(**self.to_dict(), prompt=prompt, solution=solution)
+
+    def to_dict(self) -> dict:
+        """Header fields without ``path`` (for caching and serialization)."""
+        data = {name: getattr(self, name) for name in _HEADER_FIELDS}
+        data["tags"] = list(self.tags)
+        return data
+
+
+_HEADER_FIELDS = tuple(f for f in CardHeader.__dataclass_fields__ if f != "path")
+
+
+class ScoredCard(Card):
+    """A search result with its relevance score (``rank=bm25``)."""
+
+    score: float
+
+
 class CardCreate(BaseModel):
     card_id: str
     deck: str
@@ -40,6 +127,34 @@ class CardUpdate(BaseModel):
     solution: str | None = None
 
 
+class BulkCreate(CardCreate):
+    op: Literal["create"]
+
+
+class BulkUpdate(CardUpdate):
+    op: Literal["update"]
+    card_id: str
+
+
+class BulkDelete(BaseModel):
+    op: Literal["delete"]
+    card_id: str
+
+
+# One item of POST /api/cards/bulk, told apart by ``op``
+BulkOperation = Annotated[Union[BulkCreate, BulkUpdate, BulkDelete], Field(discriminator="op")]
+
+
+class BulkResult(BaseModel):
+    """Outcome of one bulk operation; ``status`` uses HTTP codes."""
+
+    index: int
+    op: str
+    card_id: str
+    status: int
+    error: str | None = None
+
+
 class ValidationResult(BaseModel):
     card_id: str
     is_valid: bool
@@ -1,6 +1,7 @@
 """Parse .md card files from ~/Obsidian/JobAcademy/cards/."""
 
 import re
+from functools import lru_cache
 from pathlib import Path
 
 from app.models.card import Card
@@ -60,8 +61,91 @@ NODE_CARD_MAP: dict[str, list[str]] = {
     # Future: "LOGREG": ["logreg"], "KNN": ["knn"], etc.
 }
 
-# Sorted longest-first for greedy matching
-_CONCEPT_PREFIXES_SORTED = sorted(CONCEPT_PREFIX_MAP.keys(), key=len, reverse=True)
+_ID_SUFFIX = r"-(\d+[a-z]?)$"
+_ID_CACHE_SIZE = 8192
+
+
+def _maps_signature() -> tuple:
+    """Cheap per-call fingerprint of the ID maps: their sizes. Adding or
+    removing a prefix changes it; in-place edits need ``reload_card_id_maps``."""
+    return (
+        len(CONCEPT_PREFIX_MAP),
+        len(TOPIC_MAP),
+        len(PILLAR_MAP),
+        len(LAYER_MAP),
+        len(SPECIAL_PREFIXES),
+    )
+
+
+def _compile_card_id_pattern() -> re.Pattern:
+    """One anchored alternation covering the four card_id formats, in order.
+
+    Concept prefixes are sorted longest-first so alternation order matches
+    the old greedy per-prefix loop (``prob-cat`` before ``prob``).
+    """
+    concepts = "|".join(
+        re.escape(cp) for cp in sorted(CONCEPT_PREFIX_MAP, key=len, reverse=True)
+    )
+    specials = "|".join(re.escape(sp) for sp in sorted(SPECIAL_PREFIXES, key=len, reverse=True))
+    return re.compile(
+        "^(?:"
+        r"(?P<nb_prefix>[a-z]+)-(?P<pillar>\d)(?P<nb_layer>[CMPIV])"
+        rf"|(?P<cl_prefix>{concepts})-(?P<cl_layer>[CMPIV])"
+        rf"|(?P<c_prefix>{concepts})"
+        rf"|(?P<sp_prefix>[a-z]+)-(?P<special>{specials})"
+        ")" + _ID_SUFFIX
+    )
+
+
+_card_id_pattern = _compile_card_id_pattern()
+_card_id_signature = _maps_signature()
+
+
+@lru_cache(maxsize=_ID_CACHE_SIZE)
+def _classify_card_id(card_id: str) -> tuple:
+    """Memoized classification; cleared by ``reload_card_id_maps``."""
+    m = _card_id_pattern.match(card_id)
+    if not m:
+        return (None, None, None, None)
+    g = m.groupdict()
+
+    # Strategy 1: Legacy NB — e.g. nb-3M-01, nb-1C-02a
+    if g["nb_prefix"] is not None:
+        pillar_num = g["pillar"]
+        return (
+            PILLAR_MAP.get(pillar_num, f"{pillar_num}-Unknown"),
+            LAYER_MAP.get(g["nb_layer"], "Unknown"),
+            TOPIC_MAP.get(g["nb_prefix"]),
+            None,
+        )
+    # Strategy 2: Concept+Layer — e.g. norm-V-01, binom-C-03, prob-cat-M-01
+    if g["cl_prefix"] is not None:
+        prefix = g["cl_prefix"]
+        return (
+            None,
+            LAYER_MAP.get(g["cl_layer"], "Unknown"),
+            TOPIC_MAP.get(prefix),
+            CONCEPT_PREFIX_MAP.get(prefix),
+        )
+    # Strategy 3: Concept-only — e.g. prob-cat-01, prob-prop-02
+    if g["c_prefix"] is not None:
+        prefix = g["c_prefix"]
+        return (None, None, TOPIC_MAP.get(prefix), CONCEPT_PREFIX_MAP.get(prefix))
+    # Strategy 4: Special prefix — e.g. nb-CF-01, nb-EXT-02
+    return (g["special"], "Special", TOPIC_MAP.get(g["sp_prefix"]), None)
+
+
+def reload_card_id_maps() -> None:
+    """Recompile the card_id pattern and drop memoized classifications.
+
+    Call after changing an existing entry of the ID maps (an edited value,
+    or one key swapped for another); added or removed prefixes are picked
+    up automatically.
+    """
+    global _card_id_pattern, _card_id_signature
+    _card_id_pattern = _compile_card_id_pattern()
+    _card_id_signature = _maps_signature()
+    _classify_card_id.cache_clear()
 
 
 def parse_card_id(card_id: str) -> dict:
@@ -72,105 +156,146 @@ def parse_card_id(card_id: str) -> dict:
     2. Concept+Layer:  norm-V-01   (conceptPrefix-Layer-number)
     3. Concept-only:   prob-cat-01 (conceptPrefix-number)
     4. Special:        nb-CF-01    (prefix-SPECIAL-number)
+
+    All formats are matched by one precompiled pattern and results are
+    memoized; both are rebuilt when a prefix is added or removed, or by
+    ``reload_card_id_maps`` after an entry is edited in place.
     """
-    result = {
-        "pillar": None,
-        "knowledge_layer": None,
-        "topic": None,
-        "concept": None,
+    if _maps_signature() != _card_id_signature:
+        reload_card_id_maps()
+    pillar, layer, topic, concept = _classify_card_id(card_id)
+    return {
+        "pillar": pillar,
+        "knowledge_layer": layer,
+        "topic": topic,
+        "concept": concept,
     }
 
-    # Strategy 1: Legacy NB — e.g. nb-3M-01, nb-1C-02a
-    m = re.match(r"^([a-z]+)-(\d)([CMPIV])-(\d+[a-z]?)$", card_id)
-    if m:
-        prefix, pillar_num, layer_letter, _ = m.groups()
-        result["pillar"] = PILLAR_MAP.get(pillar_num, f"{pillar_num}-Unknown")
-        result["knowledge_layer"] = LAYER_MAP.get(layer_letter, "Unknown")
-        result["topic"] = TOPIC_MAP.get(prefix)
-        return result
 
-    # Strategy 2: Concept+Layer — e.g. norm-V-01, binom-C-03, prob-cat-M-01
-    for cp in _CONCEPT_PREFIXES_SORTED:
-        pattern = rf"^({re.escape(cp)})-([CMPIV])-(\d+[a-z]?)$"
-        m = re.match(pattern, card_id)
-        if m:
-            matched_prefix, layer_letter, _ = m.groups()
-            result["knowledge_layer"] = LAYER_MAP.get(layer_letter, "Unknown")
-            result["concept"] = CONCEPT_PREFIX_MAP.get(matched_prefix)
-            result["topic"] = TOPIC_MAP.get(matched_prefix)
-            return result
+def parse_card_file(filepath: Path) -> Card | None:
+    """Parse a single .md card file into a Card model."""
+    return parse_card_text(filepath.read_text(encoding="utf-8"), filepath)
+
+
+# Frontmatter keys read by parse_card_text; anything else is ignored
+_FM_KEYS = {
+    "deck",
+    "tags",
+    "card_id",
+    "fire_weight",
+    "notion_last_edited",
+    "topic",
+    "concept",
+    "has_visual",
+    "concept_node",
+    "subtopic",
+}
+_FIRE_WEIGHT_RE = re.compile(r"[\d.]+")
 
-    # Strategy 3: Concept-only — e.g. prob-cat-01, prob-prop-02
-    for cp in _CONCEPT_PREFIXES_SORTED:
-        pattern = rf"^({re.escape(cp)})-(\d+[a-z]?)$"
-        m = re.match(pattern, card_id)
-        if m:
-            matched_prefix, _ = m.groups()
-            result["concept"] = CONCEPT_PREFIX_MAP.get(matched_prefix)
-            result["topic"] = TOPIC_MAP.get(matched_prefix)
-            return result
 
-    # Strategy 4: Special prefix — e.g. nb-CF-01, nb-EXT-02
-    m = re.match(r"^([a-z]+)-([A-Z]+)-(\d+[a-z]?)$", card_id)
-    if m:
-        prefix, special, _ = m.groups()
-        if special in SPECIAL_PREFIXES:
-            result["pillar"] = special
-            result["knowledge_layer"] = "Special"
-            result["topic"] = TOPIC_MAP.get(prefix)
-            return result
+def _frontmatter_fields(fm: str) -> dict[str, str]:
+    """Collect raw values for the keys we read in one pass over the lines.
 
-    return result
+    The first occurrence of a key wins. Output matches the previous
+    regex-per-field parser exactly, including its ``topic:`` search: the
+    topic comes from the first key ending in ``topic``, so a ``subtopic:``
+    line before any ``topic:`` line supplies both. A ``tags: [...]`` flow
+    list may continue over several lines.
+    """
+    fields: dict[str, str] = {}
+    lines = fm.split("\n")
+    i = 0
+    while i < len(lines):
+        key, sep, value = lines[i].partition(":")
+        i += 1
+        key = key.strip()
+        if not sep:
+            continue
+        if key.endswith("topic") and "topic" not in fields:
+            fields["topic"] = value.strip()
+        if key not in _FM_KEYS or key in fields:
+            continue
+        value = value.strip()
+        if key == "tags" and value.startswith("["):
+            while "]" not in value and i < len(lines):
+                value += "\n" + lines[i]
+                i += 1
+        fields[key] = value
+    return fields
+
+
+def _scalar(value: str | None) -> str | None:
+    """Unquote a scalar value: text up to the closing quote, stripped."""
+    if value is None:
+        return None
+    if value.startswith('"'):
+        value = value[1:]
+    value = value.split('"', 1)[0].strip()
+    return value or None
+
+
+def _card_blocks(text: str) -> tuple[str, str] | None:
+    """Return the first two START/END blocks (prompt, solution), if present."""
+    blocks = []
+    pos = 0
+    while len(blocks) < 2:
+        start = text.find("START\n", pos)
+        if start < 0:
+            return None
+        end = text.find("\nEND", start + 6)
+        if end < 0:
+            return None
+        blocks.append(text[start + 6:end])
+        pos = end + 4
+    return blocks[0], blocks[1]
+
+
+def parse_card_body(text: str) -> tuple[str, str] | None:
+    """Return just (prompt, solution) from card markdown, as parse_card_text would."""
+    blocks = _card_blocks(text)
+    if blocks is None:
+        return None
+    return blocks[0].strip(), blocks[1].strip()
 
 
-def parse_card_file(filepath: Path) -> Card | None:
-    """Parse a single .md card file into a Card model."""
-    text = filepath.read_text(encoding="utf-8")
+def parse_card_text(text: str, filepath: Path) -> Card | None:
+    """Parse card markdown already read from ``filepath``.
 
+    ``filepath`` only supplies the filename and the card_id fallback stem.
+    """
     # Extract YAML frontmatter
-    fm_match = re.match(r"^---\n(.*?)\n---", text, re.DOTALL)
-    if not fm_match:
+    if not text.startswith("---\n"):
+        return None
+    fm_end = text.find("\n---", 4)
+    if fm_end < 0:
         return None
 
-    fm = fm_match.group(1)
+    fm = _frontmatter_fields(text[4:fm_end])
 
-    # Parse frontmatter fields
-    deck_match = re.search(r'deck:\s*"?([^"\n]+)"?', fm)
-    deck = deck_match.group(1).strip() if deck_match else "JobAcademy"
+    deck = _scalar(fm.get("deck")) or "JobAcademy"
 
-    tags_match = re.search(r"tags:\s*\[([^\]]*)\]", fm)
     tags = []
-    if tags_match:
-        tags = [t.strip() for t in tags_match.group(1).split(",") if t.strip()]
-
-    cid_match = re.search(r'card_id:\s*"?([^"\n]+)"?', fm)
-    card_id = cid_match.group(1).strip() if cid_match else filepath.stem
-
-    fw_match = re.search(r"fire_weight:\s*([\d.]+)", fm)
-    fire_weight = float(fw_match.group(1)) if fw_match else 0.5
-
-    edited_match = re.search(r'notion_last_edited:\s*"?([^"\n]+)"?', fm)
-    notion_last_edited = edited_match.group(1).strip() if edited_match else ""
-
-    # Parse new frontmatter fields
-    topic_match = re.search(r'topic:\s*"?([^"\n]+)"?', fm)
-    fm_topic = topic_match.group(1).strip() if topic_match else None
+    raw_tags = fm.get("tags", "")
+    if raw_tags.startswith("[") and "]" in raw_tags:
+        inner = raw_tags[1:raw_tags.index("]")]
+        tags = [t.strip() for t in inner.split(",") if t.strip()]
 
-    concept_match = re.search(r'concept:\s*"?([^"\n]+)"?', fm)
-    fm_concept = concept_match.group(1).strip() if concept_match else None
+    card_id = _scalar(fm.get("card_id")) or filepath.stem
 
-    has_visual_match = re.search(r"has_visual:\s*(true|false)", fm, re.IGNORECASE)
-    has_visual = has_visual_match.group(1).lower() == "true" if has_visual_match else False
+    fw_match = _FIRE_WEIGHT_RE.match(fm.get("fire_weight", ""))
+    fire_weight = float(fw_match.group(0)) if fw_match else 0.5
 
-    concept_node_match = re.search(r'concept_node:\s*"?([^"\n]+)"?', fm)
-    concept_node = concept_node_match.group(1).strip() if concept_node_match else None
+    notion_last_edited = _scalar(fm.get("notion_last_edited")) or ""
 
-    subtopic_match = re.search(r'subtopic:\s*"?([^"\n]+)"?', fm)
-    subtopic = subtopic_match.group(1).strip() if subtopic_match else None
+    fm_topic = _scalar(fm.get("topic"))
+    fm_concept = _scalar(fm.get("concept"))
+    has_visual = fm.get("has_visual", "")[:4].lower() == "true"
+    concept_node = _scalar(fm.get("concept_node"))
+    subtopic = _scalar(fm.get("subtopic"))
 
     # Extract START/END blocks
-    blocks = re.findall(r"START\n(.*?)\nEND", text, re.DOTALL)
-    if len(blocks) < 2:
+    blocks = _card_blocks(text)
+    if blocks is None:
         return None
 
     prompt = blocks[0].strip()
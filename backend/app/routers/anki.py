@@ -54,6 +54,12 @@ def get_due_cards():
     return srs_service.get_due_cards()
 
 
+@router.get("/intervals")
+def get_interval_histogram():
+    """Server-SRS cards per review-interval bucket (days)."""
+    return srs_service.get_interval_histogram()
+
+
 class AnswerRequest(BaseModel):
     card_id: int | str  # Anki uses int, server SRS uses str
     ease: int  # 1=again, 2=hard, 3=good, 4=easy
@@ -1,62 +1,229 @@
 """Card API endpoints."""
 
-from fastapi import APIRouter, HTTPException, Query
+import json
 
-from app.models.card import Card, CardCreate, CardUpdate, ValidationResult
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.config import CARDS_CACHE_CONTROL
+from app.http_cache import cached, check, conditional, model_response
+from app.models.card import (
+    BulkOperation,
+    BulkResult,
+    Card,
+    CardCreate,
+    CardUpdate,
+    ScoredCard,
+    ValidationResult,
+)
 from app.services import card_service
+from app.services.tag_query import TagQueryError
 from app.services.validation_service import validate_card
 
 router = APIRouter(prefix="/api/cards", tags=["cards"])
 
+# Read routes answer 304 while the card store version is unchanged
+_conditional = Depends(conditional(card_service.request_version, cache_control=CARDS_CACHE_CONTROL))
+
+
+async def _card_conditional(request: Request, card_id: str) -> str:
+    """Single-card routes only depend on that card's file."""
+    version = await run_in_threadpool(card_service.card_version, card_id)
+    return check(request, (version,), CARDS_CACHE_CONTROL)
 
-@router.get("", response_model=list[Card])
+
+@router.get(
+    "",
+    response_model=list[Card],
+    dependencies=[_conditional],
+    responses={
+        200: {
+            "description": (
+                "With rank=bm25, each card also carries a score. With fields=,"
+                " only those fields (and card_id) are returned. X-Next-Cursor"
+                " holds the cursor for the next page when limit cuts the list."
+            )
+        }
+    },
+)
 def list_cards(
+    request: Request,
+    pillar: str | None = Query(None),
+    layer: str | None = Query(None),
+    topic: str | None = Query(None),
+    search: str | None = Query(None),
+    concept: str | None = Query(None),
+    fuzzy: bool = Query(False),
+    tags: str | None = Query(None),
+    rank: str | None = Query(None, pattern="^bm25$"),
+    sort: str | None = Query(None, pattern="^(card_id|fire_weight|notion_last_edited|topic)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=1000),
+    fields: str | None = Query(None),
+):
+    """List all cards with optional filters.
+
+    ``fuzzy=true`` makes ``search`` typo-tolerant and also matches the
+    concept, concept_node and subtopic keywords. ``tags`` filters by a
+    boolean tag query, e.g. ``programming AND (debug OR build) AND NOT
+    extend`` (400 if malformed). ``rank=bm25`` (requires
+    ``search``) returns the top ``limit`` (default 20) matches by
+    relevance, each with a ``score``, instead of every match in file order.
+
+    Unranked listings can be ordered by ``sort``/``order`` and paged with
+    ``limit``; the ``X-Next-Cursor`` response header is passed back as
+    ``cursor`` for the next page. ``fields=card_id,topic,...`` returns only
+    those fields, so list views skip loading prompt/solution bodies.
+
+    Encoded responses are cached per query and card store version.
+    """
+    if rank and not search:
+        raise HTTPException(status_code=400, detail="rank requires search")
+    if rank and (sort or cursor):
+        raise HTTPException(status_code=400, detail="rank cannot be combined with sort or cursor")
+    projection = _parse_fields(fields)
+
+    def build() -> JSONResponse:
+        try:
+            if rank:
+                ranked = card_service.rank_cards(
+                    search,
+                    limit or 20,
+                    pillar=pillar,
+                    layer=layer,
+                    topic=topic,
+                    concept=concept,
+                    fuzzy=fuzzy,
+                    tags=tags,
+                )
+                scored = [ScoredCard(**card.model_dump(), score=score) for card, score in ranked]
+                content = jsonable_encoder(scored)
+                if projection is not None:
+                    keep = (*projection, "score")
+                    content = [{f: item[f] for f in keep} for item in content]
+                return JSONResponse(content)
+
+            headers, next_cursor = card_service.find_page(
+                pillar=pillar,
+                layer=layer,
+                topic=topic,
+                concept=concept,
+                search=search,
+                fuzzy=fuzzy,
+                tags=tags,
+                sort=sort or "path",
+                descending=order == "desc",
+                cursor=cursor,
+                limit=limit,
+            )
+        except TagQueryError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid tags query: {e}")
+        except card_service.CursorError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        return JSONResponse(
+            card_service.card_dicts(headers, projection),
+            headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+        )
+
+    return cached(request, build)
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """Validated ``fields=`` projection (card_id always first), or None."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in card_service.CARD_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["card_id", *names]))
+
+
+# Lines are sent in chunks of roughly this many bytes
+_EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[_conditional],
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+def export_cards(
+    export_format: str = Query("ndjson", alias="format", pattern="^ndjson$"),
     pillar: str | None = Query(None),
     layer: str | None = Query(None),
     topic: str | None = Query(None),
     search: str | None = Query(None),
     concept: str | None = Query(None),
+    fuzzy: bool = Query(False),
+    tags: str | None = Query(None),
+    fields: str | None = Query(None),
 ):
-    """List all cards with optional filters."""
-    cards = card_service.list_cards()
-
-    if pillar:
-        cards = [c for c in cards if c.pillar and pillar.lower() in c.pillar.lower()]
-    if layer:
-        cards = [
-            c
-            for c in cards
-            if c.knowledge_layer and layer.lower() in c.knowledge_layer.lower()
-        ]
-    if topic:
-        cards = [c for c in cards if c.topic and topic.lower() == c.topic.lower()]
-    if search:
-        q = search.lower()
-        cards = [
-            c
-            for c in cards
-            if q in c.card_id.lower()
-            or q in c.prompt.lower()
-            or q in c.solution.lower()
-        ]
-    if concept:
-        concept_normalized = concept.strip().lower()
-        cards = [
-            c
-            for c in cards
-            if c.concept_node and c.concept_node.strip().lower() == concept_normalized
-        ]
-
-    return cards
-
-
-@router.get("/by-concept/{concept_node}", response_model=list[Card])
-def list_cards_by_concept(concept_node: str):
+    """Stream matching cards as NDJSON, one card per line, in file order.
+
+    Takes the same filters as the list endpoint. Cards are read and encoded
+    one at a time while the response is written, so memory stays flat
+    however large the corpus is.
+    """
+    projection = _parse_fields(fields)
+    try:
+        headers, _ = card_service.find_page(
+            pillar=pillar,
+            layer=layer,
+            topic=topic,
+            concept=concept,
+            search=search,
+            fuzzy=fuzzy,
+            tags=tags,
+        )
+    except TagQueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid tags query: {e}")
+
+    def lines():
+        chunk: list[str] = []
+        size = 0
+        for item in card_service.iter_card_dicts(headers, projection, cache_bodies=False):
+            line = json.dumps(item, ensure_ascii=False) + "\n"
+            chunk.append(line)
+            size += len(line)
+            if size >= _EXPORT_CHUNK_BYTES:
+                yield "".join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield "".join(chunk)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="cards.ndjson"'},
+    )
+
+
+@router.post("/bulk", response_model=list[BulkResult])
+def bulk_cards(operations: list[BulkOperation]):
+    """Apply many create/update/delete operations in one request.
+
+    Each item is validated on its own (409 / 404 like the single-card
+    routes); valid ones are written in one batch and the card index is
+    updated once. Returns one result per operation, in order.
+    """
+    return card_service.apply_bulk(operations)
+
+
+@router.get("/by-concept/{concept_node}", response_model=list[Card], dependencies=[_conditional])
+def list_cards_by_concept(request: Request, concept_node: str):
     """List cards for a specific concept node."""
-    return card_service.list_cards_by_concept(concept_node)
+    return cached(
+        request,
+        lambda: model_response(list[Card], card_service.list_cards_by_concept(concept_node)),
+    )
 
 
-@router.get("/{card_id}", response_model=Card)
+@router.get("/{card_id}", response_model=Card, dependencies=[Depends(_card_conditional)])
 def get_card(card_id: str):
     """Get a single card by ID."""
     card = card_service.get_card(card_id)
@@ -68,28 +235,12 @@ def get_card(card_id: str):
 @router.post("", response_model=Card, status_code=201)
 def create_card(data: CardCreate):
     """Create a new card."""
-    existing = card_service.get_card(data.card_id)
-    if existing:
+    if card_service.card_exists(data.card_id):
         raise HTTPException(
             status_code=409, detail=f"Card {data.card_id} already exists"
         )
 
-    from app.parsers.card_parser import parse_card_id
-    from datetime import datetime, timezone
-
-    id_info = parse_card_id(data.card_id)
-    card = Card(
-        card_id=data.card_id,
-        deck=data.deck,
-        tags=data.tags,
-        fire_weight=data.fire_weight,
-        notion_last_edited=datetime.now(timezone.utc).isoformat(),
-        prompt=data.prompt,
-        solution=data.solution,
-        pillar=id_info["pillar"],
-        knowledge_layer=id_info["knowledge_layer"],
-        filename=f"{data.card_id}.md",
-    )
+    card = card_service.new_card(data)
     card_service.save_card(card)
     return card
 
@@ -101,22 +252,16 @@ def update_card(card_id: str, data: CardUpdate):
     if not card:
         raise HTTPException(status_code=404, detail=f"Card {card_id} not found")
 
-    if data.deck is not None:
-        card.deck = data.deck
-    if data.tags is not None:
-        card.tags = data.tags
-    if data.fire_weight is not None:
-        card.fire_weight = data.fire_weight
-    if data.prompt is not None:
-        card.prompt = data.prompt
-    if data.solution is not None:
-        card.solution = data.solution
-
+    card_service.apply_update(card, data)
     card_service.save_card(card)
     return card
 
 
-@router.get("/{card_id}/validate", response_model=ValidationResult)
+@router.get(
+    "/{card_id}/validate",
+    response_model=ValidationResult,
+    dependencies=[Depends(_card_conditional)],
+)
 def validate_card_endpoint(card_id: str):
     """Validate a card against quality rules."""
     card = card_service.get_card(card_id)
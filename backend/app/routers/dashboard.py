@@ -10,7 +10,7 @@ router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 @router.get("/stats")
 def get_stats():
     """Aggregate stats from cards + Anki/SRS."""
-    cards = card_service.list_cards()
+    cards = card_service.list_headers()
 
     by_pillar: dict[str, int] = {}
     by_layer: dict[str, int] = {}
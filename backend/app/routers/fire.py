@@ -1,17 +1,22 @@
 """FIRe API endpoints."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
 
+from app.config import FIRE_CACHE_CONTROL
+from app.http_cache import cached, conditional, model_response
 from app.models.fire import CreditSimRequest, CreditSimResult, FIReData
 from app.services import fire_service
 
 router = APIRouter(prefix="/api/fire", tags=["fire"])
 
+_conditional = Depends(conditional(fire_service.version, cache_control=FIRE_CACHE_CONTROL))
 
-@router.get("/relationships", response_model=FIReData)
-def get_relationships():
+
+@router.get("/relationships", response_model=FIReData, dependencies=[_conditional])
+def get_relationships(request: Request):
     """Get all encompassing relationships."""
-    return fire_service.get_fire_data()
+    return cached(request, lambda: model_response(FIReData, fire_service.get_fire_data()))
 
 
 @router.post("/simulate", response_model=CreditSimResult)
@@ -20,7 +25,7 @@ def simulate_credit(req: CreditSimRequest):
     return fire_service.simulate_credit(req.card_id, req.passed)
 
 
-@router.get("/heatmap")
-def get_heatmap():
+@router.get("/heatmap", dependencies=[_conditional])
+def get_heatmap(request: Request):
     """Get heatmap data for visualization."""
-    return fire_service.get_heatmap_data()
+    return cached(request, lambda: JSONResponse(fire_service.get_heatmap_data()))
@@ -1,18 +1,35 @@
 """Knowledge graph API endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
+from app.config import GRAPH_CACHE_CONTROL
+from app.http_cache import cached, conditional, model_response
 from app.models.card import Card
 from app.models.graph import KnowledgeGraph, SubtopicSummary, SubtreeCardDistribution
-from app.services import graph_service
+from app.services import card_service, graph_service
 
-router = APIRouter(prefix="/api/graph", tags=["graph"])
+# Every read route here depends on the graph sources and on the cards
+router = APIRouter(
+    prefix="/api/graph",
+    tags=["graph"],
+    dependencies=[
+        Depends(
+            conditional(
+                graph_service.version,
+                card_service.request_version,
+                cache_control=GRAPH_CACHE_CONTROL,
+            )
+        )
+    ],
+)
 
 
 @router.get("", response_model=KnowledgeGraph)
-def get_graph():
+def get_graph(request: Request):
     """Get the full knowledge graph with mastery overlay."""
-    return graph_service.get_knowledge_graph()
+    return cached(
+        request, lambda: model_response(KnowledgeGraph, graph_service.get_knowledge_graph())
+    )
 
 
 @router.get("/{node_id}/subtree", response_model=KnowledgeGraph)
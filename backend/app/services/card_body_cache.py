@@ -0,0 +1,61 @@
+"""Byte-budgeted LRU of card bodies (prompt + solution).
+
+The card index keeps only headers resident; bodies are read from disk when a
+route actually returns them and kept here until the budget pushes them out.
+Entries are tagged with the file's content digest so an edited file never
+serves a stale body.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+Body = tuple[str, str]
+
+
+def body_size(body: Body) -> int:
+    """Approximate resident size of a body in bytes."""
+    return sys.getsizeof(body[0]) + sys.getsizeof(body[1])
+
+
+class BodyCache:
+    """LRU of ``path -> (digest, prompt, solution)`` bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, tuple[str, Body, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, digest: bytes) -> Body | None:
+        with self._lock:
+            item = self._items.get(path)
+            if item is None or item[0] != digest:
+                self.misses += 1
+                return None
+            self._items.move_to_end(path)
+            self.hits += 1
+            return item[1]
+
+    def put(self, path: str, digest: bytes, body: Body) -> None:
+        nbytes = body_size(body)
+        with self._lock:
+            self._discard(path)
+            if nbytes > self.max_bytes:
+                return
+            self._items[path] = (digest, body, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._items.popitem(last=False)
+                self.size -= evicted
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._discard(path)
+
+    def _discard(self, path: str) -> None:
+        item = self._items.pop(path, None)
+        if item is not None:
+            self.size -= item[2]
@@ -0,0 +1,146 @@
+"""Persistent SQLite parse cache for the card index.
+
+Stores each parsed card header (metadata only; bodies load lazily) keyed by
+(relative path, mtime, size, content hash) so a freshly started worker can
+rebuild its index from one table scan plus a stat per file instead of
+re-reading and re-parsing the whole vault. The cache is best-effort: any
+SQLite error disables it for the rest of the process and the index falls
+back to parsing files.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.models.card import CardHeader
+from app.services.card_search import Terms, decode_terms, encode_terms
+
+logger = logging.getLogger(__name__)
+
+# Bump when parse_card_file output changes so stale rows are discarded.
+CACHE_FORMAT = 11
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    card TEXT,
+    terms TEXT NOT NULL DEFAULT ''
+);
+"""
+
+
+@dataclass
+class CachedCard:
+    mtime_ns: int
+    size: int
+    digest: bytes
+    header: CardHeader | None
+    terms: Terms = field(default_factory=dict)
+
+
+class CardCache:
+    """SQLite table of parsed cards for one cards directory."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._disabled = False
+
+    def load(self, root: Path) -> dict[str, CachedCard]:
+        """Return cached rows keyed by path relative to ``root``."""
+        rows = self._run(self._load, root)
+        return rows or {}
+
+    def store(self, root: Path, upserts: dict[str, CachedCard], removed: set[str]) -> None:
+        """Write changed rows and delete removed paths in one transaction."""
+        if upserts or removed:
+            self._run(self._store, root, upserts, removed)
+
+    # --- Internals ---
+
+    def _run(self, fn, *args):
+        if self._disabled:
+            return None
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        return fn(conn, *args)
+                finally:
+                    conn.close()
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logger.warning("Card cache %s disabled: %s", self.path, e)
+                self._disabled = True
+                return None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _signature(self, root: Path) -> str:
+        return json.dumps(
+            {"format": CACHE_FORMAT, "root": str(root), "fields": sorted(CardHeader.__dataclass_fields__)}
+        )
+
+    def _load(self, conn: sqlite3.Connection, root: Path) -> dict[str, CachedCard]:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != self._signature(root):
+            # Layout may have changed between formats: start from a fresh table
+            conn.execute("DROP TABLE cards")
+            conn.executescript(_SCHEMA)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                (self._signature(root),),
+            )
+            return {}
+        prefix = os.path.join(str(root), "")
+        rows = {}
+        for rel, mtime_ns, size, digest, card, terms in conn.execute(
+            "SELECT path, mtime_ns, size, digest, card, terms FROM cards"
+        ):
+            header = None
+            if card is not None:
+                header = CardHeader(**json.loads(card), path=prefix + rel.replace("/", os.sep))
+            rows[rel] = CachedCard(mtime_ns, size, digest, header, decode_terms(terms))
+        return rows
+
+    def _store(
+        self,
+        conn: sqlite3.Connection,
+        root: Path,
+        upserts: dict[str, CachedCard],
+        removed: set[str],
+    ) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+            (self._signature(root),),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO cards (path, mtime_ns, size, digest, card, terms)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    rel,
+                    c.mtime_ns,
+                    c.size,
+                    c.digest,
+                    json.dumps(c.header.to_dict()) if c.header is not None else None,
+                    encode_terms(c.terms),
+                )
+                for rel, c in upserts.items()
+            ],
+        )
+        conn.executemany("DELETE FROM cards WHERE path = ?", [(rel,) for rel in removed])
@@ -0,0 +1,141 @@
+"""Per-value secondary indexes over card metadata.
+
+For each filterable header field the index keeps ``normalized value ->
+set of card ordinals``. Values are normalized once, when a card is indexed
+(stripped and lowercased), so a request never lowercases per card:
+equality filters are a dict lookup and combined filters are set
+intersections, smallest first. Substring filters (pillar, layer) scan the
+field's distinct values — a handful per field — and union their sets.
+
+A missing or empty value is indexed under ``""``, so filtering a field by
+``""`` selects the cards that do not set it.
+
+The ``tags`` filter takes a boolean query (see ``tag_query``) evaluated
+over the per-tag sets.
+"""
+
+from app.models.card import CardHeader
+from app.services.tag_query import compile_tag_query, evaluate
+
+# Indexed header fields; "tags" posts a card under each of its tags
+FIELDS = ("pillar", "knowledge_layer", "topic", "concept_node", "subtopic", "deck", "tags")
+
+# Filter name -> (field, match): "contains" for substring, "query" for a
+# boolean tag expression, "equals" otherwise
+_FILTERS = {
+    "pillar": ("pillar", "contains"),
+    "layer": ("knowledge_layer", "contains"),
+    "topic": ("topic", "equals"),
+    "concept": ("concept_node", "equals"),
+    "subtopic": ("subtopic", "equals"),
+    "deck": ("deck", "equals"),
+    "tag": ("tags", "equals"),
+    "tags": ("tags", "query"),
+}
+
+
+def normalize(value: str | None) -> str:
+    """Key a field value is indexed under (and a filter is matched with)."""
+    return value.strip().lower() if value else ""
+
+
+def _keys(header: CardHeader):
+    """(field, normalized value) pairs ``header`` is indexed under."""
+    for field in FIELDS:
+        if field != "tags":
+            yield field, normalize(getattr(header, field))
+    for tag in dict.fromkeys(header.tags):
+        yield "tags", normalize(tag)
+
+
+class FacetIndex:
+    """field -> normalized value -> {ordinal}, kept in step with the card index.
+
+    Not thread-safe on its own; the card index calls it under its lock.
+    """
+
+    def __init__(self):
+        self._sets: dict[str, dict[str, set[int]]] = {f: {} for f in FIELDS}
+        # Indexed ordinals. Per-card keys are not kept: ``remove`` recomputes
+        # them from the header that was indexed, so memory grows with the
+        # distinct values rather than with cards x fields.
+        self._all: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def add(self, ordinal: int, header: CardHeader) -> None:
+        """Index ``header`` under ``ordinal`` (``remove`` the previous
+        header first when replacing one)."""
+        for field, key in _keys(header):
+            self._sets[field].setdefault(key, set()).add(ordinal)
+        self._all.add(ordinal)
+
+    def remove(self, ordinal: int, header: CardHeader) -> None:
+        """Drop ``ordinal``, indexed earlier from ``header``."""
+        if ordinal not in self._all:
+            return
+        self._all.discard(ordinal)
+        for field, key in _keys(header):
+            members = self._sets[field].get(key)
+            if members is None:
+                continue
+            members.discard(ordinal)
+            if not members:
+                del self._sets[field][key]
+
+    def values(self, field: str) -> list[str]:
+        """Distinct normalized values of ``field`` (``""`` for unset)."""
+        return sorted(self._sets[field])
+
+    def equals(self, field: str, value: str | None) -> set[int]:
+        """Ordinals whose ``field`` normalizes to the same key as ``value``.
+
+        The returned set is shared; do not mutate it.
+        """
+        return self._sets[field].get(normalize(value), set())
+
+    def contains(self, field: str, text: str) -> set[int]:
+        """Ordinals whose normalized ``field`` contains ``text`` (case-insensitive)."""
+        needle = text.lower()
+        matches = [members for key, members in self._sets[field].items() if key and needle in key]
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+
+    def tag_query(self, query: str) -> set[int]:
+        """Ordinals matching a boolean tag query such as ``a AND NOT (b OR c)``.
+
+        Raises ``TagQueryError`` if the query is malformed.
+        """
+        node = compile_tag_query(query)
+        tags = self._sets["tags"]
+        return evaluate(node, lambda tag: tags.get(tag, set()), lambda: self._all)
+
+    def select(self, **filters: str | None) -> set[int] | None:
+        """Ordinals matching every given filter (see ``_FILTERS``).
+
+        None values are ignored; None overall when no filter applies. The
+        result may be shared with the index; copy it before mutating.
+        Raises ``TagQueryError`` for a malformed ``tags`` query.
+        """
+        sets = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            field, match = _FILTERS[name]
+            if match == "query":
+                sets.append(self.tag_query(value))
+            elif match == "contains" and value:
+                sets.append(self.contains(field, value))
+            else:
+                sets.append(self.equals(field, value))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            if not result:
+                break
+            result = result & other
+        return result
@@ -0,0 +1,725 @@
+"""Process-wide card index with incremental (mtime, size) refresh.
+
+The index parses every card file once, then on each refresh only re-parses
+files whose modification time or size changed and drops paths that have
+disappeared from disk. Writers inside the process (``save_card`` /
+``delete_card``) update it directly so they never wait for a rescan.
+
+Cards are also keyed by their frontmatter ``card_id`` (which may differ from
+the filename stem), so single-card lookups never walk the tree on a hit.
+
+With a ``CardCache`` attached, the first build reuses parsed cards from disk
+for every file whose stat (or, failing that, content hash) still matches.
+
+With a ``CardStore`` attached (``CARD_STORE=sqlite``), every change is also
+mirrored into an indexed SQLite copy that answers filtered/search queries
+(``find_ordinals``).
+
+Each indexed file also gets a small integer ordinal; the in-memory
+``SearchIndex`` posts card ordinals under every word of the card's text, and
+``FacetIndex`` under each normalized metadata value (pillar, topic, tags...),
+so filters and search combine as set intersections.
+
+Only ``CardHeader`` metadata stays resident. Prompt/solution bodies are read
+back from the file on demand through a byte-budgeted ``BodyCache``.
+
+Alternative orders (``SORT_KEYS``) are computed on first use and kept
+until the next change, as an ordinal array plus its inverse (ordinal ->
+position), so a page of a filtered, sorted listing costs one vectorized
+lookup over the matches instead of a sort of the headers.
+
+``generation`` is a process-wide monotonically increasing store version:
+it changes whenever any card is added, changed or dropped, so other caches
+can key on it.
+"""
+
+import itertools
+import os
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.models.card import Card, CardHeader
+from app.services.card_body_cache import Body, BodyCache
+from app.services.card_cache import CachedCard, CardCache
+from app.services.card_facets import FacetIndex, normalize
+from app.services.card_loader import (
+    Loaded,
+    content_digest,
+    load_card,
+    load_cards,
+    parse_body_bytes,
+    parse_header_bytes,
+)
+from app.services.card_search import SearchIndex, keyword_words, search_is_exact
+from app.services.card_store import CardStore
+
+# Default body cache budget when the caller does not pass one
+_DEFAULT_BODY_BYTES = 16 * 1024 * 1024
+
+# Shared across index instances so a rebuilt index never reuses a version
+_generations = itertools.count(1)
+
+# Files to skip when scanning for cards
+SKIP_NAMES = {"README.md", ".DS_Store"}
+
+# Listing orders for ``CardIndex.page``: header -> sort value. Ties fall
+# back to ascending path order in either direction; "path" itself follows
+# the direction.
+SORT_KEYS = {
+    "path": lambda h: "",
+    "card_id": lambda h: h.card_id,
+    "fire_weight": lambda h: h.fire_weight,
+    "notion_last_edited": lambda h: h.notion_last_edited or "",
+    "topic": lambda h: normalize(h.topic),
+}
+
+
+def is_card_name(name: str) -> bool:
+    """True if a file name looks like a card rather than vault clutter."""
+    return name.endswith(".md") and name not in SKIP_NAMES and not name.startswith(".")
+
+
+def scan_card_files(root: str):
+    """Yield ``(path, stat)`` for every card file below ``root``.
+
+    A plain scandir walk: cheaper than ``Path.rglob`` + ``stat`` because no
+    Path objects are built for files that have not changed.
+    """
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif is_card_name(entry.name):
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+
+@dataclass(slots=True)
+class _Entry:
+    mtime_ns: int
+    size: int
+    digest: bytes
+    header: CardHeader | None  # None when the file is not a valid card
+
+
+class CardIndex:
+    """Parsed cards keyed by path, refreshed incrementally from disk.
+
+    Paths are kept as plain strings internally; the public methods accept
+    and return ``Path`` objects.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        cache: CardCache | None = None,
+        workers: int = 1,
+        chunk_size: int = 256,
+        processes: int = 0,
+        bodies: BodyCache | None = None,
+        store: CardStore | None = None,
+    ):
+        self.root = root
+        self.cache = cache
+        self.store = store
+        self.bodies = bodies if bodies is not None else BodyCache(_DEFAULT_BODY_BYTES)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.generation = next(_generations)
+        self.loaded = False
+        # Set while a CardWatcher keeps the index current; readers then skip
+        # the per-request tree walk.
+        self.watched = False
+        self._prefix = os.path.join(str(root), "")
+        self._entries: dict[str, _Entry] = {}
+        self._dirty: set[str] = set()
+        self._store_synced = False
+        self._ordinals: dict[str, int] = {}
+        self._paths_by_ordinal: list[str | None] = []
+        self._free_ordinals: list[int] = []
+        self.fulltext = SearchIndex()
+        self.facets = FacetIndex()
+        self._by_id: dict[str, str] = {}
+        # Every path of a card_id held by more than one file; unique ids
+        # only have their ``_by_id`` entry
+        self._duplicates: dict[str, set[str]] = {}
+        self._sorted: list[CardHeader] | None = None
+        self._rank: list[int] = []  # ordinal -> position in _sorted
+        self._rank_array: np.ndarray | None = None
+        # (sort key, descending) -> (ordinals in order, ordinal -> position or -1)
+        self._orders: dict[tuple[str, bool], tuple[list[int], np.ndarray]] = {}
+        self._lock = threading.RLock()
+
+    # --- Reads ---
+
+    def headers(self) -> list[CardHeader]:
+        """All card headers in path order. Treat the objects as read-only."""
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = []
+                self._rank = [0] * len(self._paths_by_ordinal)
+                self._rank_array = None
+                for p in sorted(self._entries, key=_path_order):
+                    header = self._entries[p].header
+                    if header is not None:
+                        self._rank[self._ordinals[p]] = len(self._sorted)
+                        self._sorted.append(header)
+            return self._sorted
+
+    def body(self, header: CardHeader, cache: bool = True) -> Body:
+        """(prompt, solution) for an indexed card, from the LRU or its file.
+
+        If the file changed since it was indexed, the entry is refreshed from
+        the same read so header and body stay consistent. ``cache=False``
+        leaves the LRU untouched on a miss (for one-off bulk reads).
+        """
+        path = header.path
+        entry = self._entries.get(path)
+        if entry is not None:
+            cached = self.bodies.get(path, entry.digest)
+            if cached is not None:
+                return cached
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return "", ""
+        digest = content_digest(data)
+        body = parse_body_bytes(data) or ("", "")
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.digest != digest:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    st = None
+                if st is not None:
+                    self._store(path, st, loaded=(digest, *parse_header_bytes(data, path)))
+                    self._persist()
+        if cache:
+            self.bodies.put(path, digest, body)
+        return body
+
+    def to_card(self, header: CardHeader) -> Card:
+        """Full API model for a header (loads the body)."""
+        return header.to_card(*self.body(header))
+
+    def cards(self) -> list[Card]:
+        """All cards with bodies, in path order."""
+        return [self.to_card(h) for h in self.headers()]
+
+    def find_ordinals(self, **filters) -> list[int] | None:
+        """Ordinals of the cards matching ``CardStore.query`` filters,
+        unordered. None when no store is attached or it is unavailable."""
+        rels = self.store.query(**filters) if self.store is not None else None
+        if rels is None:
+            return None
+        with self._lock:
+            return self._rel_ordinals(rels)
+
+    def select(
+        self,
+        search: str | None = None,
+        fuzzy: float | None = None,
+        **filters: str | None,
+    ) -> list[CardHeader]:
+        """Headers matching every metadata filter (``FacetIndex.select``) and
+        the ``search`` query, in path order."""
+        with self._lock:
+            ordinals = self.matches(search, fuzzy, **filters)
+            if ordinals is None:
+                return self.headers()
+            return self._in_path_order(ordinals)
+
+    def matches(
+        self,
+        search: str | None = None,
+        fuzzy: float | None = None,
+        **filters: str | None,
+    ) -> set[int] | None:
+        """Ordinals ``select`` returns; None when nothing constrains the
+        result (every card matches). The set may be shared; do not mutate.
+
+        A plain ``search`` is a case-insensitive substring of the card_id,
+        prompt or solution. The word index answers one-word queries; for
+        others its candidates are checked against their text.
+        """
+        with self._lock:
+            ordinals = self.facets.select(**filters)
+            if search and (ordinals is None or ordinals):
+                hits = self.fulltext.search(search, fuzzy)
+                if hits is not None:
+                    ordinals = hits if ordinals is None else hits & ordinals
+                if not search_is_exact(search, fuzzy):
+                    ordinals = self._containing(search, ordinals)
+            return ordinals
+
+    def page(
+        self,
+        ordinals=None,
+        sort: str = "path",
+        descending: bool = False,
+        after: tuple | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[CardHeader], bool]:
+        """One page of ``ordinals`` (None = all cards) ordered by ``sort``.
+
+        Equal sort values are listed by ascending path, also when
+        ``descending``. ``after`` is a ``cursor_key`` from the previous page;
+        the page starts right after it, even if that card has since changed
+        or gone. Returns the headers and whether more follow.
+        """
+        with self._lock:
+            order, position = self._order(sort, descending)
+            lo = 0
+            if after is not None:
+                value, rel = after
+                key = _walk_key(sort, descending, value, self._prefix + rel.replace("/", os.sep))
+                sort_key = SORT_KEYS[sort]
+                entries, paths = self._entries, self._paths_by_ordinal
+
+                def item_key(ordinal):
+                    path = paths[ordinal]
+                    return _walk_key(sort, descending, sort_key(entries[path].header), path)
+
+                lo = bisect_right(order, key, key=item_key)
+            if ordinals is None:
+                picked = order[lo:] if limit is None else order[lo:lo + limit + 1]
+            else:
+                wanted = np.fromiter(ordinals, dtype=np.int64, count=len(ordinals))
+                wanted = wanted[wanted < len(position)]
+                positions = position[wanted]
+                positions = np.sort(positions[positions >= lo])
+                if limit is not None:
+                    positions = positions[: limit + 1]
+                picked = [order[p] for p in positions.tolist()]
+            more = limit is not None and len(picked) > limit
+            if limit is not None:
+                picked = picked[:limit]
+            entries, paths = self._entries, self._paths_by_ordinal
+            return [entries[paths[o]].header for o in picked], more
+
+    def cursor_key(self, sort: str, header: CardHeader) -> tuple:
+        """Position of ``header`` in ``sort`` order, for ``page(after=...)``:
+        its sort value and relative path (JSON-friendly)."""
+        return SORT_KEYS[sort](header), self._rel(header.path)
+
+    def rank(
+        self,
+        query: str,
+        limit: int,
+        fuzzy: float | None = None,
+        **filters: str | None,
+    ) -> list[tuple[CardHeader, float]] | None:
+        """Top ``limit`` BM25 matches for ``query`` as (header, score), best
+        first; equal scores keep path order. Metadata ``filters`` (as for
+        ``select``) drop cards before the limit applies. None when the
+        query has no words."""
+        with self._lock:
+            if search_is_exact(query, fuzzy):
+                allowed = self.facets.select(**filters)
+            else:
+                allowed = self.matches(query, fuzzy, **filters)
+            self.headers()
+            if self._rank_array is None:
+                self._rank_array = np.asarray(self._rank, dtype=np.int64)
+            ranked = self.fulltext.rank(query, self._rank_array, fuzzy)
+            if ranked is None:
+                return None
+            results = []
+            entries, paths = self._entries, self._paths_by_ordinal
+            for ordinal, score in zip(*ranked):
+                if allowed is None or ordinal in allowed:
+                    results.append((entries[paths[ordinal]].header, float(score)))
+                    if len(results) >= limit:
+                        break
+            return results
+
+    def path_of(self, card_id: str) -> Path | None:
+        """Path of the file holding ``card_id``, if indexed."""
+        with self._lock:
+            path = self._by_id.get(card_id)
+            return Path(path) if path is not None else None
+
+    def version_of(self, card_id: str) -> tuple[str, str] | None:
+        """(relative path, content hash) of the file holding ``card_id``
+        (checked like ``lookup``). The path is part of it because a card's
+        filename is served too, so a move or rename is a new version."""
+        with self._lock:
+            header = self.lookup(card_id)
+            if header is None:
+                return None
+            return self._rel(header.path), self._entries[header.path].digest.hex()
+
+    def lookup(self, card_id: str) -> CardHeader | None:
+        """Find a card by id, re-checking only its own file on a hit.
+
+        A miss falls back to a full refresh so files created outside the
+        process are still found (unless a watcher already keeps us current).
+        """
+        with self._lock:
+            path = self._by_id.get(card_id)
+            if path is not None:
+                entry = self._entries[path]
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    st = None
+                if st is None or entry.mtime_ns != st.st_mtime_ns or entry.size != st.st_size:
+                    self._reload(path)
+                    path = self._by_id.get(card_id)
+            if path is None and not self.watched:
+                self.refresh()
+                path = self._by_id.get(card_id)
+            return self._entries[path].header if path is not None else None
+
+    # --- Maintenance ---
+
+    def refresh(self) -> None:
+        """Re-stat the tree; re-parse changed files and drop deleted ones."""
+        with self._lock:
+            cached: dict[str, CachedCard] = {}
+            if not self.loaded and self.cache is not None:
+                cached = self.cache.load(self.root)
+            self.loaded = True
+            seen: set[str] = set()
+            changed = []
+            for path, st in scan_card_files(str(self.root)):
+                seen.add(path)
+                entry = self._entries.get(path)
+                if (
+                    entry is not None
+                    and entry.mtime_ns == st.st_mtime_ns
+                    and entry.size == st.st_size
+                ):
+                    continue
+                changed.append((path, st, cached.pop(self._rel(path), None)))
+            for (path, st, row), loaded in zip(changed, self._load_many(changed)):
+                if loaded is None:
+                    self._evict(path)  # vanished or unreadable since the scan
+                else:
+                    self._store(path, st, row, loaded)
+            for path in self._entries.keys() - seen:
+                self._evict(path)
+            # Leftover rows belong to files deleted while the process was down
+            self._dirty.update(self._prefix + rel for rel in cached)
+            self._persist()
+
+    def reload(self, path: Path) -> CardHeader | None:
+        """Re-parse a single file (e.g. right after writing it)."""
+        with self._lock:
+            return self._reload(str(path))
+
+    def update_paths(self, paths) -> None:
+        """Re-check a batch of individual paths (re-parse, or evict if gone)."""
+        with self._lock:
+            for path in paths:
+                path = str(path)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self._evict(path)
+                    continue
+                entry = self._entries.get(path)
+                if entry is None or entry.mtime_ns != st.st_mtime_ns or entry.size != st.st_size:
+                    self._store(path, st)
+            self._persist()
+
+    def remove(self, path: Path) -> None:
+        """Forget a single file (e.g. right after deleting it)."""
+        with self._lock:
+            self._evict(str(path))
+            self._persist()
+
+    # --- Internals (caller holds the lock) ---
+
+    def _order(self, sort: str, descending: bool = False) -> tuple[list[int], np.ndarray]:
+        """Valid-card ordinals sorted by ``SORT_KEYS[sort]`` in the given
+        direction then by ascending path, and the inverse position array (-1
+        for free or invalid ordinals)."""
+        cached = self._orders.get((sort, descending))
+        if cached is None:
+            headers = self.headers()
+            ordinals = [self._ordinals[h.path] for h in headers]
+            if sort != "path":
+                key = SORT_KEYS[sort]
+                # Stable sort of the path-ordered list keeps path order on
+                # ties; reverse=True does too
+                ordinals = [
+                    ordinals[i]
+                    for i in sorted(range(len(headers)), key=lambda i: key(headers[i]), reverse=descending)
+                ]
+            elif descending:
+                ordinals.reverse()
+            position = np.full(len(self._paths_by_ordinal), -1, dtype=np.int64)
+            position[ordinals] = np.arange(len(ordinals), dtype=np.int64)
+            self._orders[sort, descending] = cached = (ordinals, position)
+        return cached
+
+    def _rel_ordinals(self, rels: list[str]) -> list[int]:
+        ordinals = []
+        for rel in rels:
+            ordinal = self._ordinals.get(self._prefix + rel.replace("/", os.sep))
+            if ordinal is not None:
+                ordinals.append(ordinal)
+        return ordinals
+
+    def _in_path_order(self, ordinals) -> list[CardHeader]:
+        """Headers for valid-card ordinals, sorted like ``headers()``."""
+        ordered = self.headers()
+        rank = self._rank
+        entries, paths = self._entries, self._paths_by_ordinal
+        ranked = [o for o in ordinals if entries[paths[o]].header is not None]
+        ranked.sort(key=rank.__getitem__)
+        return [ordered[rank[o]] for o in ranked]
+
+    def _containing(self, query: str, ordinals) -> set[int]:
+        """Those of ``ordinals`` (None = every card) whose card_id, prompt or
+        solution contains ``query``, case-insensitively. Bodies come from
+        the LRU or the file, without filling the LRU."""
+        needle = query.lower()
+        if ordinals is None:
+            ordinals = [self._ordinals[h.path] for h in self.headers()]
+        found = set()
+        for ordinal in list(ordinals):
+            header = self._entries[self._paths_by_ordinal[ordinal]].header
+            if header is None:
+                continue
+            if needle in header.card_id.lower():
+                found.add(ordinal)
+                continue
+            prompt, solution = self.body(header, cache=False)
+            if needle in prompt.lower() or needle in solution.lower():
+                found.add(ordinal)
+        return found
+
+    def _rel(self, path: str) -> str:
+        return path[len(self._prefix):].replace(os.sep, "/")
+
+    def _reload(self, path: str) -> CardHeader | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None:
+            self._evict(path)
+            header = None
+        else:
+            header = self._store(path, st)
+        self._persist()
+        return header
+
+    def _load_many(self, changed: list) -> list[Loaded]:
+        """Load changed files; ones whose cached stat still matches skip I/O."""
+        results: list[Loaded] = [None] * len(changed)
+        todo: list[tuple[str, CachedCard | None]] = []
+        slots: list[int] = []
+        for i, (path, st, row) in enumerate(changed):
+            if row is not None and row.mtime_ns == st.st_mtime_ns and row.size == st.st_size:
+                results[i] = (row.digest, row.header, row.terms)
+            else:
+                slots.append(i)
+                todo.append((path, row))
+        loaded = load_cards(todo, self.workers, self.chunk_size, self.processes)
+        for i, result in zip(slots, loaded):
+            results[i] = result
+        return results
+
+    def _store(
+        self,
+        path: str,
+        st,
+        cached: CachedCard | None = None,
+        loaded: Loaded = None,
+    ) -> CardHeader | None:
+        if loaded is None:
+            if (
+                cached is not None
+                and cached.mtime_ns == st.st_mtime_ns
+                and cached.size == st.st_size
+            ):
+                loaded = (cached.digest, cached.header, cached.terms)
+            else:
+                loaded = load_card(path, cached)
+        if loaded is None:
+            self._evict(path)
+            return None
+        digest, header, terms = loaded
+        old = self._entries.get(path)
+        ordinal = self._ordinal(path)
+        if old is not None and old.header is not None:
+            self._unlink_id(old.header.card_id, path)
+            self.facets.remove(ordinal, old.header)
+        if header is not None:
+            self._link_id(header.card_id, path)
+            keywords = keyword_words(header.concept, header.concept_node, header.subtopic)
+            self.fulltext.add(ordinal, terms, keywords)
+            self.facets.add(ordinal, header)
+        else:
+            self.fulltext.remove(ordinal)
+        self._entries[path] = _Entry(st.st_mtime_ns, st.st_size, digest, header)
+        if cached is None or cached.mtime_ns != st.st_mtime_ns or cached.size != st.st_size:
+            self._dirty.add(path)
+        self._touch()
+        return header
+
+    def _evict(self, path: str) -> None:
+        old = self._entries.pop(path, None)
+        if old is None:
+            return
+        ordinal = self._ordinals.pop(path)
+        if old.header is not None:
+            self._unlink_id(old.header.card_id, path)
+            self.facets.remove(ordinal, old.header)
+        self.fulltext.remove(ordinal)
+        self._paths_by_ordinal[ordinal] = None
+        self._free_ordinals.append(ordinal)
+        self.bodies.discard(path)
+        self._dirty.add(path)
+        self._touch()
+
+    def _persist(self) -> None:
+        """Flush rows changed since the last flush to the cache and store."""
+        dirty, self._dirty = self._dirty, set()
+        # The store is only reconciled against a fully scanned tree
+        if self.store is not None and self.loaded:
+            if self._store_synced:
+                self._mirror(dirty)
+            else:
+                self._sync_store()
+        if not dirty or self.cache is None:
+            return
+        upserts: dict[str, CachedCard] = {}
+        removed: set[str] = set()
+        for path in dirty:
+            entry = self._entries.get(path)
+            if entry is None:
+                removed.add(self._rel(path))
+            else:
+                upserts[self._rel(path)] = CachedCard(
+                    entry.mtime_ns,
+                    entry.size,
+                    entry.digest,
+                    entry.header,
+                    self.fulltext.terms(self._ordinals[path]),
+                )
+        self.cache.store(self.root, upserts, removed)
+
+    def _mirror(self, paths) -> None:
+        upserts: dict[str, tuple[str, CardHeader]] = {}
+        removed: set[str] = set()
+        for path in paths:
+            entry = self._entries.get(path)
+            if entry is None or entry.header is None:
+                removed.add(self._rel(path))
+            else:
+                upserts[self._rel(path)] = (path, entry.header)
+        self.store.apply(self.root, upserts, removed)
+
+    def _sync_store(self) -> None:
+        """First flush: rewrite only rows whose content hash differs."""
+        stored = self.store.digests(self.root)
+        self._store_synced = True
+        if stored is None:
+            return
+        upserts: dict[str, tuple[str, CardHeader]] = {}
+        for path, entry in self._entries.items():
+            if entry.header is None:
+                continue
+            rel = self._rel(path)
+            if stored.pop(rel, None) != entry.digest:
+                upserts[rel] = (path, entry.header)
+        self.store.apply(self.root, upserts, set(stored))
+
+    def _ordinal(self, path: str) -> int:
+        """Stable small integer for ``path``; freed ordinals are reused."""
+        ordinal = self._ordinals.get(path)
+        if ordinal is None:
+            if self._free_ordinals:
+                ordinal = self._free_ordinals.pop()
+                self._paths_by_ordinal[ordinal] = path
+            else:
+                ordinal = len(self._paths_by_ordinal)
+                self._paths_by_ordinal.append(path)
+            self._ordinals[path] = ordinal
+        return ordinal
+
+    def _link_id(self, card_id: str, path: str) -> None:
+        current = self._by_id.get(card_id)
+        if current is None or current == path:
+            self._by_id[card_id] = path
+            return
+        paths = self._duplicates.setdefault(card_id, {current})
+        paths.add(path)
+        self._by_id[card_id] = min(paths, key=lambda p: _id_preference(card_id, p))
+
+    def _unlink_id(self, card_id: str, path: str) -> None:
+        paths = self._duplicates.get(card_id)
+        if paths is None:
+            if self._by_id.get(card_id) == path:
+                del self._by_id[card_id]
+            return
+        paths.discard(path)
+        if len(paths) == 1:
+            del self._duplicates[card_id]
+            (self._by_id[card_id],) = paths
+        else:
+            self._by_id[card_id] = min(paths, key=lambda p: _id_preference(card_id, p))
+
+    def _touch(self) -> None:
+        self._sorted = None
+        self._orders.clear()
+        self.generation = next(_generations)
+
+
+def _path_order(path: str) -> list[str]:
+    """Sort key matching ``sorted()`` over Path objects (component-wise)."""
+    return path.split(os.sep)
+
+
+def _walk_key(sort: str, descending: bool, value, path: str) -> tuple:
+    """Key of a card at ``path`` with sort ``value`` under which
+    ``_order(sort, descending)`` is ascending, for bisecting a cursor."""
+    if not descending:
+        return value, _path_order(path)
+    if sort == "path":
+        return (_Reversed(_path_order(path)),)
+    return _Reversed(value), _path_order(path)
+
+
+class _Reversed:
+    """Wraps a sort value so it compares in reverse."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _id_preference(card_id: str, path: str) -> tuple:
+    """Sort key picking which file wins when several share a card_id.
+
+    Mirrors the old lookup order: a file named after the id beats one that
+    only matches by frontmatter, and shallower (flat layout) files win.
+    """
+    name = os.path.basename(path)
+    return (name[:-3] != card_id, path.count(os.sep), _path_order(path))
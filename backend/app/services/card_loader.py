@@ -0,0 +1,130 @@
+"""Read + parse card files for the card index, serially or in parallel.
+
+Reads are I/O-bound (and slow on network filesystems), so batches are split
+into chunks handled by a thread pool. Parsing is CPU-bound; with
+``processes > 0`` the threads hand the raw bytes to a process pool instead
+of parsing under the GIL. Results always come back in input order, so the
+index is built deterministically whatever the worker count.
+"""
+
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from app.models.card import CardHeader
+from app.parsers.card_parser import parse_card_body, parse_card_text
+from app.services.card_cache import CachedCard
+from app.services.card_search import Terms, card_terms
+
+# load_card() result: (content digest, card header or None if the file is not
+# a valid card, search terms), or None when the file could not be read at all.
+Loaded = tuple[bytes, CardHeader | None, Terms] | None
+
+
+def content_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _decode(data: bytes) -> str | None:
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    # read_text() applies universal newlines; match it
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def parse_header_bytes(data: bytes, path: str) -> tuple[CardHeader | None, Terms]:
+    """Parse raw file bytes the way ``parse_card_file`` reads text, keeping
+    the metadata and search terms; the bodies are dropped straight away."""
+    text = _decode(data)
+    card = parse_card_text(text, Path(path)) if text is not None else None
+    if card is None:
+        return None, {}
+    terms = card_terms(card.card_id, card.prompt, card.solution)
+    return CardHeader.from_card(card, path), terms
+
+
+def parse_body_bytes(data: bytes) -> tuple[str, str] | None:
+    """Extract (prompt, solution) from raw file bytes."""
+    text = _decode(data)
+    return parse_card_body(text) if text is not None else None
+
+
+def _read(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def load_card(path: str, cached: CachedCard | None = None) -> Loaded:
+    """Read, hash and parse one file, reusing ``cached`` if the hash matches."""
+    data = _read(path)
+    if data is None:
+        return None
+    digest = content_digest(data)
+    if cached is not None and cached.digest == digest:
+        # Touched but unchanged (e.g. git checkout) — keep the parse
+        return digest, cached.header, cached.terms
+    return digest, *parse_header_bytes(data, path)
+
+
+def _load_chunk(chunk: list[tuple[str, CachedCard | None]]) -> list[Loaded]:
+    return [load_card(path, cached) for path, cached in chunk]
+
+
+def _parse_chunk(chunk: list[tuple[bytes, str]]) -> list[tuple[CardHeader | None, Terms]]:
+    """Process-pool entry point: parse already-read files."""
+    return [parse_header_bytes(data, path) for data, path in chunk]
+
+
+def _read_then_parse(
+    chunk: list[tuple[str, CachedCard | None]], processes: ProcessPoolExecutor
+) -> list[Loaded]:
+    results: list[Loaded] = []
+    to_parse: list[tuple[bytes, str]] = []
+    slots: list[int] = []
+    for path, cached in chunk:
+        data = _read(path)
+        if data is None:
+            results.append(None)
+            continue
+        digest = content_digest(data)
+        if cached is not None and cached.digest == digest:
+            results.append((digest, cached.header, cached.terms))
+            continue
+        slots.append(len(results))
+        results.append((digest, None, {}))
+        to_parse.append((data, path))
+    if to_parse:
+        for slot, (header, terms) in zip(slots, processes.submit(_parse_chunk, to_parse).result()):
+            if header is not None:
+                header.intern()  # unpickled in this process: re-share its strings
+            results[slot] = (results[slot][0], header, terms)
+    return results
+
+
+def load_cards(
+    items: list[tuple[str, CachedCard | None]],
+    workers: int = 1,
+    chunk_size: int = 256,
+    processes: int = 0,
+) -> list[Loaded]:
+    """``load_card`` over many files, in input order.
+
+    Batches no larger than one chunk (or ``workers <= 1``) load serially —
+    pool start-up would cost more than it saves.
+    """
+    if workers <= 1 or len(items) <= chunk_size:
+        return _load_chunk(items)
+
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="card-load") as threads:
+        if processes > 0:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                parts = threads.map(lambda c: _read_then_parse(c, pool), chunks)
+                return [r for part in parts for r in part]
+        parts = threads.map(_load_chunk, chunks)
+        return [r for part in parts for r in part]
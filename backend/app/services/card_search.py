@@ -0,0 +1,444 @@
+"""In-memory inverted index for card search.
+
+Card text (card_id, prompt, solution) is split into lowercase words. Each
+distinct word gets a small integer term id and a posting: a sorted
+``array("Q")`` packing ``card ordinal << 16 | term frequency`` per card, so
+an entry costs eight bytes instead of a dict slot. Each card keeps only the
+term ids it was indexed under (``array("I")``), which ``remove`` and
+``terms`` read back.
+
+A plain query keeps the API's substring semantics ("ayes" finds "Bayes",
+"x = " finds "x = 1"); the index narrows the candidates. Each query word
+must occur in some card word: whole when the query delimits it on both
+sides, as a prefix or suffix when only one side is delimited, anywhere in
+the word otherwise. Prefixes are resolved against the sorted vocabulary
+with bisect, suffixes and infixes by a ``str.find`` scan over the
+vocabulary joined into one string, so query cost follows the vocabulary
+and the matching postings rather than the corpus text. A one-word query is
+answered exactly; anything longer is a candidate set that the card index
+confirms against the text of those cards only (``search_is_exact``).
+
+For typo tolerance every vocabulary word is also posted under its
+character trigrams. A fuzzy query word expands to the words whose trigram
+sets are similar enough (Jaccard, as in pg_trgm), so "bayse" still finds
+"bayes". The trigram index maps each trigram to the term ids containing it;
+it covers words, not cards, and changes only when a word enters or leaves
+the vocabulary. Only purely alphabetic words are posted there: tokens with
+digits (card id parts such as "1c" or "0042", numbers) are only matched as
+typed, since a near miss on them is another card, not a typo.
+
+The short keyword fields (concept, concept_node, subtopic) only feed fuzzy
+search: their words join the vocabulary with a separate, frequency-less
+posting that a fuzzy query also matches ("event model" finds subtopic
+"event-models"). Plain search and BM25 scores see the card text alone.
+
+``rank`` orders matches by BM25. Each term's posting is frozen into a pair
+of NumPy arrays (ordinals, frequencies) the first time it is scored, and
+document lengths live in one float array indexed by ordinal, so scoring a
+query is a handful of vectorized operations per query word.
+"""
+
+import math
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+import numpy as np
+
+# Word characters, minus underscore — the same split as SQLite's unicode61
+# tokenizer, so CARD_STORE=sqlite returns the same matches.
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# BM25 parameters (the usual Lucene/Elasticsearch defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# term -> frequency for one card
+Terms = dict[str, int]
+
+# A posting entry is ``ordinal << _FREQ_BITS | frequency``; larger
+# frequencies are clamped (BM25 saturates long before that)
+_FREQ_BITS = 16
+_FREQ_MAX = (1 << _FREQ_BITS) - 1
+
+# Set on a card's term id when the term came from its keyword fields
+_KEYWORD = 1 << 31
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words of ``text`` in order (duplicates kept)."""
+    return _WORD_RE.findall(text.lower())
+
+
+def search_is_exact(query: str, fuzzy: float | None = None) -> bool:
+    """True when ``SearchIndex.search(query, fuzzy)`` needs no check against
+    the card text: a plain query that is one word, or a fuzzy query with
+    words (fuzzy matching is word-based)."""
+    q = query.lower()
+    if fuzzy is not None:
+        return _WORD_RE.search(q) is not None
+    return _WORD_RE.fullmatch(q) is not None
+
+
+def card_terms(card_id: str, prompt: str, solution: str) -> Terms:
+    """Searchable words of a card with their frequencies."""
+    terms: Terms = {}
+    for text in (card_id, prompt, solution):
+        for word in tokenize(text):
+            terms[word] = terms.get(word, 0) + 1
+    return terms
+
+
+def keyword_words(*fields: str | None) -> set[str]:
+    """Words of a card's keyword fields for fuzzy search; None is skipped."""
+    return {word for text in fields if text for word in tokenize(text)}
+
+
+def trigrams(word: str) -> set[str]:
+    """Character trigrams of a word, padded like pg_trgm ("  w", " wo", ...)."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def encode_terms(terms: Terms) -> str:
+    """Compact text form for the parse cache: ``"word:n word:n"``."""
+    return " ".join(f"{t}:{n}" for t, n in terms.items())
+
+
+def decode_terms(text: str) -> Terms:
+    terms: Terms = {}
+    for item in text.split():
+        word, _, n = item.rpartition(":")
+        terms[word] = int(n)
+    return terms
+
+
+class SearchIndex:
+    """term -> packed {ordinal: frequency} postings, with prefix lookup and BM25.
+
+    Not thread-safe on its own; the card index calls it under its lock.
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}  # term -> term id
+        self._words: list[str | None] = []  # term id -> term (None when free)
+        self._free_ids: list[int] = []
+        self._postings: list[array | None] = []  # term id -> sorted packed entries
+        self._keyword_postings: list[array | None] = []  # term id -> sorted ordinals
+        self._docs: list[array | None] = []  # ordinal -> term ids (| _KEYWORD)
+        self._n_docs = 0
+        self._vocab: list[str] | None = None  # sorted terms, rebuilt lazily
+        # The sorted terms joined as "\nterm\nterm...\n" and each term's
+        # offset in it, for suffix/infix scans; rebuilt with _vocab
+        self._vocab_text = ""
+        self._vocab_starts = array("I")
+        self._arrays: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._total_len = 0
+        self._by_trigram: dict[str, array] = {}  # trigram -> term ids
+        self._trigram_counts = array("I")  # term id -> number of trigrams
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def add(self, ordinal: int, terms: Terms, keywords=()) -> None:
+        """Index ``terms`` (and fuzzy-only ``keywords`` words) for
+        ``ordinal``, replacing what it had before."""
+        self.remove(ordinal)
+        ids = array("I")
+        for word, freq in terms.items():
+            term = self._term(word)
+            posting = self._postings[term]
+            if posting is None:
+                self._postings[term] = posting = array("Q")
+            _insert(posting, ordinal << _FREQ_BITS | min(freq, _FREQ_MAX))
+            self._arrays.pop(term, None)
+            ids.append(term)
+        for word in keywords:
+            term = self._term(word)
+            posting = self._keyword_postings[term]
+            if posting is None:
+                self._keyword_postings[term] = posting = array("I")
+            _insert(posting, ordinal)
+            ids.append(term | _KEYWORD)
+        if ordinal >= len(self._docs):
+            self._docs.extend([None] * (ordinal + 1 - len(self._docs)))
+        self._docs[ordinal] = ids
+        self._n_docs += 1
+        length = sum(terms.values())
+        if ordinal >= len(self._doc_len):
+            grown = np.zeros(max(ordinal + 1, 2 * len(self._doc_len)), dtype=np.float32)
+            grown[: len(self._doc_len)] = self._doc_len
+            self._doc_len = grown
+        self._doc_len[ordinal] = length
+        self._total_len += length
+
+    def remove(self, ordinal: int) -> None:
+        ids = self._docs[ordinal] if ordinal < len(self._docs) else None
+        if ids is None:
+            return
+        self._docs[ordinal] = None
+        self._n_docs -= 1
+        for term in ids:
+            if term & _KEYWORD:
+                term &= ~_KEYWORD
+                posting = self._keyword_postings[term]
+                del posting[bisect_left(posting, ordinal)]
+                if not posting:
+                    self._keyword_postings[term] = None
+            else:
+                posting = self._postings[term]
+                del posting[_find(posting, ordinal)]
+                self._arrays.pop(term, None)
+                if not posting:
+                    self._postings[term] = None
+            if self._postings[term] is None and self._keyword_postings[term] is None:
+                self._remove_term(term)
+        self._total_len -= int(self._doc_len[ordinal])
+        self._doc_len[ordinal] = 0
+
+    def terms(self, ordinal: int) -> Terms:
+        """Frequencies indexed for ``ordinal`` (empty if none)."""
+        ids = self._docs[ordinal] if ordinal < len(self._docs) else None
+        if ids is None:
+            return {}
+        postings = self._postings
+        return {
+            self._words[term]: postings[term][_find(postings[term], ordinal)] & _FREQ_MAX
+            for term in ids
+            if not term & _KEYWORD
+        }
+
+    def search(self, query: str, fuzzy: float | None = None) -> set[int] | None:
+        """Ordinals of the cards whose text can contain ``query``.
+
+        A plain query is matched as a case-insensitive substring of the
+        card text (see the module docstring): exact for one word, a superset
+        to confirm otherwise. With ``fuzzy`` (a trigram similarity threshold
+        in 0..1) every query word must occur in a card word, be at least
+        that similar to one, or occur in a keyword field. None when the
+        query has no words to look up (``""``, ``"()"``, ``" "``): every card
+        is a candidate.
+        """
+        words = _query_words(query)
+        if not words:
+            return None
+        result: set[int] | None = None
+        # Longest words first: they tend to be the most selective
+        for word, kind in sorted(words, key=lambda w: len(w[0]), reverse=True):
+            matches: set[int] = set()
+            for term in self._lookup(word, kind, fuzzy):
+                if self._postings[term] is not None:
+                    matches.update(self._ordinals_of(term).tolist())
+                if fuzzy is not None and self._keyword_postings[term] is not None:
+                    matches.update(self._keyword_postings[term])
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result
+
+    def rank(
+        self,
+        query: str,
+        order: np.ndarray | None = None,
+        fuzzy: float | None = None,
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """BM25 ranking of the cards ``search(query, fuzzy)`` would match.
+
+        Each query word scores the card words containing it (or, fuzzy,
+        similar to it). For a plain query of several words this ranks a
+        superset; the caller drops the cards that fail the text check.
+
+        Returns ``(ordinals, scores)`` sorted by descending score. Ties keep
+        the relative order of ``order`` (ordinal -> sort position), or
+        ordinal order without it. A fuzzy match on a keyword field selects
+        the card but adds nothing to its score. None when the query has no
+        words.
+        """
+        words = set(tokenize(query))
+        if not words:
+            return None
+        n_docs = self._n_docs
+        size = len(self._doc_len)
+        if n_docs == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        avg_len = self._total_len / n_docs
+        # Length normalisation per ordinal, shared by every term
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len / avg_len)
+
+        scores = np.zeros(size, dtype=np.float32)
+        matched = np.ones(size, dtype=bool)
+        for word in words:
+            word_hits = np.zeros(size, dtype=bool)
+            for term in self._lookup(word, "infix", fuzzy):
+                if self._postings[term] is not None:
+                    docs, freqs = self._term_arrays(term)
+                    df = len(docs)
+                    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                    scores[docs] += idf * freqs * (BM25_K1 + 1) / (freqs + norm[docs])
+                    word_hits[docs] = True
+                keyword_docs = self._keyword_postings[term] if fuzzy is not None else None
+                if keyword_docs is not None:
+                    word_hits[np.fromiter(keyword_docs, dtype=np.int64, count=len(keyword_docs))] = True
+            matched &= word_hits
+
+        candidates = np.flatnonzero(matched)
+        if order is not None:
+            candidates = candidates[np.argsort(order[candidates], kind="stable")]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return ranked, scores[ranked]
+
+    def similar(self, word: str, threshold: float) -> list[str]:
+        """Vocabulary words whose trigram similarity to ``word`` is at least
+        ``threshold``."""
+        return [self._words[term] for term in self._similar(word, threshold)]
+
+    def _similar(self, word: str, threshold: float) -> list[int]:
+        grams = trigrams(word)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self._by_trigram.get(gram, ()))
+        n = len(grams)
+        counts = self._trigram_counts
+        return [
+            term
+            for term, common in shared.items()
+            if common / (n + counts[term] - common) >= threshold
+        ]
+
+    def _lookup(self, word: str, kind: str, fuzzy: float | None = None) -> list[int]:
+        """Ids of the vocabulary terms ``word`` matches as a ``kind`` (see
+        ``_query_words``); fuzzy adds similar words to any term containing
+        ``word``."""
+        if fuzzy is not None:
+            return list(set(self._containing(word)).union(self._similar(word, fuzzy)))
+        if kind == "word":
+            term = self._ids.get(word)
+            return [term] if term is not None else []
+        if kind == "prefix":
+            return self._prefixed(word)
+        return self._containing(word, suffix=kind == "suffix")
+
+    def _prefixed(self, prefix: str) -> list[int]:
+        """Ids of the vocabulary terms starting with ``prefix``."""
+        vocab = self._sorted_vocab()
+        lo = bisect_left(vocab, prefix)
+        hi = lo
+        while hi < len(vocab) and vocab[hi].startswith(prefix):
+            hi += 1
+        ids = self._ids
+        return [ids[word] for word in vocab[lo:hi]]
+
+    def _containing(self, fragment: str, suffix: bool = False) -> list[int]:
+        """Ids of the vocabulary terms containing (or ending with) ``fragment``."""
+        vocab = self._sorted_vocab()
+        text, starts, ids = self._vocab_text, self._vocab_starts, self._ids
+        pattern = fragment + "\n" if suffix else fragment
+        found = []
+        at = text.find(pattern)
+        while at != -1:
+            # Words hold no "\n", so the hit lies inside one term
+            k = bisect_right(starts, at) - 1
+            found.append(ids[vocab[k]])
+            if k + 1 == len(starts):
+                break
+            at = text.find(pattern, starts[k + 1])
+        return found
+
+    def _sorted_vocab(self) -> list[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self._ids)
+            starts = array("I")
+            offset = 1
+            for word in self._vocab:
+                starts.append(offset)
+                offset += len(word) + 1
+            self._vocab_starts = starts
+            self._vocab_text = "\n" + "".join(word + "\n" for word in self._vocab)
+        return self._vocab
+
+    def _term(self, word: str) -> int:
+        """Term id of ``word``, adding it to the vocabulary if new."""
+        term = self._ids.get(word)
+        return term if term is not None else self._add_term(word)
+
+    def _add_term(self, word: str) -> int:
+        word = sys.intern(word)
+        grams = _fuzzy_trigrams(word)
+        if self._free_ids:
+            term = self._free_ids.pop()
+            self._words[term] = word
+            self._trigram_counts[term] = len(grams)
+        else:
+            term = len(self._words)
+            self._words.append(word)
+            self._postings.append(None)
+            self._keyword_postings.append(None)
+            self._trigram_counts.append(len(grams))
+        self._ids[word] = term
+        self._vocab = None
+        for gram in grams:
+            members = self._by_trigram.get(gram)
+            if members is None:
+                self._by_trigram[gram] = members = array("I")
+            members.append(term)
+        return term
+
+    def _remove_term(self, term: int) -> None:
+        word = self._words[term]
+        del self._ids[word]
+        self._words[term] = None
+        self._free_ids.append(term)
+        self._vocab = None
+        for gram in _fuzzy_trigrams(word):
+            members = self._by_trigram[gram]
+            members.remove(term)
+            if not members:
+                del self._by_trigram[gram]
+
+    def _ordinals_of(self, term: int) -> np.ndarray:
+        packed = np.frombuffer(self._postings[term], dtype=np.uint64)
+        return packed >> np.uint64(_FREQ_BITS)
+
+    def _term_arrays(self, term: int) -> tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            packed = np.frombuffer(self._postings[term], dtype=np.uint64)
+            docs = (packed >> np.uint64(_FREQ_BITS)).astype(np.int64)
+            freqs = (packed & np.uint64(_FREQ_MAX)).astype(np.float32)
+            self._arrays[term] = arrays = (docs, freqs)
+        return arrays
+
+
+def _query_words(query: str) -> list[tuple[str, str]]:
+    """Distinct words of a lowercased query, each with how it must match a
+    card word: "word" (delimited on both sides in the query), "prefix"
+    (delimited before it), "suffix" (after it) or "infix" (neither)."""
+    q = query.lower()
+    words = {}
+    for m in _WORD_RE.finditer(q):
+        before, after = m.start() > 0, m.end() < len(q)
+        kind = "word" if before and after else "prefix" if before else "suffix" if after else "infix"
+        words[m.group(), kind] = None
+    return list(words)
+
+
+def _fuzzy_trigrams(word: str) -> set[str]:
+    """Trigrams ``word`` is posted under in the fuzzy index (none if it has
+    digits)."""
+    return trigrams(word) if word.isalpha() else set()
+
+
+def _insert(posting: array, entry: int) -> None:
+    """Insert ``entry`` into a sorted posting (usually at the end)."""
+    if posting and posting[-1] > entry:
+        posting.insert(bisect_left(posting, entry), entry)
+    else:
+        posting.append(entry)
+
+
+def _find(posting: array, ordinal: int) -> int:
+    """Index of ``ordinal``'s entry in a posting that holds it."""
+    return bisect_left(posting, ordinal << _FREQ_BITS)
@@ -1,84 +1,508 @@
 """Card service: read/write cards from Obsidian vault."""
 
+import base64
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
 
-from app.config import CARDS_DIR
-from app.models.card import Card
-from app.parsers.card_parser import card_to_markdown, parse_card_file
+from starlette.concurrency import run_in_threadpool
 
-# Files to skip when scanning for cards
-_SKIP_NAMES = {"README.md", ".DS_Store"}
+from app.config import (
+    CARD_BODY_CACHE_BYTES,
+    CARD_BULK_WORKERS,
+    CARD_CACHE_FILE,
+    CARD_FUZZY_THRESHOLD,
+    CARD_LOAD_CHUNK_SIZE,
+    CARD_LOAD_PROCESSES,
+    CARD_LOAD_WORKERS,
+    CARD_STORE,
+    CARD_STORE_FILE,
+    CARD_WATCHER,
+    CARD_WATCHER_DEBOUNCE,
+    CARD_WATCHER_INTERVAL,
+    CARDS_DIR,
+)
+from app.models.card import (
+    BulkOperation,
+    BulkResult,
+    Card,
+    CardCreate,
+    CardHeader,
+    CardUpdate,
+)
+from app.parsers.card_parser import card_to_markdown, parse_card_id
+from app.services.card_body_cache import BodyCache
+from app.services.card_cache import CardCache
+from app.services.card_index import CardIndex
+from app.services.card_store import CardStore
+from app.services.card_watcher import CardWatcher
+
+_index: CardIndex | None = None
+_index_lock = threading.Lock()
+_watcher: CardWatcher | None = None
+
+# Set once a request has refreshed the index (see ``request_version``), so
+# the rest of that request does not walk the tree again
+_refreshed: ContextVar[bool] = ContextVar("card_index_refreshed", default=False)
+
+# API field order for projected card dicts
+CARD_FIELDS = tuple(Card.model_fields)
+
+
+class CursorError(ValueError):
+    """A pagination cursor is malformed or belongs to another ordering."""
+
+
+def _store_path() -> Path | None:
+    return CARD_STORE_FILE if CARD_STORE == "sqlite" else None
+
+
+def _get_index() -> CardIndex:
+    """Return the process-wide index, (re)building it if its config changed."""
+    global _index
+    with _index_lock:
+        cache_path = _index.cache.path if _index is not None and _index.cache else None
+        store_path = _index.store.path if _index is not None and _index.store else None
+        if (
+            _index is None
+            or _index.root != CARDS_DIR
+            or cache_path != CARD_CACHE_FILE
+            or store_path != _store_path()
+        ):
+            if _index is not None and _index.store is not None:
+                _index.store.close()
+            cache = CardCache(CARD_CACHE_FILE) if CARD_CACHE_FILE else None
+            store = CardStore(_store_path()) if _store_path() else None
+            _index = CardIndex(
+                CARDS_DIR,
+                cache=cache,
+                workers=CARD_LOAD_WORKERS,
+                chunk_size=CARD_LOAD_CHUNK_SIZE,
+                processes=CARD_LOAD_PROCESSES,
+                bodies=BodyCache(CARD_BODY_CACHE_BYTES),
+                store=store,
+            )
+    return _index
+
+
+def _fresh_index() -> CardIndex:
+    index = _get_index()
+    if not index.watched and not _refreshed.get():
+        index.refresh()
+    return index
+
+
+def _loaded_index() -> CardIndex:
+    """Index that has been built at least once (lookups keep it fresh)."""
+    index = _get_index()
+    if not index.loaded:
+        index.refresh()
+    return index
+
+
+def start_watcher() -> CardWatcher | None:
+    """Start the background card watcher if CARD_WATCHER enables it."""
+    global _watcher
+    if CARD_WATCHER == "off" or _watcher is not None:
+        return _watcher
+    _watcher = CardWatcher(
+        _get_index(),
+        backend=CARD_WATCHER,
+        debounce=CARD_WATCHER_DEBOUNCE,
+        interval=CARD_WATCHER_INTERVAL,
+    )
+    _watcher.start()
+    return _watcher
+
+
+def stop_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def store_version() -> int:
+    """Current card store version; changes whenever any card changes."""
+    return _fresh_index().generation
+
+
+async def request_version() -> int:
+    """``store_version`` for a request's conditional check.
+
+    Refreshes the index once (off the event loop) and marks it fresh for
+    the remainder of the calling request's context, so serving a 200
+    afterwards does not re-walk the tree.
+    """
+    version = await run_in_threadpool(store_version)
+    _refreshed.set(True)
+    return version
+
+
+def card_version(card_id: str) -> tuple[str, str] | None:
+    """Version of a single card (its relative path and content hash); None
+    if it is missing.
+
+    Only re-checks that card's file, like ``get_card``.
+    """
+    return _loaded_index().version_of(card_id)
+
+
+def list_headers() -> list[CardHeader]:
+    """Return metadata for all cards in path order, without bodies.
+
+    Served from the card index; only files changed since the last call are
+    re-parsed. The returned objects are shared — treat them as read-only.
+    Use this for filtering and counting, then ``materialize`` what you return.
+    """
+    return _fresh_index().headers()
+
+
+def card_body(header: CardHeader) -> tuple[str, str]:
+    """(prompt, solution) for a header, from the body cache or its file."""
+    return _get_index().body(header)
+
+
+def materialize(headers: list[CardHeader]) -> list[Card]:
+    """Full Cards (with bodies) for the given headers, in order."""
+    index = _get_index()
+    return [index.to_card(h) for h in headers]
 
 
 def list_cards() -> list[Card]:
-    """Read all card .md files recursively and return parsed Cards."""
-    cards = []
-    for filepath in sorted(CARDS_DIR.rglob("*.md")):
-        if filepath.name in _SKIP_NAMES or filepath.name.startswith("."):
-            continue
-        card = parse_card_file(filepath)
-        if card:
-            cards.append(card)
-    return cards
+    """Return all Cards in path order, bodies included.
+
+    Loads every body; prefer ``list_headers`` + ``materialize`` when only
+    part of the corpus is returned.
+    """
+    return materialize(list_headers())
+
+
+def select_headers(**filters: str | None) -> list[CardHeader]:
+    """Headers matching every metadata filter, in path order, without bodies.
+
+    Filters (pillar, layer, topic, concept, subtopic, deck, tag) are looked
+    up in the index's per-value sets, normalized case-insensitively when the
+    card was indexed; pillar and layer match substrings, the rest whole
+    values. None skips a filter and ``""`` selects cards that leave the
+    field unset. ``tags`` takes a boolean query over tags (see
+    ``tag_query``).
+    """
+    return _fresh_index().select(**filters)
+
+
+def find_page(
+    pillar: str | None = None,
+    layer: str | None = None,
+    topic: str | None = None,
+    concept: str | None = None,
+    search: str | None = None,
+    fuzzy: bool = False,
+    tags: str | None = None,
+    sort: str = "path",
+    descending: bool = False,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> tuple[list[CardHeader], str | None]:
+    """One page of the cards matching the ``/api/cards`` filters, as headers.
+
+    pillar/layer match case-insensitive substrings and topic/concept whole
+    values. ``search`` matches cards whose card_id, prompt or solution
+    contains it as a case-insensitive substring. The in-memory inverted
+    index and per-value metadata sets are intersected (a search of more
+    than one word is then checked against the candidates' text); they are
+    built with the index, and answer in microseconds where even an indexed
+    query on the ``CARD_STORE=sqlite`` mirror takes a millisecond or more,
+    so the mirror is not consulted here.
+
+    ``fuzzy`` also accepts words within ``CARD_FUZZY_THRESHOLD`` trigram
+    similarity ("bayse" finds "bayes"). ``tags`` is a boolean tag query such
+    as ``programming AND (debug OR build) AND NOT extend``; it raises
+    ``TagQueryError`` when malformed.
+
+    ``sort`` is a key of ``card_index.SORT_KEYS``; ties fall back to
+    ascending path order, also when ``descending``. ``cursor`` continues
+    from an earlier page of the same ordering.
+    Returns the headers and the cursor for the next page (None on the last
+    one). Raises ``CursorError`` for a cursor from another ordering.
+    """
+    index = _fresh_index()
+    after = _decode_cursor(cursor, sort, descending) if cursor else None
+    filters = _filters(pillar=pillar, layer=layer, topic=topic, concept=concept)
+    threshold = CARD_FUZZY_THRESHOLD if fuzzy else None
+    ordinals = index.matches(search, threshold, tags=tags or None, **filters)
+    headers, more = index.page(ordinals, sort, descending, after, limit)
+    next_cursor = None
+    if more and headers:
+        next_cursor = _encode_cursor(sort, descending, index.cursor_key(sort, headers[-1]))
+    return headers, next_cursor
+
+
+def card_dicts(headers: list[CardHeader], fields=None) -> list[dict]:
+    """JSON-ready card dicts limited to ``fields`` (default: all, in API order).
+
+    Bodies are only read when prompt or solution is requested.
+    """
+    return list(iter_card_dicts(headers, fields))
+
+
+def iter_card_dicts(headers, fields=None, cache_bodies: bool = True):
+    """Lazy ``card_dicts``: one dict at a time, so at most one body is held.
+
+    ``cache_bodies=False`` reads bodies past the body LRU, for full-corpus
+    passes that would otherwise evict every hot entry.
+    """
+    fields = CARD_FIELDS if fields is None else tuple(fields)
+    index = _get_index()
+    with_body = "prompt" in fields or "solution" in fields
+    for header in headers:
+        data = header.to_dict()
+        if with_body:
+            data["prompt"], data["solution"] = index.body(header, cache=cache_bodies)
+        yield {f: data[f] for f in fields}
+
+
+def rank_cards(
+    search: str,
+    limit: int,
+    pillar: str | None = None,
+    layer: str | None = None,
+    topic: str | None = None,
+    concept: str | None = None,
+    fuzzy: bool = False,
+    tags: str | None = None,
+) -> list[tuple[Card, float]]:
+    """Top ``limit`` cards for ``search`` by BM25 score, best first.
+
+    Matches the same cards as ``find_page`` (the query as a substring, or
+    similar words with ``fuzzy``), scored on the card words containing each
+    query word, then skips cards outside the metadata and ``tags`` filters
+    while walking the ranking. A query without words, such as ``"()"``,
+    has nothing to score and ranks no cards.
+    """
+    index = _fresh_index()
+    filters = _filters(pillar=pillar, layer=layer, topic=topic, concept=concept, tags=tags)
+    threshold = CARD_FUZZY_THRESHOLD if fuzzy else None
+    ranked = index.rank(search, limit, threshold, **filters) or []
+    return [(index.to_card(h), score) for h, score in ranked]
+
+
+def _filters(**filters: str | None) -> dict[str, str | None]:
+    """API filter values with empty strings treated as "no filter"."""
+    return {name: value or None for name, value in filters.items()}
+
+
+def _encode_cursor(sort: str, descending: bool, key: tuple) -> str:
+    raw = json.dumps([sort, descending, *key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, descending: bool) -> tuple:
+    """``(sort value, relative path)`` from a cursor made by ``find_page``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cur_sort, cur_desc, value, rel = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise CursorError("malformed cursor") from e
+    if cur_sort != sort or cur_desc != descending:
+        raise CursorError("cursor belongs to a different sort order")
+    if sort == "fire_weight":
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, str)
+    if not valid or not isinstance(rel, str):
+        raise CursorError("malformed cursor")
+    return value, rel
 
 
 def list_cards_by_concept(concept_node: str) -> list[Card]:
     """List cards by exact concept_node match."""
     concept = concept_node.strip()
-    return [card for card in list_cards() if (card.concept_node or "").strip() == concept]
+    return materialize(
+        [h for h in select_headers(concept=concept) if (h.concept_node or "").strip() == concept]
+    )
 
 
 def get_card(card_id: str) -> Card | None:
-    """Get a single card by card_id."""
-    # Try direct filename match first (flat layout)
-    filepath = CARDS_DIR / f"{card_id}.md"
-    if filepath.exists():
-        return parse_card_file(filepath)
-    # Try recursive search by filename
-    for filepath in CARDS_DIR.rglob(f"{card_id}.md"):
-        card = parse_card_file(filepath)
-        if card:
-            return card
-    # Fallback: full scan matching card_id field
-    for filepath in CARDS_DIR.rglob("*.md"):
-        if filepath.name in _SKIP_NAMES or filepath.name.startswith("."):
-            continue
-        card = parse_card_file(filepath)
-        if card and card.card_id == card_id:
-            return card
-    return None
+    """Get a single card by card_id (frontmatter id, not filename).
+
+    Returns a fresh object, so callers may mutate it before ``save_card``.
+    """
+    index = _loaded_index()
+    header = index.lookup(card_id)
+    if header is None:
+        return None
+    return index.to_card(header)
+
+
+def card_exists(card_id: str) -> bool:
+    """Cheap existence check that skips copying the card."""
+    return _loaded_index().lookup(card_id) is not None
+
+
+def new_card(data: CardCreate) -> Card:
+    """Card for a create request; pillar and layer come from the card_id."""
+    id_info = parse_card_id(data.card_id)
+    return Card(
+        card_id=data.card_id,
+        deck=data.deck,
+        tags=data.tags,
+        fire_weight=data.fire_weight,
+        notion_last_edited=datetime.now(timezone.utc).isoformat(),
+        prompt=data.prompt,
+        solution=data.solution,
+        pillar=id_info["pillar"],
+        knowledge_layer=id_info["knowledge_layer"],
+        filename=f"{data.card_id}.md",
+    )
+
+
+def apply_update(card: Card, data: CardUpdate) -> Card:
+    """Apply the fields set in an update request to ``card`` in place."""
+    if data.deck is not None:
+        card.deck = data.deck
+    if data.tags is not None:
+        card.tags = data.tags
+    if data.fire_weight is not None:
+        card.fire_weight = data.fire_weight
+    if data.prompt is not None:
+        card.prompt = data.prompt
+    if data.solution is not None:
+        card.solution = data.solution
+    return card
 
 
 def save_card(card: Card) -> Path:
     """Write a card to disk as .md file.
 
-    If topic and knowledge_layer are set, writes to topic/layer/ subdirectory.
-    Otherwise writes flat to CARDS_DIR (legacy behavior).
+    An existing card is rewritten in place, wherever its file lives. A new
+    card goes to a topic/layer/ subdirectory if topic and knowledge_layer
+    are set, otherwise flat to CARDS_DIR (legacy behavior).
     """
-    safe_name = card.card_id.replace(" ", "_")
-    content = card_to_markdown(card)
+    index = _loaded_index()
+    filepath = index.path_of(card.card_id) or _card_path(card)
+    _write_atomic(filepath, card_to_markdown(card))
+    index.reload(filepath)
+    return filepath
+
+
+def apply_bulk(operations: list[BulkOperation]) -> list[BulkResult]:
+    """Validate and apply a batch of create/update/delete operations.
+
+    Operations are checked in order against the index plus the batch's own
+    earlier operations (a card created earlier in the batch can be updated
+    later), so invalid items fail individually without blocking the rest.
+    Each card is then written once with its final content (atomic temp
+    file + rename, on up to ``CARD_BULK_WORKERS`` threads) and the index is
+    updated once for the whole batch. Results follow the input order.
+    """
+    index = _loaded_index()
+    results: list[BulkResult] = []
+    final: dict[str, Card | None] = {}  # card_id -> content after the batch
+    applied: dict[str, list[int]] = {}  # card_id -> indexes of its applied ops
+
+    def current(card_id: str) -> Card | None:
+        if card_id in final:
+            return final[card_id]
+        header = index.lookup(card_id)
+        return index.to_card(header) if header is not None else None
 
+    for i, op in enumerate(operations):
+        existing = current(op.card_id)
+        error = None
+        if op.op == "create":
+            if existing is not None:
+                status, error = 409, f"Card {op.card_id} already exists"
+            else:
+                status, final[op.card_id] = 201, new_card(op)
+        elif existing is None:
+            status, error = 404, f"Card {op.card_id} not found"
+        elif op.op == "update":
+            status, final[op.card_id] = 200, apply_update(existing.model_copy(), op)
+        else:
+            status, final[op.card_id] = 204, None
+        results.append(BulkResult(index=i, op=op.op, card_id=op.card_id, status=status, error=error))
+        if error is None:
+            applied.setdefault(op.card_id, []).append(i)
+
+    writes: list[tuple[str, Path, str | None]] = []  # (card_id, path, content or None to delete)
+    for card_id, card in final.items():
+        old = index.path_of(card_id)
+        if card is None:
+            if old is not None:
+                writes.append((card_id, old, None))
+        else:
+            writes.append((card_id, old or _card_path(card), card_to_markdown(card)))
+
+    def run(item: tuple[str, Path, str | None]) -> OSError | None:
+        _card_id, path, content = item
+        try:
+            if content is None:
+                path.unlink(missing_ok=True)
+            else:
+                _write_atomic(path, content)
+        except OSError as e:
+            return e
+        return None
+
+    if CARD_BULK_WORKERS > 1 and len(writes) > 1:
+        with ThreadPoolExecutor(max_workers=min(CARD_BULK_WORKERS, len(writes))) as pool:
+            errors = list(pool.map(run, writes))
+    else:
+        errors = [run(item) for item in writes]
+
+    for (card_id, _path, _content), e in zip(writes, errors):
+        if e is not None:
+            for i in applied[card_id]:
+                results[i].status, results[i].error = 500, f"Write failed: {e}"
+    index.update_paths(path for _card_id, path, _content in writes)
+    return results
+
+
+def _card_path(card: Card) -> Path:
+    """Where ``save_card`` puts a card (creating its folder if needed)."""
+    safe_name = card.card_id.replace(" ", "_")
     if card.topic and card.knowledge_layer:
         layer_dir = card.knowledge_layer.lower()
         subdir = CARDS_DIR / card.topic / layer_dir
         subdir.mkdir(parents=True, exist_ok=True)
-        filepath = subdir / f"{safe_name}.md"
-    else:
-        filepath = CARDS_DIR / f"{safe_name}.md"
+        return subdir / f"{safe_name}.md"
+    return CARDS_DIR / f"{safe_name}.md"
 
-    filepath.write_text(content, encoding="utf-8")
-    return filepath
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Replace ``path`` with ``content`` via a temp file and rename, so
+    readers (and crashes) never see a half-written card. The temp name
+    starts with a dot, which the card scanner skips."""
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = 0o644  # mkstemp would leave new cards owner-only
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
 def delete_card(card_id: str) -> bool:
-    """Delete a card .md file. Searches recursively. Returns True if deleted."""
-    # Try flat path first
-    filepath = CARDS_DIR / f"{card_id}.md"
-    if filepath.exists():
-        filepath.unlink()
-        return True
-    # Search recursively
-    for filepath in CARDS_DIR.rglob(f"{card_id}.md"):
-        filepath.unlink()
-        return True
-    return False
+    """Delete the .md file holding ``card_id``. Returns True if deleted."""
+    index = _loaded_index()
+    if index.lookup(card_id) is None:
+        return False
+    filepath = index.path_of(card_id)
+    filepath.unlink(missing_ok=True)
+    index.remove(filepath)
+    return True
@@ -0,0 +1,282 @@
+"""SQLite mirror of the card corpus for ``CARD_STORE=sqlite``.
+
+The markdown files stay the source of truth; this is a query index over
+them. Each card gets a row with lowercased filter columns (B-tree indexed)
+and a trigram FTS5 row over card_id/prompt/solution, so the ``list_cards``
+filters and substring search run as indexed SQL queries
+(``CardIndex.find_ordinals``) for readers of the database. The API itself
+answers from the in-memory indexes, which are faster once built.
+
+The card index drives it: after every refresh or write it hands over the
+paths that changed, and only those rows (and their bodies) are rewritten.
+On the first sync after start-up the stored content hashes are diffed
+against the index so a mirror left behind by an earlier run catches up
+without a rebuild. Like the parse cache, the store is best-effort: any
+SQLite error disables it and callers fall back to in-memory filtering.
+
+The store keeps one connection open for its lifetime (shared by all
+threads under its lock), so the PRAGMAs and schema run once, not per call.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.models.card import CardHeader
+from app.services.card_facets import normalize
+from app.services.card_loader import content_digest, parse_body_bytes
+
+logger = logging.getLogger(__name__)
+
+# Bump when the schema or the derived columns change so the mirror is rebuilt.
+STORE_FORMAT = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest BLOB NOT NULL,
+    card_id TEXT NOT NULL,
+    pillar_lc TEXT,
+    layer_lc TEXT,
+    topic_lc TEXT,
+    concept_lc TEXT,
+    subtopic TEXT
+);
+CREATE INDEX IF NOT EXISTS cards_pillar ON cards (pillar_lc);
+CREATE INDEX IF NOT EXISTS cards_layer ON cards (layer_lc);
+CREATE INDEX IF NOT EXISTS cards_topic ON cards (topic_lc);
+CREATE INDEX IF NOT EXISTS cards_concept ON cards (concept_lc);
+CREATE INDEX IF NOT EXISTS cards_subtopic ON cards (subtopic);
+CREATE TABLE IF NOT EXISTS facets (
+    col TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (col, value)
+) WITHOUT ROWID;
+"""
+
+# Trigrams narrow a search of 3+ characters to candidate rows; the Python
+# ``_contains`` function then applies the exact in-memory test to them
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts
+    USING fts5(card_id, prompt, solution, tokenize='trigram');
+"""
+
+# Filters matched as case-insensitive substrings; resolved through the small
+# ``facets`` table of distinct values, then an indexed IN on the column.
+_SUBSTRING_COLUMNS = ("pillar_lc", "layer_lc")
+
+
+class CardStore:
+    """Indexed SQLite copy of the cards under one cards directory."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._disabled = False
+        # One connection for the store's lifetime, shared by every thread
+        # under ``_lock``; opened (and the schema created) on first use
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def available(self) -> bool:
+        return not self._disabled
+
+    def digests(self, root: Path) -> dict[str, bytes] | None:
+        """Stored content hash per relative path (None if unavailable)."""
+        return self._run(self._digests, root)
+
+    def apply(self, root: Path, upserts: dict[str, tuple[str, CardHeader]], removed: set[str]) -> None:
+        """Rewrite rows for ``upserts`` (rel -> (abs path, header)) and drop ``removed``."""
+        if upserts or removed:
+            self._run(self._apply, root, upserts, removed)
+
+    def query(
+        self,
+        pillar: str | None = None,
+        layer: str | None = None,
+        topic: str | None = None,
+        concept: str | None = None,
+        search: str | None = None,
+    ) -> list[str] | None:
+        """Relative paths of cards matching every given filter.
+
+        Filters mirror the in-memory ones in ``card_service.find_page`` and
+        select the same cards.
+        None means the store is unavailable.
+        """
+        return self._run(self._query, pillar, layer, topic, concept, search)
+
+    def close(self) -> None:
+        """Close the connection; a later call opens a new one."""
+        with self._lock:
+            self._close()
+
+    # --- Internals ---
+
+    def _run(self, fn, *args):
+        if self._disabled:
+            return None
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = self._connect()
+                with self._conn:
+                    return fn(self._conn, *args)
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logger.warning("Card store %s disabled: %s", self.path, e)
+                self._disabled = True
+                self._close()
+                return None
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("contains_text", 4, _contains, deterministic=True)
+            conn.executescript(_SCHEMA)
+            conn.executescript(_FTS_SCHEMA)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _signature(self, root: Path) -> str:
+        return json.dumps({"format": STORE_FORMAT, "root": str(root)})
+
+    def _digests(self, conn: sqlite3.Connection, root: Path) -> dict[str, bytes]:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != self._signature(root):
+            conn.execute("DELETE FROM cards")
+            conn.execute("DELETE FROM facets")
+            # The tokenizer may have changed between formats
+            conn.execute("DROP TABLE cards_fts")
+            conn.executescript(_FTS_SCHEMA)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                (self._signature(root),),
+            )
+            return {}
+        return dict(conn.execute("SELECT path, digest FROM cards"))
+
+    def _apply(
+        self,
+        conn: sqlite3.Connection,
+        root: Path,
+        upserts: dict[str, tuple[str, CardHeader]],
+        removed: set[str],
+    ) -> None:
+        for rel in removed:
+            row = conn.execute("SELECT id FROM cards WHERE path = ?", (rel,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM cards WHERE id = ?", row)
+                conn.execute("DELETE FROM cards_fts WHERE rowid = ?", row)
+
+        facets: set[tuple[str, str]] = set()
+        for rel, (path, header) in upserts.items():
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue  # gone again; the next sync drops it
+            prompt, solution = parse_body_bytes(data) or ("", "")
+            values = (
+                content_digest(data),
+                header.card_id,
+                normalize(header.pillar),
+                normalize(header.knowledge_layer),
+                normalize(header.topic),
+                normalize(header.concept_node),
+                header.subtopic,
+            )
+            row = conn.execute("SELECT id FROM cards WHERE path = ?", (rel,)).fetchone()
+            if row is None:
+                cur = conn.execute(
+                    "INSERT INTO cards (path, digest, card_id, pillar_lc, layer_lc,"
+                    " topic_lc, concept_lc, subtopic) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (rel, *values),
+                )
+                rowid = cur.lastrowid
+            else:
+                rowid = row[0]
+                conn.execute(
+                    "UPDATE cards SET digest = ?, card_id = ?, pillar_lc = ?, layer_lc = ?,"
+                    " topic_lc = ?, concept_lc = ?, subtopic = ? WHERE id = ?",
+                    (*values, rowid),
+                )
+                conn.execute("DELETE FROM cards_fts WHERE rowid = ?", (rowid,))
+            conn.execute(
+                "INSERT INTO cards_fts (rowid, card_id, prompt, solution) VALUES (?, ?, ?, ?)",
+                (rowid, header.card_id, prompt, solution),
+            )
+            for col, value in zip(_SUBSTRING_COLUMNS, values[2:4]):
+                if value:
+                    facets.add((col, value))
+        conn.executemany("INSERT OR IGNORE INTO facets (col, value) VALUES (?, ?)", facets)
+        if removed:
+            # Facet values nobody uses any more only cost an empty IN match,
+            # but keep the table from growing without bound
+            conn.execute(
+                "DELETE FROM facets WHERE NOT EXISTS (SELECT 1 FROM cards WHERE"
+                " (facets.col = 'pillar_lc' AND cards.pillar_lc = facets.value) OR"
+                " (facets.col = 'layer_lc' AND cards.layer_lc = facets.value))"
+            )
+
+    def _query(
+        self,
+        conn: sqlite3.Connection,
+        pillar: str | None,
+        layer: str | None,
+        topic: str | None,
+        concept: str | None,
+        search: str | None,
+    ) -> list[str]:
+        where: list[str] = []
+        params: list = []
+        for col, value in zip(_SUBSTRING_COLUMNS, (pillar, layer)):
+            if not value:
+                continue
+            matches = [
+                v for (v,) in conn.execute(
+                    "SELECT value FROM facets WHERE col = ? AND instr(value, ?) > 0",
+                    (col, value.lower()),
+                )
+            ]
+            if not matches:
+                return []
+            where.append(f"{col} IN ({', '.join('?' * len(matches))})")
+            params.extend(matches)
+        if topic:
+            where.append("topic_lc = ?")
+            params.append(normalize(topic))
+        if concept:
+            where.append("concept_lc = ?")
+            params.append(normalize(concept))
+        if search:
+            needle = search.lower()
+            fts = "contains_text(?, card_id, prompt, solution)"
+            if len(needle) >= 3:
+                # A quoted string is a phrase of its trigrams: "x = " -> 'x =', ' = '
+                fts = "cards_fts MATCH ? AND " + fts
+                params.append('"' + needle.replace('"', '""') + '"')
+            where.append(f"id IN (SELECT rowid FROM cards_fts WHERE {fts})")
+            params.append(needle)
+        sql = "SELECT path FROM cards"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return [path for (path,) in conn.execute(sql, params)]
+
+
+def _contains(needle: str, card_id: str, prompt: str, solution: str) -> bool:
+    """The in-memory search test: a substring of any field, lowercased."""
+    return needle in card_id.lower() or needle in prompt.lower() or needle in solution.lower()
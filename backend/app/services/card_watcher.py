@@ -0,0 +1,215 @@
+"""Background watcher that pushes card file changes into the card index.
+
+Two backends:
+
+- ``inotify`` (Linux, via ctypes): one watch per directory; changed paths
+  are collected and applied to the index after a quiet period, so a Notion
+  sync writing hundreds of files lands as one batch.
+- ``poll``: a periodic incremental ``CardIndex.refresh()`` for platforms
+  (or network filesystems) where inotify is unavailable.
+
+While a watcher is running the index is marked ``watched`` and readers stop
+re-stating the tree on every request.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from app.services.card_index import CardIndex, is_card_name
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Upper bound on how long a continuous burst can postpone applying changes
+_MAX_DELAY_FACTOR = 10
+
+
+class CardWatcher:
+    """Keeps a CardIndex current from filesystem events on a daemon thread."""
+
+    def __init__(
+        self,
+        index: CardIndex,
+        backend: str = "auto",
+        debounce: float = 0.5,
+        interval: float = 2.0,
+    ):
+        self.index = index
+        self.debounce = debounce
+        self.interval = interval
+        self.backend = _resolve_backend(backend)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._inotify: _Inotify | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.backend == "inotify":
+            # Watches go in before the initial refresh so nothing slips between
+            try:
+                self._inotify = _Inotify(self.index.root)
+            except OSError as e:
+                logger.warning("inotify unavailable (%s); falling back to polling", e)
+                self.backend = "poll"
+        self.index.refresh()
+        target = self._run_inotify if self.backend == "inotify" else self._run_poll
+        self._thread = threading.Thread(target=target, name="card-watcher", daemon=True)
+        self.index.watched = True
+        self._thread.start()
+        logger.info("Card watcher started (%s) on %s", self.backend, self.index.root)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.index.watched = False
+
+    # --- Poll backend ---
+
+    def _run_poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.index.refresh()
+            except Exception:
+                logger.exception("Card watcher refresh failed")
+
+    # --- inotify backend ---
+
+    def _run_inotify(self) -> None:
+        inotify = self._inotify
+        pending: set[str] = set()
+        rescan = False
+        first_at = last_at = 0.0
+        try:
+            while not self._stop.is_set():
+                timeout = 0.25
+                if pending or rescan:
+                    timeout = max(0.0, min(timeout, last_at + self.debounce - time.monotonic()))
+                for path, needs_rescan in inotify.read(timeout):
+                    now = time.monotonic()
+                    if not pending and not rescan:
+                        first_at = now
+                    last_at = now
+                    rescan = rescan or needs_rescan
+                    if path is not None:
+                        pending.add(path)
+                if not (pending or rescan):
+                    continue
+                now = time.monotonic()
+                quiet = now - last_at >= self.debounce
+                overdue = now - first_at >= self.debounce * _MAX_DELAY_FACTOR
+                if quiet or overdue:
+                    self._apply(pending, rescan)
+                    pending, rescan = set(), False
+        finally:
+            inotify.close()
+            self._inotify = None
+
+    def _apply(self, paths: set[str], rescan: bool) -> None:
+        try:
+            if rescan:
+                self.index.refresh()
+            else:
+                self.index.update_paths(paths)
+        except Exception:
+            logger.exception("Card watcher update failed")
+
+
+def _resolve_backend(backend: str) -> str:
+    if backend == "auto":
+        return "inotify" if sys.platform.startswith("linux") else "poll"
+    if backend not in ("inotify", "poll"):
+        raise ValueError(f"Unknown card watcher backend: {backend!r}")
+    return backend
+
+
+class _Inotify:
+    """Minimal recursive inotify reader built on libc via ctypes."""
+
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: dict[int, str] = {}
+        self._add_tree(str(root))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def read(self, timeout: float):
+        """Yield ``(card_path | None, needs_rescan)`` for queued events."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                yield None, True
+                continue
+            if mask & (_IN_IGNORED | _IN_DELETE_SELF):
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None:
+                continue
+            path = os.path.join(parent, name)
+            if mask & _IN_ISDIR:
+                # A directory appeared or vanished: watch it and rescan
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._add_tree(path)
+                yield None, True
+            elif is_card_name(name):
+                yield path, False
+
+    def _add_tree(self, top: str) -> None:
+        for dirpath, _dirnames, _filenames in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(err, f"inotify_add_watch({dirpath}): {os.strerror(err)}")
+            self._dirs[wd] = dirpath
@@ -0,0 +1,21 @@
+"""Cheap versions for source files read by the services.
+
+A stamp is the file's path, mtime and size. Services fold it into the data
+version behind their ETags (see ``app.http_cache``) and into their parse
+caches, so an edited, replaced or removed file is noticed with one stat.
+"""
+
+import os
+
+
+def file_stamp(path) -> tuple:
+    """(path, mtime_ns, size) of a source file; just (path,) if it is missing.
+
+    The path is included so two files that happen to share an mtime and
+    size (e.g. a copy made with ``shutil.copy2``) never stamp alike.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (str(path),)
+    return str(path), st.st_mtime_ns, st.st_size
@@ -5,18 +5,30 @@ import threading
 from app.config import DOCS_DIR
 from app.models.fire import CreditSimResult, FIReData
 from app.parsers.fire_parser import parse_fire_hierarchy
+from app.services.file_stamp import file_stamp
 
 _cached_data: FIReData | None = None
+_cached_stamp: tuple | None = None
 _lock = threading.Lock()
 
 
+def _hierarchy_file():
+    return DOCS_DIR / "nb-cards-fire-hierarchy.md"
+
+
+def version() -> tuple:
+    """Version of the FIRe data: the hierarchy file's stat."""
+    return file_stamp(_hierarchy_file())
+
+
 def get_fire_data() -> FIReData:
-    """Get all FIRe encompassing relationships."""
-    global _cached_data
+    """Get all FIRe encompassing relationships (re-parsed when the file changes)."""
+    global _cached_data, _cached_stamp
     with _lock:
-        if _cached_data is None:
-            filepath = DOCS_DIR / "nb-cards-fire-hierarchy.md"
-            _cached_data = parse_fire_hierarchy(filepath)
+        stamp = version()
+        if _cached_data is None or stamp != _cached_stamp:
+            _cached_data = parse_fire_hierarchy(_hierarchy_file())
+            _cached_stamp = stamp
     return _cached_data
 
 
@@ -1,25 +1,48 @@
 """Knowledge graph service — loads and enriches the DAG."""
 
 import threading
+import time
 from collections import deque
 
 from app.config import DOCS_DIR
-from app.models.card import Card
+from app.models.card import Card, CardHeader
 from app.models.graph import SubtopicSummary, SubtreeCardBreakdownItem, SubtreeCardDistribution, KnowledgeGraph
 from app.parsers.card_parser import NODE_CARD_MAP
 from app.parsers.mermaid_parser import parse_mermaid_file
+from app.services.file_stamp import file_stamp
 
 _cached_graph: KnowledgeGraph | None = None
+_cached_stamp: tuple | None = None
 _lock = threading.Lock()
 
+# Anki mastery is fetched live, so graph versions roll over this often
+_MASTERY_TTL = 60
+
+
+def _mermaid_file():
+    return DOCS_DIR / "jobacademy-ml-marketing.mermaid"
+
+
+def version() -> tuple:
+    """Version of the graph's own sources (cards are versioned separately).
+
+    The mermaid file's stat and the SRS state version, plus a
+    ``_MASTERY_TTL`` time bucket since Anki mastery cannot be versioned
+    without asking Anki.
+    """
+    from app.services import srs_service
+
+    return file_stamp(_mermaid_file()), srs_service.state_version(), int(time.time() // _MASTERY_TTL)
+
 
 def get_knowledge_graph() -> KnowledgeGraph:
     """Get the knowledge graph, enriched with mastery and card count data."""
-    global _cached_graph
+    global _cached_graph, _cached_stamp
     with _lock:
-        if _cached_graph is None:
-            mermaid_file = DOCS_DIR / "jobacademy-ml-marketing.mermaid"
-            _cached_graph = parse_mermaid_file(mermaid_file)
+        stamp = file_stamp(_mermaid_file())
+        if _cached_graph is None or stamp != _cached_stamp:
+            _cached_graph = parse_mermaid_file(_mermaid_file())
+            _cached_stamp = stamp
 
     # Enrich with card counts from .md files
     _enrich_card_counts(_cached_graph)
@@ -72,38 +95,46 @@ def get_subtree(node_id: str) -> KnowledgeGraph:
     )
 
 
-def get_node_cards(node_id: str) -> list[Card]:
-    """Get all cards linked to a graph node.
-
-    Dual-source: matches cards by concept_node field first, then falls back
-    to NODE_CARD_MAP prefix matching. Results are deduplicated by card_id.
-    """
-    from app.services.card_service import list_cards
+def _node_headers(node_id: str) -> list[CardHeader]:
+    """Headers of all cards linked to a graph node (see ``get_node_cards``)."""
+    from app.services.card_service import select_headers
 
-    all_cards = list_cards()
-    matched: dict[str, Card] = {}
+    matched: dict[str, CardHeader] = {}
 
-    # Source 1: explicit concept_node field
-    for card in all_cards:
+    # Source 1: explicit concept_node field (the index matches
+    # case-insensitively; keep exact matches only)
+    for card in select_headers(concept=node_id):
         if card.concept_node == node_id:
             matched[card.card_id] = card
 
     # Source 2: prefix fallback via NODE_CARD_MAP (only for untagged cards)
     prefixes = NODE_CARD_MAP.get(node_id, [])
-    for card in all_cards:
-        if (
-            card.concept_node is None
-            and card.card_id not in matched
-            and any(card.card_id.startswith(p + "-") for p in prefixes)
-        ):
-            matched[card.card_id] = card
+    if prefixes:
+        for card in select_headers(concept=""):
+            if (
+                card.concept_node is None
+                and card.card_id not in matched
+                and any(card.card_id.startswith(p + "-") for p in prefixes)
+            ):
+                matched[card.card_id] = card
 
     return list(matched.values())
 
 
+def get_node_cards(node_id: str) -> list[Card]:
+    """Get all cards linked to a graph node.
+
+    Dual-source: matches cards by concept_node field first, then falls back
+    to NODE_CARD_MAP prefix matching. Results are deduplicated by card_id.
+    """
+    from app.services.card_service import materialize
+
+    return materialize(_node_headers(node_id))
+
+
 def get_concept_subtopics(node_id: str) -> list[SubtopicSummary]:
     """Group cards by subtopic for a given concept node."""
-    cards = get_node_cards(node_id)
+    cards = _node_headers(node_id)
     groups: dict[str, int] = {}
     for card in cards:
         key = card.subtopic or "uncategorized"
@@ -120,8 +151,10 @@ def get_concept_subtopics(node_id: str) -> list[SubtopicSummary]:
 
 def get_subtopic_cards(node_id: str, subtopic: str) -> list[Card]:
     """Get all cards for a specific subtopic within a concept."""
-    all_cards = get_node_cards(node_id)
-    return [c for c in all_cards if (c.subtopic or "uncategorized") == subtopic]
+    from app.services.card_service import materialize
+
+    headers = _node_headers(node_id)
+    return materialize([h for h in headers if (h.subtopic or "uncategorized") == subtopic])
 
 
 def get_subtree_card_distribution(node_id: str) -> SubtreeCardDistribution:
@@ -134,7 +167,7 @@ def get_subtree_card_distribution(node_id: str) -> SubtreeCardDistribution:
     # Collect cards from every node in the subtree
     all_cards: dict[str, str] = {}  # card_id → concept_node_id
     for sid in subtree_node_ids:
-        for card in get_node_cards(sid):
+        for card in _node_headers(sid):
             if card.card_id not in all_cards:
                 all_cards[card.card_id] = sid
 
@@ -172,9 +205,10 @@ def get_subtree_card_distribution(node_id: str) -> SubtreeCardDistribution:
 
 def _enrich_card_counts(graph: KnowledgeGraph):
     """Populate card_count on each node using concept_node + NODE_CARD_MAP."""
-    from app.services.card_service import list_cards
+    from app.services.card_service import list_headers, select_headers
 
-    all_cards = list_cards()
+    all_cards = list_headers()
+    untagged = [c for c in select_headers(concept="") if c.concept_node is None]
 
     # Pre-build concept_node index: node_id → set of card_ids
     concept_index: dict[str, set[str]] = {}
@@ -190,11 +224,10 @@ def _enrich_card_counts(graph: KnowledgeGraph):
 
         # Source 2: prefix fallback (only for untagged cards)
         prefixes = NODE_CARD_MAP.get(node.id, [])
-        for card in all_cards:
-            if card.concept_node is None and any(
-                card.card_id.startswith(p + "-") for p in prefixes
-            ):
-                matched_ids.add(card.card_id)
+        if prefixes:
+            for card in untagged:
+                if any(card.card_id.startswith(p + "-") for p in prefixes):
+                    matched_ids.add(card.card_id)
 
         node.card_count = len(matched_ids)
 
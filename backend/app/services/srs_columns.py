@@ -0,0 +1,88 @@
+"""Columnar NumPy mirror of the in-memory SRS state.
+
+Each scheduled card gets a row (its ordinal) in parallel arrays: next_due
+as epoch seconds, interval, ease factor and review count. ``SrsJournal``
+writes a row whenever an entry changes, so dashboard statistics (due
+counts, mastery, interval histograms) are a few vectorized expressions
+over the arrays instead of a Python loop that parses a timestamp per card.
+
+Statistics are restricted to the current cards through a boolean row mask
+(``mask``), cached per card-id collection and extended as rows are added.
+"""
+
+from typing import Collection
+
+import numpy as np
+
+
+class SrsColumns:
+    """card_id -> row, with next_due / interval / ease / review_count columns.
+
+    Not thread-safe on its own; ``SrsJournal`` calls it under its lock.
+    """
+
+    def __init__(self):
+        self.rows: dict[str, int] = {}
+        self._ids: list[str] = []
+        self.next_due = np.zeros(0, dtype=np.float64)
+        self.interval = np.zeros(0, dtype=np.float64)
+        self.ease_factor = np.zeros(0, dtype=np.float64)
+        self.review_count = np.zeros(0, dtype=np.int32)
+        # (card-id collection, rows covered, mask) of the last ``mask`` call
+        self._mask: tuple[Collection[str], int, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def set(self, card_id: str, next_due: float, interval: float, ease_factor: float, review_count: int) -> None:
+        row = self.rows.get(card_id)
+        if row is None:
+            row = self.rows[card_id] = len(self._ids)
+            self._ids.append(card_id)
+            if row >= len(self.next_due):
+                self._grow(max(row + 1, 2 * len(self.next_due)))
+        self.next_due[row] = next_due
+        self.interval[row] = interval
+        self.ease_factor[row] = ease_factor
+        self.review_count[row] = review_count
+
+    def mask(self, card_ids: Collection[str]) -> np.ndarray:
+        """Boolean mask over rows: True where the row's card is in ``card_ids``.
+
+        Cached for the last collection passed (by identity), so callers
+        should pass the same object while the card list is unchanged; rows
+        added since are checked individually.
+        """
+        n = len(self._ids)
+        cached = self._mask
+        if cached is not None and cached[0] is card_ids:
+            covered, mask = cached[1], cached[2]
+            if covered == n:
+                return mask
+            tail = np.fromiter((cid in card_ids for cid in self._ids[covered:]), dtype=bool, count=n - covered)
+            mask = np.concatenate([mask, tail])
+        else:
+            mask = np.fromiter((cid in card_ids for cid in self._ids), dtype=bool, count=n)
+        self._mask = (card_ids, n, mask)
+        return mask
+
+    def stats(self, now: float, card_ids: Collection[str], mastered_interval: float) -> tuple[int, int, int]:
+        """(scheduled, due, mastered) over the rows of ``card_ids``."""
+        n = len(self._ids)
+        mask = self.mask(card_ids)
+        due = np.count_nonzero(mask & (self.next_due[:n] <= now))
+        mastered = np.count_nonzero(mask & (self.interval[:n] >= mastered_interval))
+        return int(np.count_nonzero(mask)), int(due), int(mastered)
+
+    def interval_histogram(self, card_ids: Collection[str], edges: np.ndarray) -> np.ndarray:
+        """Counts of the ``card_ids`` rows' intervals per ``[edges[i], edges[i+1])``."""
+        n = len(self._ids)
+        counts, _ = np.histogram(self.interval[:n][self.mask(card_ids)], bins=edges)
+        return counts
+
+    def _grow(self, size: int) -> None:
+        for name in ("next_due", "interval", "ease_factor", "review_count"):
+            old = getattr(self, name)
+            grown = np.zeros(size, dtype=old.dtype)
+            grown[: len(old)] = old
+            setattr(self, name, grown)
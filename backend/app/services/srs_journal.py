@@ -0,0 +1,327 @@
+"""Journaled SRS state: a JSON snapshot plus an append-only review log.
+
+The snapshot (``SRS_STATE_FILE``) has the same shape as before: ``{"cards":
+{card_id: entry}, "daily_log": {day: [card_id, ...]}}``. Each answer
+appends one compact line to the journal next to it (``srs_state.journal``)
+holding the card's resulting entry and the review day, so a review costs
+one small append however many cards and days of history there are.
+
+On start-up the snapshot is read and the journal replayed over it.
+Because every record carries the full resulting entry, replaying a record
+twice is harmless, and a torn last line (a crash mid-append) is skipped.
+
+Once the journal holds ``compact_every`` records it is compacted: under
+the lock the live journal is renamed aside (``*.journal.compacting``) and
+a fresh one started, then a background thread writes the new snapshot
+atomically (temp file + rename) and deletes the renamed journal. Answers
+keep appending to the fresh journal meanwhile. A crash at any point leaves
+a snapshot and journals whose replay yields the same state.
+
+Answers can also be written behind: with ``flush_every`` > 1 journal lines
+collect in memory and are appended in one write once that many are
+pending, or every ``flush_interval`` seconds by a flusher thread, and on
+``close`` (the app's shutdown). A crash loses at most the pending lines,
+never the files: a snapshot is fsynced before it replaces the old one.
+With ``fsync`` each journal flush, and the directory after a snapshot
+rename, are fsynced too.
+"""
+
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Collection, Iterable
+
+import numpy as np
+
+from app.services.srs_columns import SrsColumns
+from app.services.srs_queue import DueQueue
+
+logger = logging.getLogger(__name__)
+
+# One SRS card entry: ease_factor, interval, review_count, next_due, last_reviewed
+Entry = dict
+
+# Shared across instances so a reloaded state never reuses a version
+_versions = itertools.count(1)
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _fsync_dir(path: Path) -> None:
+    """Make a rename in ``path`` durable (no-op where directories can't be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def due_at(entry: Entry) -> datetime:
+    """An entry's ``next_due`` as an aware datetime (naive means UTC)."""
+    next_due = datetime.fromisoformat(entry["next_due"])
+    if next_due.tzinfo is None:
+        next_due = next_due.replace(tzinfo=timezone.utc)
+    return next_due
+
+
+class SrsJournal:
+    """In-memory SRS state backed by a snapshot and a review journal."""
+
+    def __init__(
+        self,
+        path: Path,
+        compact_every: int = 1000,
+        flush_every: int = 1,
+        flush_interval: float = 0,
+        fsync: bool = False,
+    ):
+        self.path = path
+        self.journal_path = path.with_suffix(".journal")
+        self.compact_every = compact_every
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.version = next(_versions)
+        self._cards: dict[str, Entry] = {}
+        self._daily_log: dict[str, list[str]] = {}
+        self._queue = DueQueue()
+        self._columns = SrsColumns()
+        self._records = 0  # records in the live journal (written or pending)
+        self._pending: list[str] = []  # journal lines not yet written
+        self._compactor: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()  # one compaction at a time
+        self._load()
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if flush_every > 1 and flush_interval > 0:
+            self._flusher = threading.Thread(
+                target=self._run_flusher, args=(flush_interval,), name="srs-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    # --- Reads ---
+
+    def get(self, card_id: str) -> Entry | None:
+        with self._lock:
+            return self._cards.get(card_id)
+
+    def entries(self) -> dict[str, Entry]:
+        """card_id -> entry for every scheduled card (a copy; entries are
+        replaced on update, never mutated, so they can be shared)."""
+        with self._lock:
+            return dict(self._cards)
+
+    def reviewed_count(self, day: str) -> int:
+        """Distinct cards reviewed on ``day`` (``YYYY-MM-DD``)."""
+        with self._lock:
+            return len(self._daily_log.get(day, ()))
+
+    def due(self, now: datetime) -> dict[str, Entry]:
+        """Scheduled cards whose ``next_due`` is at or before ``now``,
+        earliest first (O(k) for k due cards, see ``DueQueue``)."""
+        with self._lock:
+            return {cid: self._cards[cid] for _, cid in self._queue.due(now.timestamp())}
+
+    def unscheduled(self, card_ids: Iterable[str]) -> list[str]:
+        """The ``card_ids`` that have never been answered."""
+        with self._lock:
+            return [cid for cid in card_ids if cid not in self._cards]
+
+    def stats(self, now: datetime, card_ids: Collection[str], mastered_interval: float) -> tuple[int, int, int]:
+        """(scheduled, due, mastered) counts over the scheduled ``card_ids``
+        (vectorized, see ``SrsColumns``)."""
+        with self._lock:
+            return self._columns.stats(now.timestamp(), card_ids, mastered_interval)
+
+    def interval_histogram(self, card_ids: Collection[str], edges: np.ndarray) -> np.ndarray:
+        """Scheduled ``card_ids`` counted per interval bin."""
+        with self._lock:
+            return self._columns.interval_histogram(card_ids, edges)
+
+    def state(self) -> dict:
+        """Copy of the whole state in snapshot form."""
+        with self._lock:
+            return self._copy()
+
+    # --- Writes ---
+
+    def apply(self, card_id: str, update: Callable[[Entry | None], Entry], day: str) -> Entry:
+        """Replace ``card_id``'s entry with ``update(current)`` and log the
+        review under ``day``. If this answer's journal write (a flush) fails,
+        the in-memory state is left unchanged and the error propagates."""
+        with self._lock:
+            entry = update(self._cards.get(card_id))
+            self._pending.append(_dumps({"id": card_id, "e": entry, "d": day}) + "\n")
+            if len(self._pending) >= self.flush_every:
+                try:
+                    self._flush()
+                except OSError:
+                    self._pending.pop()
+                    raise
+            self._records += 1
+            self._set(card_id, entry, day)
+            self.version = next(_versions)
+            if self._records >= self.compact_every and self._compactor is None:
+                self._compactor = threading.Thread(
+                    target=self._run_compaction, name="srs-compactor", daemon=True
+                )
+                self._compactor.start()
+        return entry
+
+    def flush(self) -> None:
+        """Write pending journal lines now."""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """Stop the flusher, write pending lines and let a running
+        compaction finish. The state stays readable."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        self.wait()
+
+    def compact(self) -> None:
+        """Write a fresh snapshot and empty the journal (synchronously)."""
+        with self._compact_lock:
+            with self._lock:
+                state = self._rotate()
+            self._finish_compaction(state)
+
+    def wait(self) -> None:
+        """Block until a background compaction (if any) has finished."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    # --- Internals ---
+
+    def _set(self, card_id: str, entry: Entry, day: str | None = None) -> None:
+        due = due_at(entry).timestamp()
+        self._cards[card_id] = entry
+        self._queue.push(card_id, due)
+        self._columns.set(card_id, due, entry["interval"], entry["ease_factor"], entry["review_count"])
+        if day is None:
+            return
+        day_list = self._daily_log.setdefault(day, [])
+        if card_id not in day_list:
+            day_list.append(card_id)
+
+    def _flush(self) -> None:
+        """Under the lock: append the pending lines in one write."""
+        if not self._pending:
+            return
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(self._pending))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._pending.clear()
+
+    def _run_flusher(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning("SRS journal flush to %s failed: %s", self.journal_path, e)
+
+    def _load(self) -> None:
+        if self.path.exists():
+            try:
+                state = json.loads(self.path.read_text(encoding="utf-8"))
+                for card_id, entry in state.get("cards", {}).items():
+                    self._set(card_id, entry)
+                self._daily_log = state.get("daily_log", {})
+            except (json.JSONDecodeError, OSError, KeyError, TypeError, ValueError) as e:
+                logger.warning("Ignoring unreadable SRS snapshot %s: %s", self.path, e)
+        # A compaction interrupted by a crash leaves its journal behind
+        self._replay(self._compacting_path())
+        self._records = self._replay(self.journal_path)
+        self._queue.rebuild()
+        if self._records >= self.compact_every or self._compacting_path().exists():
+            self.compact()
+
+    def _replay(self, path: Path) -> int:
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return 0
+        count = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                self._set(record["id"], record["e"], record["d"])
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                logger.warning("Skipping torn SRS journal record in %s", path)
+                continue
+            count += 1
+        return count
+
+    def _compacting_path(self) -> Path:
+        return self.journal_path.with_name(self.journal_path.name + ".compacting")
+
+    def _rotate(self) -> dict:
+        """Under the lock: set the live journal aside and copy the state."""
+        self._flush()
+        live, aside = self.journal_path, self._compacting_path()
+        if live.exists():
+            if aside.exists():
+                # An earlier compaction failed: keep both journals' records
+                with open(aside, "a", encoding="utf-8") as f:
+                    f.write("\n" + live.read_text(encoding="utf-8"))
+                live.unlink()
+            else:
+                os.replace(live, aside)
+        self._records = 0
+        return self._copy()
+
+    def _copy(self) -> dict:
+        return {
+            "cards": dict(self._cards),
+            "daily_log": {day: list(ids) for day, ids in self._daily_log.items()},
+        }
+
+    def _finish_compaction(self, state: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            mode = self.path.stat().st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(_dumps(state))
+                # The old snapshot is replaced only by a complete new one
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, mode)
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        if self.fsync:
+            _fsync_dir(self.path.parent)
+        self._compacting_path().unlink(missing_ok=True)
+
+    def _run_compaction(self) -> None:
+        try:
+            self.compact()
+        except OSError as e:
+            logger.warning("SRS compaction of %s failed: %s", self.path, e)
+        finally:
+            self._compactor = None
@@ -0,0 +1,62 @@
+"""Due queue for the in-memory SRS state.
+
+A binary min-heap of ``(next_due epoch, card_id)``. Rescheduling a card
+pushes a new item and leaves the old one in place; ``_due`` remembers each
+card's current due time, so stale items are recognised and skipped
+(lazy deletion), and the heap is rebuilt once stale items outnumber live
+ones.
+
+``due(now)`` never pops. In a heap every ancestor of an item is at most
+that item, so the items due by ``now`` form a subtree at the root; a walk
+that stops at the first child past ``now`` visits only those k items (plus
+stale ones) and their frontier, instead of every card.
+"""
+
+import heapq
+
+
+class DueQueue:
+    """card_id -> next_due epoch, ordered for "what is due by now".
+
+    Not thread-safe on its own; ``SrsJournal`` calls it under its lock.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, str]] = []
+        self._due: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def push(self, card_id: str, due: float) -> None:
+        """Schedule ``card_id`` at ``due``, replacing its previous time."""
+        if self._due.get(card_id) == due:
+            return
+        self._due[card_id] = due
+        heapq.heappush(self._heap, (due, card_id))
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self.rebuild()
+
+    def discard(self, card_id: str) -> None:
+        self._due.pop(card_id, None)
+
+    def rebuild(self) -> None:
+        """Drop stale items (O(n))."""
+        self._heap = [(due, cid) for cid, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def due(self, now: float) -> list[tuple[float, str]]:
+        """``(due, card_id)`` of every card due at or before ``now``, earliest
+        first."""
+        heap, current = self._heap, self._due
+        found: dict[str, float] = {}
+        stack = [0] if heap and heap[0][0] <= now else []
+        while stack:
+            i = stack.pop()
+            due, card_id = heap[i]
+            if current.get(card_id) == due:
+                found[card_id] = due
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap) and heap[child][0] <= now:
+                    stack.append(child)
+        return sorted((due, card_id) for card_id, due in found.items())
@@ -1,88 +1,180 @@
-"""Server-side SRS engine (SM-2 algorithm) with JSON file backing."""
+"""Server-side SRS engine (SM-2 algorithm).
 
-import json
+Scheduling state lives in one of two stores with the same interface:
+
+- ``json`` (default): an ``SrsJournal`` kept in memory behind a lock;
+  answers are applied there and appended, in write-behind batches, to a
+  review journal next to ``SRS_STATE_FILE``. The snapshot is rewritten
+  atomically only when the journal is compacted. ``close`` flushes it.
+- ``sqlite``: an ``SrsStore`` at ``SRS_DB_FILE`` with ``next_due`` indexed,
+  safe to share between uvicorn workers. An existing JSON state is
+  imported on first use.
+"""
+
+import threading
 from datetime import datetime, timedelta, timezone
 
-from app.config import SRS_STATE_FILE
+import numpy as np
+
+from app.config import (
+    SRS_BACKEND,
+    SRS_DB_FILE,
+    SRS_FLUSH_BATCH,
+    SRS_FLUSH_INTERVAL,
+    SRS_FSYNC,
+    SRS_JOURNAL_COMPACT_EVERY,
+    SRS_STATE_FILE,
+)
+from app.models.card import CardHeader
 from app.services import card_service
+from app.services.srs_journal import Entry, SrsJournal
+from app.services.srs_store import SrsStore
+
+# A card counts as mastered once its interval reaches this many days
+MASTERED_INTERVAL = 21
+# Interval histogram buckets (days): [0, 1), [1, 7), [7, 21), [21, 90), [90, inf)
+INTERVAL_EDGES = np.array([0, 1, 7, MASTERED_INTERVAL, 90, np.inf])
+
+_state: SrsJournal | SrsStore | None = None
+_state_lock = threading.Lock()
+
+# (card header list, state, card_id -> (position, header), unscheduled ids):
+# rebuilt only when the card list or the SRS store changes
+_corpus: tuple | None = None
+_corpus_lock = threading.Lock()
+
+
+def _state_path():
+    return SRS_DB_FILE if SRS_BACKEND == "sqlite" else SRS_STATE_FILE
+
+
+def _get_state() -> SrsJournal | SrsStore:
+    """Return the process-wide SRS state, (re)opening it if its config changed."""
+    global _state
+    with _state_lock:
+        if _state is None or _state.path != _state_path():
+            if _state is not None:
+                _state.close()
+            if SRS_BACKEND == "sqlite":
+                _state = SrsStore(SRS_DB_FILE, legacy_path=SRS_STATE_FILE)
+            else:
+                _state = SrsJournal(
+                    SRS_STATE_FILE,
+                    compact_every=SRS_JOURNAL_COMPACT_EVERY,
+                    flush_every=SRS_FLUSH_BATCH,
+                    flush_interval=SRS_FLUSH_INTERVAL,
+                    fsync=SRS_FSYNC,
+                )
+    return _state
+
+
+def close() -> None:
+    """Write pending SRS state to disk and release it (app shutdown)."""
+    global _state
+    with _state_lock:
+        if _state is not None:
+            _state.close()
+            _state = None
+
+
+def state_version() -> tuple:
+    """Version of the SRS state; changes with every answer."""
+    state = _get_state()
+    return str(state.path), state.version
 
 
-def _load_state() -> dict:
-    """Read SRS state from disk; return empty default if missing."""
-    if SRS_STATE_FILE.exists():
-        try:
-            return json.loads(SRS_STATE_FILE.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
-            pass
-    return {"cards": {}, "daily_log": {}}
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
 
 
-def _save_state(state: dict) -> None:
-    """Write SRS state to disk."""
-    SRS_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    SRS_STATE_FILE.write_text(json.dumps(state, indent=2), encoding="utf-8")
+def _new_entry() -> Entry:
+    """Scheduling state of a card that has never been answered."""
+    return {
+        "ease_factor": 2.5,
+        "interval": 0,
+        "review_count": 0,
+        "next_due": _now().isoformat(),
+        "last_reviewed": "",
+    }
 
 
-def _now() -> datetime:
-    return datetime.now(timezone.utc)
+def _corpus_for(state) -> tuple:
+    """(card header list, state, card_id -> (position, header), unscheduled
+    ids) for the current card list, rebuilt only when it or the store changes.
+
+    The card_id dict keeps its identity while the list is unchanged, so
+    the state can cache per-corpus masks on it.
+    """
+    global _corpus
+    headers = card_service.list_headers()
+    with _corpus_lock:
+        if _corpus is None or _corpus[0] is not headers or _corpus[1] is not state:
+            by_id = {h.card_id: (i, h) for i, h in enumerate(headers)}
+            _corpus = (headers, state, by_id, state.unscheduled(by_id))
+        return _corpus
 
 
-def _ensure_card(state: dict, card_id: str) -> dict:
-    """Initialise a new card entry if it doesn't exist yet."""
-    if card_id not in state["cards"]:
-        state["cards"][card_id] = {
-            "ease_factor": 2.5,
-            "interval": 0,
-            "review_count": 0,
-            "next_due": _now().isoformat(),
-            "last_reviewed": "",
-        }
-    return state["cards"][card_id]
+def _due_candidates(state) -> tuple[dict[str, tuple[int, CardHeader]], list[str]]:
+    """Cards by id (with their listing position) and the ids never answered.
+
+    The unscheduled ids are computed over the whole corpus only when the
+    card list changes; after that each call re-checks just those ids, and
+    answered ones drop out.
+    """
+    global _corpus
+    corpus = _corpus_for(state)
+    new = state.unscheduled(corpus[3])
+    if len(new) < len(corpus[3]):
+        with _corpus_lock:
+            if _corpus is corpus:
+                _corpus = (*corpus[:3], new)
+    return corpus[2], new
 
 
 def get_due_cards() -> list[dict]:
-    """Return cards where next_due <= now, matching anki_service shape."""
-    all_cards = card_service.list_cards()
-    state = _load_state()
-    now = _now()
+    """Return cards where next_due <= now, matching anki_service shape.
 
-    due = []
-    for card in all_cards:
-        entry = state["cards"].get(card.card_id)
-        if entry is None:
-            # New card — due immediately
-            interval = 0
-            ease = 2.5
-        else:
-            next_due = datetime.fromisoformat(entry["next_due"])
-            if next_due.tzinfo is None:
-                next_due = next_due.replace(tzinfo=timezone.utc)
-            if next_due > now:
-                continue
-            interval = entry["interval"]
-            ease = entry["ease_factor"]
+    Costs O(k log k) for k due cards: scheduled ones come from the state's
+    due queue (or index), new ones from the cached unscheduled set.
+    """
+    state = _get_state()
+    by_id, new = _due_candidates(state)
+
+    # (interval, ease, position, header); new cards are due immediately
+    picked = [(0, 2.5, *by_id[cid]) for cid in new]
+    for card_id, entry in state.due(_now()).items():
+        item = by_id.get(card_id)
+        if item is not None:  # skip state left behind by deleted cards
+            picked.append((entry["interval"], entry["ease_factor"], *item))
 
+    # Sort: new cards first (interval 0), then lowest interval, then file order
+    picked.sort(key=lambda p: (0 if p[0] == 0 else 1, p[0], p[2]))
+
+    due = []
+    for interval, ease, _, card in picked:
+        # Bodies are read only for cards that are actually due
+        front, back = card_service.card_body(card)
         due.append({
             "card_id": card.card_id,
             "note_id": 0,
-            "front": card.prompt,
-            "back": card.solution,
+            "front": front,
+            "back": back,
             "deck": card.deck,
             "interval": interval,
             "ease": ease,
             "tags": card.tags,
         })
-
-    # Sort: new cards first (interval 0), then lowest interval
-    due.sort(key=lambda c: (0 if c["interval"] == 0 else 1, c["interval"]))
     return due
 
 
 def answer_card(card_id: str, ease: int) -> None:
     """Apply SM-2 update for a card and persist."""
-    state = _load_state()
-    entry = _ensure_card(state, card_id)
+    today = _now().strftime("%Y-%m-%d")
+    _get_state().apply(card_id, lambda entry: _schedule(entry or _new_entry(), ease), today)
 
+
+def _schedule(entry: Entry, ease: int) -> Entry:
+    """SM-2 step: the entry after answering with ``ease`` (1-4)."""
     ef = entry["ease_factor"]
     iv = entry["interval"]
     rc = entry["review_count"]
@@ -110,47 +202,26 @@ def answer_card(card_id: str, ease: int) -> None:
         iv *= 1.3
         ef += 0.15
 
-    entry["ease_factor"] = round(ef, 4)
-    entry["interval"] = round(iv, 1)
-    entry["review_count"] = rc + 1
-    entry["next_due"] = (_now() + timedelta(days=iv)).isoformat()
-    entry["last_reviewed"] = _now().isoformat()
-
-    # Daily log
-    today = _now().strftime("%Y-%m-%d")
-    log = state.setdefault("daily_log", {})
-    day_list = log.setdefault(today, [])
-    if card_id not in day_list:
-        day_list.append(card_id)
-
-    _save_state(state)
+    return {
+        "ease_factor": round(ef, 4),
+        "interval": round(iv, 1),
+        "review_count": rc + 1,
+        "next_due": (_now() + timedelta(days=iv)).isoformat(),
+        "last_reviewed": _now().isoformat(),
+    }
 
 
 def get_basic_stats() -> dict:
     """Return stats matching anki_service.get_basic_stats() shape."""
-    all_cards = card_service.list_cards()
-    state = _load_state()
+    state = _get_state()
+    headers, _, card_ids, _ = _corpus_for(state)
     now = _now()
     today = now.strftime("%Y-%m-%d")
 
-    due_count = 0
-    mastered = 0
-
-    for card in all_cards:
-        entry = state["cards"].get(card.card_id)
-        if entry is None:
-            due_count += 1  # new card = due
-        else:
-            next_due = datetime.fromisoformat(entry["next_due"])
-            if next_due.tzinfo is None:
-                next_due = next_due.replace(tzinfo=timezone.utc)
-            if next_due <= now:
-                due_count += 1
-            if entry["interval"] >= 21:
-                mastered += 1
-
-    total = len(all_cards)
-    reviewed_today = len(state.get("daily_log", {}).get(today, []))
+    scheduled, due, mastered = state.stats(now, card_ids, MASTERED_INTERVAL)
+    total = len(headers)
+    due_count = len(card_ids) - scheduled + due  # new cards are due
+    reviewed_today = state.reviewed_count(today)
     mastery_pct = round(mastered / total * 100) if total > 0 else 0
 
     return {
@@ -160,3 +231,16 @@ def get_basic_stats() -> dict:
         "mastery_pct": mastery_pct,
         "mastered_count": mastered,
     }
+
+
+def get_interval_histogram() -> list[dict]:
+    """Cards per review-interval bucket (days); new cards count as interval 0."""
+    state = _get_state()
+    card_ids = _corpus_for(state)[2]
+    scheduled, _, _ = state.stats(_now(), card_ids, MASTERED_INTERVAL)
+    counts = state.interval_histogram(card_ids, INTERVAL_EDGES)
+    counts[0] += len(card_ids) - scheduled
+    return [
+        {"min": float(lo), "max": None if np.isinf(hi) else float(hi), "count": int(n)}
+        for lo, hi, n in zip(INTERVAL_EDGES[:-1], INTERVAL_EDGES[1:], counts)
+    ]
@@ -0,0 +1,222 @@
+"""SQLite SRS state for ``SRS_BACKEND=sqlite``.
+
+One ``cards`` row per scheduled card (``next_due`` as epoch seconds,
+B-tree indexed) and one ``reviews`` row per (day, card) for the daily log.
+Due cards are an indexed range scan, the dashboard counts one aggregate
+query, and an answer is a single-row read-modify-write inside a
+``BEGIN IMMEDIATE`` transaction, so several uvicorn workers can share the
+database without losing reviews.
+
+The interface matches ``SrsJournal``. On first use an existing JSON state
+(snapshot plus journal) at ``legacy_path`` is imported.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from app.services.srs_journal import Entry, SrsJournal, due_at
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS cards (
+    card_id TEXT PRIMARY KEY,
+    ease_factor REAL NOT NULL,
+    interval REAL NOT NULL,
+    review_count INTEGER NOT NULL,
+    next_due REAL NOT NULL,
+    last_reviewed TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cards_next_due ON cards (next_due);
+CREATE TABLE IF NOT EXISTS reviews (
+    day TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    PRIMARY KEY (day, card_id)
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+"""
+
+_COLUMNS = "card_id, ease_factor, interval, review_count, next_due, last_reviewed"
+
+
+def _entry(row: tuple) -> Entry:
+    _, ease_factor, interval, review_count, next_due, last_reviewed = row
+    return {
+        "ease_factor": ease_factor,
+        "interval": interval,
+        "review_count": review_count,
+        "next_due": datetime.fromtimestamp(next_due, timezone.utc).isoformat(),
+        "last_reviewed": last_reviewed,
+    }
+
+
+def _row(card_id: str, entry: Entry) -> tuple:
+    return (
+        card_id,
+        entry["ease_factor"],
+        entry["interval"],
+        entry["review_count"],
+        due_at(entry).timestamp(),
+        entry.get("last_reviewed", ""),
+    )
+
+
+class SrsStore:
+    """SRS state in a SQLite database shared by every worker."""
+
+    def __init__(self, path: Path, legacy_path: Path | None = None):
+        self.path = path
+        self._local = threading.local()  # one connection per thread
+        self._conn().executescript(_SCHEMA)
+        if legacy_path is not None:
+            self._import(legacy_path)
+
+    # --- Reads ---
+
+    @property
+    def version(self) -> int:
+        """Bumped by every answer, in any process."""
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def get(self, card_id: str) -> Entry | None:
+        row = self._conn().execute(f"SELECT {_COLUMNS} FROM cards WHERE card_id = ?", (card_id,)).fetchone()
+        return _entry(row) if row else None
+
+    def entries(self) -> dict[str, Entry]:
+        return {row[0]: _entry(row) for row in self._conn().execute(f"SELECT {_COLUMNS} FROM cards")}
+
+    def reviewed_count(self, day: str) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM reviews WHERE day = ?", (day,)).fetchone()[0]
+
+    def due(self, now: datetime) -> dict[str, Entry]:
+        rows = self._conn().execute(
+            f"SELECT {_COLUMNS} FROM cards WHERE next_due <= ? ORDER BY next_due", (now.timestamp(),)
+        )
+        return {row[0]: _entry(row) for row in rows}
+
+    def unscheduled(self, card_ids: Iterable[str]) -> list[str]:
+        rows = self._conn().execute(
+            "SELECT value FROM json_each(?) WHERE value NOT IN (SELECT card_id FROM cards) ORDER BY key",
+            (json.dumps(list(card_ids)),),
+        )
+        return [row[0] for row in rows]
+
+    def stats(self, now: datetime, card_ids: Iterable[str], mastered_interval: float) -> tuple[int, int, int]:
+        scheduled, due, mastered = self._conn().execute(
+            """
+            SELECT COUNT(*), TOTAL(next_due <= ?), TOTAL(interval >= ?) FROM cards
+            WHERE card_id IN (SELECT value FROM json_each(?))
+            """,
+            (now.timestamp(), mastered_interval, json.dumps(list(card_ids))),
+        ).fetchone()
+        return scheduled, int(due), int(mastered)
+
+    def interval_histogram(self, card_ids: Iterable[str], edges: np.ndarray) -> np.ndarray:
+        rows = self._conn().execute(
+            "SELECT interval FROM cards WHERE card_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(card_ids)),),
+        )
+        intervals = np.fromiter((row[0] for row in rows), dtype=np.float64)
+        counts, _ = np.histogram(intervals, bins=edges)
+        return counts
+
+    def state(self) -> dict:
+        daily_log: dict[str, list[str]] = {}
+        for day, card_id in self._conn().execute("SELECT day, card_id FROM reviews ORDER BY day"):
+            daily_log.setdefault(day, []).append(card_id)
+        return {"cards": self.entries(), "daily_log": daily_log}
+
+    # --- Writes ---
+
+    def apply(self, card_id: str, update: Callable[[Entry | None], Entry], day: str) -> Entry:
+        """Replace ``card_id``'s entry with ``update(current)`` and log the
+        review, in one write transaction."""
+        with self._transaction() as conn:
+            row = conn.execute(f"SELECT {_COLUMNS} FROM cards WHERE card_id = ?", (card_id,)).fetchone()
+            entry = update(_entry(row) if row else None)
+            self._put(conn, card_id, entry, day)
+        return entry
+
+    def flush(self) -> None:
+        """Nothing to do: every answer is committed as it is made."""
+
+    def close(self) -> None:
+        """Close the calling thread's connection (there is nothing to flush).
+
+        Connections opened by other threads are released with their thread;
+        a later call from this thread opens a new one.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Internals ---
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._conn())
+
+    def _put(self, conn: sqlite3.Connection, card_id: str, entry: Entry, day: str) -> None:
+        conn.execute(
+            f"""
+            INSERT INTO cards ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (card_id) DO UPDATE SET
+                ease_factor = excluded.ease_factor,
+                interval = excluded.interval,
+                review_count = excluded.review_count,
+                next_due = excluded.next_due,
+                last_reviewed = excluded.last_reviewed
+            """,
+            _row(card_id, entry),
+        )
+        conn.execute("INSERT OR IGNORE INTO reviews VALUES (?, ?)", (day, card_id))
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _import(self, legacy_path: Path) -> None:
+        """Copy a JSON state into an empty database (once, in one worker)."""
+        journal_path = legacy_path.with_suffix(".journal")
+        if not legacy_path.exists() and not journal_path.exists():
+            return
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+                return
+            state = SrsJournal(legacy_path).state()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO cards ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                [_row(cid, entry) for cid, entry in state["cards"].items()],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO reviews VALUES (?, ?)",
+                [(day, cid) for day, ids in state["daily_log"].items() for cid in ids],
+            )
+            conn.execute("INSERT INTO meta VALUES ('imported', 1)")
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` (``ROLLBACK`` on error)."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
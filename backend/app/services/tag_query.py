@@ -0,0 +1,130 @@
+"""Boolean tag queries: ``programming AND (debug OR build) AND NOT extend``.
+
+A query is compiled once into a small expression tree and then evaluated
+against per-tag ordinal sets (``FacetIndex``), so its cost depends on the
+sizes of the sets involved, not on how many cards have to be checked.
+
+Grammar (keywords are case-insensitive; juxtaposition means AND)::
+
+    query := or
+    or    := and ("OR" and)*
+    and   := not (["AND"] not)*
+    not   := "NOT" not | "(" or ")" | TAG
+
+A tag is any run of characters other than whitespace and parentheses and
+matches case-insensitively, like the other metadata filters.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable
+
+# ("tag", name) | ("not", node) | ("and", (node, ...)) | ("or", (node, ...))
+Node = tuple
+
+_TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+_KEYWORDS = {"and", "or", "not"}
+
+
+class TagQueryError(ValueError):
+    """The tag query is not well-formed."""
+
+
+@lru_cache(maxsize=256)
+def compile_tag_query(text: str) -> Node:
+    """Parse ``text`` into an expression tree (cached per query string)."""
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        raise TagQueryError("empty tag query")
+    parser = _Parser(tokens)
+    node = parser.parse_or()
+    if parser.pos < len(tokens):
+        raise TagQueryError(f"unexpected {tokens[parser.pos]!r}")
+    return node
+
+
+def evaluate(
+    node: Node,
+    lookup: Callable[[str], set[int]],
+    universe: Callable[[], set[int]],
+) -> set[int]:
+    """Ordinals matching ``node``.
+
+    ``lookup(tag)`` returns the (shared, unmodified) set for one tag;
+    ``universe()`` all ordinals, only needed for a NOT that is not
+    subtracted from something narrower.
+    """
+    kind = node[0]
+    if kind == "tag":
+        return lookup(node[1])
+    if kind == "not":
+        return universe() - evaluate(node[1], lookup, universe)
+    if kind == "or":
+        return set().union(*(evaluate(child, lookup, universe) for child in node[1]))
+    # AND: intersect the positive terms (smallest first), then subtract the
+    # negated ones, so "a AND NOT b" never touches the universe
+    positive = [evaluate(c, lookup, universe) for c in node[1] if c[0] != "not"]
+    negative = [c[1] for c in node[1] if c[0] == "not"]
+    if positive:
+        positive.sort(key=len)
+        result = positive[0]
+        for other in positive[1:]:
+            result = result & other
+    else:
+        result = universe()
+    for child in negative:
+        if not result:
+            break
+        result = result - evaluate(child, lookup, universe)
+    return result
+
+
+class _Parser:
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def keyword(self, word: str) -> bool:
+        token = self.peek()
+        if token is not None and token.lower() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self.keyword("or"):
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else ("or", tuple(children))
+
+    def parse_and(self) -> Node:
+        children = [self.parse_not()]
+        while True:
+            if self.keyword("and"):
+                children.append(self.parse_not())
+                continue
+            token = self.peek()
+            if token is None or token == ")" or token.lower() == "or":
+                break
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else ("and", tuple(children))
+
+    def parse_not(self) -> Node:
+        if self.keyword("not"):
+            return ("not", self.parse_not())
+        token = self.peek()
+        if token is None:
+            raise TagQueryError("tag query ends unexpectedly")
+        self.pos += 1
+        if token == "(":
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise TagQueryError("missing ')'")
+            self.pos += 1
+            return node
+        if token == ")" or token.lower() in _KEYWORDS:
+            raise TagQueryError(f"unexpected {token!r}")
+        return ("tag", token.lower())
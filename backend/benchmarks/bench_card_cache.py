@@ -0,0 +1,37 @@
+"""Cold-start benchmark: card index build with and without the parse cache.
+
+Run from backend/:  python -m benchmarks.bench_card_cache [N ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.card_cache import CardCache
+from app.services.card_index import CardIndex
+from benchmarks.corpus import write_corpus
+
+
+def _cold_build(root: Path, cache: CardCache | None) -> float:
+    start = time.perf_counter()
+    CardIndex(root, cache=cache).refresh()
+    return time.perf_counter() - start
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'cards':>8} {'no cache':>10} {'warm cache':>11} {'speedup':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "cards"
+            write_corpus(root, n)
+            cache_file = Path(tmp) / "card_cache.sqlite"
+
+            uncached = _cold_build(root, None)
+            _cold_build(root, CardCache(cache_file))  # populate
+            cached = _cold_build(root, CardCache(cache_file))
+            print(f"{n:>8} {uncached * 1000:>8.0f}ms {cached * 1000:>9.0f}ms {uncached / cached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 5_000, 20_000])
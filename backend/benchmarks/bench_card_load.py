@@ -0,0 +1,54 @@
+"""Cold card index build: serial vs thread pool vs thread + process pool.
+
+Run from backend/:  python -m benchmarks.bench_card_load [N ...]
+
+No parse cache is attached, so every file is read and parsed. On a local
+disk with a warm page cache reads are nearly free and the thread pool
+mostly overlaps syscalls; the gap widens on network filesystems, where
+each read waits on the server.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.card_index import CardIndex
+from benchmarks.corpus import write_corpus
+
+_WORKERS = 8
+_PROCS = os.cpu_count() or 1
+_CONFIGS = [
+    ("serial", {}),
+    (f"threads={_WORKERS}", {"workers": _WORKERS}),
+    (f"threads={_WORKERS} procs={_PROCS}", {"workers": _WORKERS, "processes": _PROCS}),
+]
+
+
+def _build(root: Path, **kwargs) -> tuple[float, list]:
+    start = time.perf_counter()
+    index = CardIndex(root, **kwargs)
+    index.refresh()
+    return time.perf_counter() - start, index.headers()
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'cards':>8}  " + "  ".join(f"{name:>22}" for name, _ in _CONFIGS))
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            write_corpus(root, n)
+            timings = []
+            baseline = None
+            for _name, kwargs in _CONFIGS:
+                elapsed, cards = _build(root, **kwargs)
+                if baseline is None:
+                    baseline = cards
+                assert cards == baseline, "parallel load must match serial output"
+                timings.append(elapsed)
+            print(f"{n:>8}  " + "  ".join(f"{t * 1000:>20.0f}ms" for t in timings))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 50_000])
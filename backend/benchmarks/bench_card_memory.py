@@ -0,0 +1,82 @@
+"""Resident-memory benchmark: what the card index holds per card.
+
+Writes a synthetic corpus to disk and compares the list of full pydantic
+Cards the index used to keep with a loaded ``CardIndex`` as it stands:
+compact CardHeaders plus the ordinal maps, the full-text ``SearchIndex``
+and the ``FacetIndex``, with an empty body LRU (bodies are read on demand
+and bounded by ``CARD_BODY_CACHE_BYTES``). Sizes are measured with
+tracemalloc, after a garbage collection, as the memory still held once
+the structure is built; the search and facet shares are what dropping
+each one releases. The parser's card_id memo is warmed first so neither
+side is charged for it.
+
+Run from backend/:  python -m benchmarks.bench_card_memory [N ...]
+(default: 10000 and 100000 cards)
+"""
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from app.parsers.card_parser import parse_card_file
+from app.services.card_facets import FacetIndex
+from app.services.card_index import CardIndex
+from app.services.card_search import SearchIndex
+from benchmarks.corpus import write_corpus
+
+
+def _held() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _full_cards(paths: list[Path]) -> int:
+    tracemalloc.start()
+    before = _held()
+    cards = [parse_card_file(p) for p in paths]
+    size = _held() - before
+    tracemalloc.stop()
+    del cards
+    return size
+
+
+def _card_index(root: Path) -> tuple[int, int, int]:
+    """(whole index, search share, facet share) in bytes."""
+    tracemalloc.start()
+    before = _held()
+    index = CardIndex(root)
+    index.refresh()
+    index.headers()
+    total = _held() - before
+    index.fulltext = SearchIndex()
+    search = total - (_held() - before)
+    index.facets = FacetIndex()
+    facets = total - search - (_held() - before)
+    tracemalloc.stop()
+    del index
+    return total, search, facets
+
+
+def main(sizes: list[int]) -> None:
+    print(
+        f"{'cards':>8} {'Card list':>10} {'per card':>9} {'CardIndex':>10} {'per card':>9}"
+        f" {'search':>9} {'facets':>9} {'ratio':>6}"
+    )
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            paths = write_corpus(root, n)
+            for p in paths:
+                parse_card_file(p)
+            full = _full_cards(paths)
+            total, search, facets = _card_index(root)
+        print(
+            f"{n:>8} {full / 1e6:>8.1f}MB {full / n:>8.0f}B {total / 1e6:>8.1f}MB {total / n:>8.0f}B"
+            f" {search / 1e6:>7.1f}MB {facets / 1e6:>7.1f}MB {full / total:>5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
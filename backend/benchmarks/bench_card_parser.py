@@ -0,0 +1,114 @@
+"""Per-file parse cost: single-pass parser vs the previous regex-per-field one.
+
+Run from backend/:  python -m benchmarks.bench_card_parser [N]
+
+Files are read up front so only parsing is timed. The legacy parser below is
+a frozen copy of parse_card_file before the single-pass rewrite; the run also
+checks that both produce the same Card for every file.
+"""
+
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.models.card import Card
+from app.parsers.card_parser import parse_card_id, parse_card_text
+from benchmarks.corpus import write_corpus
+
+_COGNITIVE_TAGS = {
+    "fill-in-blank": "1 - Fill-in-blank",
+    "predict-output": "2 - Predict-output",
+    "explain": "3 - Explain",
+    "debug": "4 - Debug",
+    "build": "5 - Build",
+    "extend": "6 - Extend",
+    "integration": "7 - Integration",
+}
+
+
+def legacy_parse_card_text(text: str, filepath: Path) -> Card | None:
+    fm_match = re.match(r"^---\n(.*?)\n---", text, re.DOTALL)
+    if not fm_match:
+        return None
+    fm = fm_match.group(1)
+    deck_match = re.search(r'deck:\s*"?([^"\n]+)"?', fm)
+    deck = deck_match.group(1).strip() if deck_match else "JobAcademy"
+    tags_match = re.search(r"tags:\s*\[([^\]]*)\]", fm)
+    tags = []
+    if tags_match:
+        tags = [t.strip() for t in tags_match.group(1).split(",") if t.strip()]
+    cid_match = re.search(r'card_id:\s*"?([^"\n]+)"?', fm)
+    card_id = cid_match.group(1).strip() if cid_match else filepath.stem
+    fw_match = re.search(r"fire_weight:\s*([\d.]+)", fm)
+    fire_weight = float(fw_match.group(1)) if fw_match else 0.5
+    edited_match = re.search(r'notion_last_edited:\s*"?([^"\n]+)"?', fm)
+    notion_last_edited = edited_match.group(1).strip() if edited_match else ""
+    topic_match = re.search(r'topic:\s*"?([^"\n]+)"?', fm)
+    fm_topic = topic_match.group(1).strip() if topic_match else None
+    concept_match = re.search(r'concept:\s*"?([^"\n]+)"?', fm)
+    fm_concept = concept_match.group(1).strip() if concept_match else None
+    has_visual_match = re.search(r"has_visual:\s*(true|false)", fm, re.IGNORECASE)
+    has_visual = has_visual_match.group(1).lower() == "true" if has_visual_match else False
+    concept_node_match = re.search(r'concept_node:\s*"?([^"\n]+)"?', fm)
+    concept_node = concept_node_match.group(1).strip() if concept_node_match else None
+    subtopic_match = re.search(r'subtopic:\s*"?([^"\n]+)"?', fm)
+    subtopic = subtopic_match.group(1).strip() if subtopic_match else None
+    blocks = re.findall(r"START\n(.*?)\nEND", text, re.DOTALL)
+    if len(blocks) < 2:
+        return None
+    id_info = parse_card_id(card_id)
+    cognitive_layer = next((_COGNITIVE_TAGS[t] for t in tags if t in _COGNITIVE_TAGS), None)
+    return Card(
+        card_id=card_id,
+        deck=deck,
+        tags=tags,
+        fire_weight=fire_weight,
+        notion_last_edited=notion_last_edited,
+        prompt=blocks[0].strip(),
+        solution=blocks[1].strip(),
+        pillar=id_info["pillar"],
+        knowledge_layer=id_info["knowledge_layer"],
+        cognitive_layer=cognitive_layer,
+        filename=filepath.name,
+        topic=fm_topic or id_info.get("topic"),
+        concept=fm_concept or id_info.get("concept"),
+        has_visual=has_visual,
+        concept_node=concept_node,
+        subtopic=subtopic,
+    )
+
+
+def _time_per_file(parse, docs) -> float:
+    start = time.perf_counter()
+    for text, path in docs:
+        parse(text, path)
+    return (time.perf_counter() - start) / len(docs)
+
+
+def _mismatches(docs) -> int:
+    bad = 0
+    for text, path in docs:
+        bad += legacy_parse_card_text(text, path) != parse_card_text(text, path)
+    return bad
+
+
+def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(Path(tmp), n)
+        docs = [(p.read_text(encoding="utf-8"), p) for p in paths]
+    fixtures = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+    data = Path(__file__).resolve().parent.parent / "data" / "cards"
+    real = [(p.read_text(encoding="utf-8"), p) for p in [*fixtures.glob("*.md"), *data.rglob("*.md")]]
+
+    legacy = _time_per_file(legacy_parse_card_text, docs)
+    single = _time_per_file(parse_card_text, docs)
+    print(f"{n} synthetic cards")
+    print(f"  legacy regex parser: {legacy * 1e6:7.1f} us/file")
+    print(f"  single-pass parser:  {single * 1e6:7.1f} us/file  ({legacy / single:.1f}x)")
+    print(f"  output mismatches: {_mismatches(docs + real)} of {len(docs) + len(real)} files")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,89 @@
+"""Ranked-search benchmark: BM25 query latency on a synthetic corpus.
+
+Documents draw words from a Zipf-distributed vocabulary, so queries range
+from very common words (most of the corpus matches) to rare ones. Compares
+the vectorized ``SearchIndex.rank`` with a straightforward per-card Python
+BM25 loop over the same postings.
+
+Run from backend/:  python -m benchmarks.bench_card_search [N ...]
+"""
+
+import math
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+from app.services.card_search import BM25_B, BM25_K1, SearchIndex, card_terms
+
+_VOCAB = [f"w{i}" for i in range(5_000)]
+_WEIGHTS = [1 / (i + 1) for i in range(len(_VOCAB))]
+_QUERIES = ["w0", "w3 w10", "w50", "w400 w2", "w1234", "w4"]  # w4 also matches w4xxx
+_REPEATS = 5
+
+
+def _build(n: int) -> tuple[SearchIndex, dict[int, dict[str, int]]]:
+    rng = random.Random(0)
+    index = SearchIndex()
+    docs = {}
+    for i in range(n):
+        words = rng.choices(_VOCAB, _WEIGHTS, k=rng.randint(60, 240))
+        terms = card_terms(f"nb-1C-{i:05d}", " ".join(words[:60]), " ".join(words[60:]))
+        index.add(i, terms)
+        docs[i] = terms
+    return index, docs
+
+
+def _python_bm25(docs: dict[int, dict[str, int]], df: Counter, avg_len: float, query: str) -> list[int]:
+    """Reference: score every card in a Python loop (corpus stats precomputed)."""
+    words = set(query.split())
+    n = len(docs)
+    expand = {w: [t for t in df if w in t] for w in words}
+    scores = {}
+    for ordinal, terms in docs.items():
+        if not all(any(t in terms for t in expand[w]) for w in words):
+            continue
+        length = sum(terms.values())
+        score = 0.0
+        for ts in expand.values():
+            for t in ts:
+                tf = terms.get(t)
+                if tf:
+                    idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                    score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores[ordinal] = score
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _time(fn) -> float:
+    samples = []
+    for _ in range(_REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(sizes: list[int]) -> None:
+    for n in sizes:
+        index, docs = _build(n)
+        df = Counter(t for terms in docs.values() for t in terms)
+        avg_len = sum(sum(t.values()) for t in docs.values()) / n
+        for q in _QUERIES:
+            index.rank(q)  # freeze term arrays
+        print(f"\n{n} cards")
+        print(f"{'query':>12} {'matches':>8} {'bm25 (numpy)':>13} {'python loop':>12}")
+        for q in _QUERIES:
+            ordinals, _scores = index.rank(q)
+            vectorized = _time(lambda: index.rank(q))
+            start = time.perf_counter()
+            reference = _python_bm25(docs, df, avg_len, q)
+            loop = time.perf_counter() - start
+            assert len(reference) == len(ordinals)
+            print(f"{q:>12} {len(ordinals):>8} {vectorized * 1000:>11.2f}ms {loop * 1000:>10.0f}ms")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [50_000])
@@ -0,0 +1,102 @@
+"""SRS statistics benchmark: dashboard counts over a large scheduling state.
+
+Builds an in-memory SRS state (every card scheduled, next_due spread over
+the past week and the next 90 days) and compares the vectorized
+``SrsJournal.stats`` / ``interval_histogram`` over NumPy columns with the
+previous per-card Python loop, which parses ``next_due`` for every card.
+
+Run from backend/:  python -m benchmarks.bench_srs_stats [N ...]
+"""
+
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from app.services.srs_journal import SrsJournal
+from app.services.srs_service import INTERVAL_EDGES, MASTERED_INTERVAL
+
+_REPEATS = 5
+
+
+def _build(root: Path, n: int) -> tuple[SrsJournal, dict[str, tuple]]:
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    cards = {}
+    for i in range(n):
+        cards[f"nb-1C-{i:06d}"] = {
+            "ease_factor": round(rng.uniform(1.3, 3.0), 4),
+            "interval": round(rng.expovariate(1 / 20), 1),
+            "review_count": rng.randint(1, 30),
+            "next_due": (now + timedelta(days=rng.uniform(-7, 90))).isoformat(),
+            "last_reviewed": now.isoformat(),
+        }
+    path = root / "srs_state.json"
+    path.write_text(json.dumps({"cards": cards, "daily_log": {}}), encoding="utf-8")
+    corpus = {cid: () for cid in cards}
+    return SrsJournal(path), corpus
+
+
+def _loop_stats(entries: dict, card_ids, now: datetime) -> tuple[int, int, list[int]]:
+    """Reference: the per-card loop get_basic_stats used to run."""
+    due = mastered = 0
+    histogram = [0] * (len(INTERVAL_EDGES) - 1)
+    for cid in card_ids:
+        entry = entries.get(cid)
+        if entry is None:
+            continue
+        next_due = datetime.fromisoformat(entry["next_due"])
+        if next_due.tzinfo is None:
+            next_due = next_due.replace(tzinfo=timezone.utc)
+        if next_due <= now:
+            due += 1
+        if entry["interval"] >= MASTERED_INTERVAL:
+            mastered += 1
+        for b in range(len(histogram)):
+            if INTERVAL_EDGES[b] <= entry["interval"] < INTERVAL_EDGES[b + 1]:
+                histogram[b] += 1
+                break
+    return due, mastered, histogram
+
+
+def _time(fn) -> float:
+    samples = []
+    for _ in range(_REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'cards':>8} {'numpy stats':>12} {'+histogram':>11} {'python loop':>12} {'speedup':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal, corpus = _build(Path(tmp), n)
+            now = datetime.now(timezone.utc)
+            entries = journal.entries()
+
+            _, due, mastered = journal.stats(now, corpus, MASTERED_INTERVAL)  # builds the mask
+            histogram = journal.interval_histogram(corpus, INTERVAL_EDGES)
+            assert (due, mastered, histogram.tolist()) == _loop_stats(entries, corpus, now)
+
+            stats = _time(lambda: journal.stats(now, corpus, MASTERED_INTERVAL))
+            both = _time(
+                lambda: (
+                    journal.stats(now, corpus, MASTERED_INTERVAL),
+                    journal.interval_histogram(corpus, INTERVAL_EDGES),
+                )
+            )
+            loop = _time(lambda: _loop_stats(entries, corpus, now))
+            print(
+                f"{n:>8} {stats * 1000:>10.2f}ms {both * 1000:>9.2f}ms"
+                f" {loop * 1000:>10.0f}ms {loop / both:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100_000])
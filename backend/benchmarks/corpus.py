@@ -0,0 +1,52 @@
+"""Synthetic card corpus shared by the benchmarks."""
+
+import random
+from pathlib import Path
+
+from app.models.card import Card
+from app.parsers.card_parser import CONCEPT_PREFIX_MAP, card_to_markdown
+
+_LAYERS = "CMPIV"
+_TAGS = ["conceptual", "mathematical", "programming", "explain", "debug", "build", "extend"]
+_WORDS = (
+    "bayes prior posterior likelihood evidence feature class independence "
+    "smoothing laplace gaussian multinomial bernoulli variance mean token "
+    "vocabulary spam sentiment classifier probability distribution sample"
+).split()
+
+
+def make_card(i: int, rng: random.Random) -> Card:
+    """Build a realistic-looking card; ids cycle through every ID format."""
+    prefixes = list(CONCEPT_PREFIX_MAP)
+    kind = i % 3
+    if kind == 0:
+        card_id = f"nb-{rng.randint(1, 6)}{rng.choice(_LAYERS)}-{i:05d}"
+    elif kind == 1:
+        card_id = f"{rng.choice(prefixes)}-{rng.choice(_LAYERS)}-{i:05d}"
+    else:
+        card_id = f"{rng.choice(prefixes)}-{i:05d}"
+    return Card(
+        card_id=card_id,
+        deck=f"JobAcademy::Bench::{rng.randint(1, 6)}",
+        tags=rng.sample(_TAGS, 3),
+        fire_weight=round(rng.random(), 2),
+        notion_last_edited="2026-02-08T17:04:00.000Z",
+        prompt=" ".join(rng.choices(_WORDS, k=rng.randint(20, 80))),
+        solution=" ".join(rng.choices(_WORDS, k=rng.randint(40, 160))),
+        concept_node=rng.choice(["NB", "BAYES", "COND", None]),
+        subtopic=rng.choice(["variants", "math", "formula", None]),
+    )
+
+
+def write_corpus(root: Path, n: int, seed: int = 0) -> list[Path]:
+    """Write ``n`` card files under ``root`` spread over nested folders."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n):
+        card = make_card(i, rng)
+        folder = root / f"topic-{i % 20:02d}" / f"layer-{i % 5}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{card.card_id}.md"
+        path.write_text(card_to_markdown(card), encoding="utf-8")
+        paths.append(path)
+    return paths
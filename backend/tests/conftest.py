@@ -1,12 +1,28 @@
-"""Shared test fixtures."""
+"""Shared test fixtures and card-writing helpers."""
 
+import os
 from pathlib import Path
 
 import pytest
 
+from app.models.card import Card
+from app.parsers.card_parser import card_to_markdown
+from app.services import card_service
+
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
 
+@pytest.fixture(scope="session")
+def _card_cache_file(tmp_path_factory):
+    return tmp_path_factory.mktemp("card_cache") / "card_cache.sqlite"
+
+
+@pytest.fixture(autouse=True)
+def _isolated_card_cache(monkeypatch, _card_cache_file):
+    """Keep the parse cache out of the source tree (backend/data)."""
+    monkeypatch.setattr(card_service, "CARD_CACHE_FILE", _card_cache_file)
+
+
 @pytest.fixture
 def sample_card_path():
     return FIXTURES_DIR / "nb-3M-01.md"
@@ -25,3 +41,41 @@ def sample_fire_path():
 @pytest.fixture
 def sample_card_text(sample_card_path):
     return sample_card_path.read_text(encoding="utf-8")
+
+
+def make_card(card_id: str, **overrides) -> Card:
+    fields = {
+        "card_id": card_id,
+        "deck": "JobAcademy::Test",
+        "tags": ["test"],
+        "fire_weight": 0.5,
+        "notion_last_edited": "",
+        "prompt": f"Prompt for {card_id}",
+        "solution": f"Solution for {card_id}",
+    }
+    fields.update(overrides)
+    return Card(**fields)
+
+
+def write_card(cards_dir: Path, card: Card, name: str | None = None) -> Path:
+    path = cards_dir / (name or f"{card.card_id}.md")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(card_to_markdown(card), encoding="utf-8")
+    return path
+
+
+def bump_mtime(path: Path) -> None:
+    """Move ``path``'s mtime a second ahead so a re-stat sees the change."""
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def cards_dir(tmp_path, monkeypatch):
+    """A temp cards directory holding nb-1C-01, nb-2M-01 and nb-3P-01."""
+    cards = tmp_path / "cards"
+    monkeypatch.setattr(card_service, "CARDS_DIR", cards)
+    monkeypatch.setattr(card_service, "CARD_CACHE_FILE", None)
+    for cid in ("nb-1C-01", "nb-2M-01", "nb-3P-01"):
+        write_card(cards, make_card(cid))
+    return cards
@@ -2,10 +2,21 @@
 
 from pathlib import Path
 
+from unittest.mock import patch
+
+import pytest
+
+from app.parsers import card_parser
 from app.parsers.card_parser import card_to_markdown, parse_card_file, parse_card_id
 
 
 class TestParseCardId:
+    @pytest.fixture
+    def reload_maps(self):
+        """Leave the memo matching the restored maps even if a test fails."""
+        yield
+        card_parser.reload_card_id_maps()
+
     def test_standard_id(self):
         result = parse_card_id("nb-3M-01")
         assert result["pillar"] == "3-Algorithm"
@@ -41,6 +52,55 @@ class TestParseCardId:
         assert result["pillar"] is None
         assert result["knowledge_layer"] is None
 
+    def test_concept_layer_id(self):
+        result = parse_card_id("norm-V-01")
+        assert result["knowledge_layer"] == "Visual"
+        assert result["concept"] == "NORMAL"
+        assert result["topic"] == "probability-distributions"
+        assert result["pillar"] is None
+
+    def test_longest_concept_prefix_wins(self):
+        assert parse_card_id("prob-cat-M-01")["concept"] == "PROB_CAT"
+        assert parse_card_id("prob-cat-01")["concept"] == "PROB_CAT"
+        assert parse_card_id("prob-01")["concept"] == "PROB"
+
+    def test_special_prefix_on_concept(self):
+        result = parse_card_id("norm-EXT-02")
+        assert result["pillar"] == "EXT"
+        assert result["topic"] == "probability-distributions"
+
+    def test_unknown_special_prefix(self):
+        assert parse_card_id("nb-ZZ-01")["pillar"] is None
+
+    def test_results_are_independent_copies(self):
+        parse_card_id("nb-3M-01")["pillar"] = "mutated"
+        assert parse_card_id("nb-3M-01")["pillar"] == "3-Algorithm"
+
+    def test_new_concept_prefix_is_picked_up(self):
+        assert parse_card_id("expo-C-01")["concept"] is None
+        with patch.dict(card_parser.CONCEPT_PREFIX_MAP, {"expo": "EXPONENTIAL"}):
+            assert parse_card_id("expo-C-01")["concept"] == "EXPONENTIAL"
+        assert parse_card_id("expo-C-01")["concept"] is None
+
+    def test_edited_concept_is_picked_up_on_reload(self, reload_maps):
+        assert parse_card_id("norm-C-01")["concept"] == "NORMAL"
+        with patch.dict(card_parser.CONCEPT_PREFIX_MAP, {"norm": "GAUSSIAN"}):
+            card_parser.reload_card_id_maps()
+            assert parse_card_id("norm-C-01")["concept"] == "GAUSSIAN"
+        card_parser.reload_card_id_maps()
+        assert parse_card_id("norm-C-01")["concept"] == "NORMAL"
+
+    def test_swapped_topic_prefix_is_picked_up_on_reload(self, reload_maps):
+        assert parse_card_id("nb-3M-01")["topic"] == "naive-bayes"
+        with patch.dict(card_parser.TOPIC_MAP):
+            del card_parser.TOPIC_MAP["nb"]
+            card_parser.TOPIC_MAP["lr"] = "logistic-regression"
+            card_parser.reload_card_id_maps()
+            assert parse_card_id("nb-3M-01")["topic"] is None
+            assert parse_card_id("lr-3M-01")["topic"] == "logistic-regression"
+        card_parser.reload_card_id_maps()
+        assert parse_card_id("nb-3M-01")["topic"] == "naive-bayes"
+
 
 class TestParseCardFile:
     def test_parse_sample(self, sample_card_path):
@@ -84,3 +144,55 @@ class TestRoundtrip:
         assert card2.fire_weight == card.fire_weight
         assert card2.prompt == card.prompt
         assert card2.solution == card.solution
+
+
+class TestFrontmatter:
+    def _parse(self, tmp_path, frontmatter: str, body: str = "START\nQ\nEND\n\nSTART\nA\nEND\n"):
+        path = tmp_path / "nb-2C-01.md"
+        path.write_text(f"---\n{frontmatter}\n---\n\n{body}")
+        return parse_card_file(path)
+
+    def test_subtopic_supplies_topic_like_the_regex_parser(self, tmp_path):
+        # The previous parser's ``topic:`` search also matched ``subtopic:``
+        card = self._parse(tmp_path, 'card_id: "nb-2C-01"\nsubtopic: "variants"')
+        assert card.subtopic == "variants"
+        assert card.topic == "variants"
+
+    def test_first_topic_like_key_wins(self):
+        card = parse_card_file(Path(__file__).parent / "fixtures" / "nb-topic-subtopic.md")
+        assert card.subtopic == "variants"
+        assert card.topic == "variants"
+
+    def test_topic_before_subtopic_is_kept(self, tmp_path):
+        card = self._parse(tmp_path, 'card_id: "nb-2C-01"\ntopic: "bayes"\nsubtopic: "variants"')
+        assert (card.topic, card.subtopic) == ("bayes", "variants")
+
+    def test_concept_node_does_not_leak_into_concept(self, tmp_path):
+        card = self._parse(tmp_path, 'card_id: "nb-2C-01"\nconcept_node: "NB"')
+        assert card.concept_node == "NB"
+        assert card.concept is None
+
+    def test_defaults_when_fields_missing(self, tmp_path):
+        card = self._parse(tmp_path, "title: untitled")
+        assert card.card_id == "nb-2C-01"
+        assert card.deck == "JobAcademy"
+        assert card.tags == []
+        assert card.fire_weight == 0.5
+        assert card.has_visual is False
+
+    def test_unquoted_values_and_multiline_tags(self, tmp_path):
+        card = self._parse(
+            tmp_path,
+            "deck: JobAcademy::Data\ntags: [conceptual,\n  debug]\nfire_weight: 0.8\nhas_visual: True",
+        )
+        assert card.deck == "JobAcademy::Data"
+        assert card.tags == ["conceptual", "debug"]
+        assert card.cognitive_layer == "4 - Debug"
+        assert card.fire_weight == 0.8
+        assert card.has_visual is True
+
+    def test_only_first_two_blocks_are_used(self, tmp_path):
+        body = "START\nQ\nEND\n\nSTART\nA\nEND\n\nSTART\nextra\nEND\n"
+        card = self._parse(tmp_path, 'card_id: "nb-2C-01"', body)
+        assert card.prompt == "Q"
+        assert card.solution == "A"
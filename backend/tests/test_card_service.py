@@ -0,0 +1,747 @@
+"""Tests for card_service — index refresh, lookup and write-through."""
+
+import gc
+import shutil
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.parsers import card_parser
+from app.parsers.card_parser import parse_card_file
+from app.services import card_service
+from app.services.card_body_cache import BodyCache, body_size
+from app.services.card_cache import CardCache
+from app.services.card_facets import FacetIndex
+from app.services.card_index import CardIndex
+from app.services.card_store import CardStore
+from app.services.card_watcher import CardWatcher
+from tests.conftest import bump_mtime, make_card, write_card
+
+_PATCH_PARSE = "app.services.card_loader.parse_card_text"
+FIXTURES = Path(__file__).parent / "fixtures"
+BUNDLED_CARDS = Path(__file__).parents[1] / "data" / "cards"
+
+
+# ---------------------------------------------------------------------------
+# Incremental refresh
+# ---------------------------------------------------------------------------
+
+
+class TestCardIndexRefresh:
+    def test_lists_cards_in_path_order(self, cards_dir):
+        ids = [c.card_id for c in card_service.list_cards()]
+        assert ids == ["nb-1C-01", "nb-2M-01", "nb-3P-01"]
+
+    def test_unchanged_files_are_not_reparsed(self, cards_dir):
+        card_service.list_cards()
+        with patch(_PATCH_PARSE, wraps=card_parser.parse_card_text) as parse:
+            card_service.list_cards()
+        parse.assert_not_called()
+
+    def test_only_changed_file_is_reparsed(self, cards_dir):
+        card_service.list_cards()
+        path = write_card(cards_dir, make_card("nb-2M-01", prompt="Edited outside"))
+        bump_mtime(path)
+        with patch(_PATCH_PARSE, wraps=card_parser.parse_card_text) as parse:
+            cards = card_service.list_cards()
+        parse.assert_called_once()
+        assert parse.call_args.args[1] == path
+        assert cards[1].prompt == "Edited outside"
+
+    def test_deleted_file_is_dropped(self, cards_dir):
+        card_service.list_cards()
+        (cards_dir / "nb-1C-01.md").unlink()
+        ids = [c.card_id for c in card_service.list_cards()]
+        assert ids == ["nb-2M-01", "nb-3P-01"]
+
+    def test_skips_readme_and_hidden_files(self, cards_dir):
+        (cards_dir / "README.md").write_text("# Vault readme")
+        write_card(cards_dir, make_card("nb-9C-01"), name=".hidden.md")
+        assert len(card_service.list_cards()) == 3
+
+
+# ---------------------------------------------------------------------------
+# Write-through
+# ---------------------------------------------------------------------------
+
+
+class TestCardIndexWriteThrough:
+    def test_save_card_updates_index(self, cards_dir):
+        card_service.list_cards()
+        card_service.save_card(make_card("nb-4C-01"))
+        ids = [c.card_id for c in card_service.list_cards()]
+        assert "nb-4C-01" in ids
+
+    def test_delete_card_updates_index(self, cards_dir):
+        card_service.list_cards()
+        assert card_service.delete_card("nb-3P-01") is True
+        ids = [c.card_id for c in card_service.list_cards()]
+        assert "nb-3P-01" not in ids
+
+
+# ---------------------------------------------------------------------------
+# card_id lookup
+# ---------------------------------------------------------------------------
+
+
+class TestCardLookup:
+    def test_get_card_by_frontmatter_id(self, cards_dir):
+        write_card(cards_dir, make_card("nb-5C-01"), name="renamed-in-obsidian.md")
+        card = card_service.get_card("nb-5C-01")
+        assert card is not None
+        assert card.filename == "renamed-in-obsidian.md"
+
+    def test_hit_does_not_walk_the_tree(self, cards_dir):
+        card_service.get_card("nb-1C-01")
+        with patch.object(card_service._get_index(), "refresh") as refresh:
+            assert card_service.get_card("nb-2M-01") is not None
+        refresh.assert_not_called()
+
+    def test_miss_finds_file_created_outside_process(self, cards_dir):
+        assert card_service.get_card("nb-6I-01") is None
+        write_card(cards_dir, make_card("nb-6I-01"), name="nested/nb-6I-01.md")
+        assert card_service.get_card("nb-6I-01") is not None
+
+    def test_flat_file_wins_over_nested_duplicate(self, cards_dir):
+        write_card(cards_dir, make_card("nb-1C-01", prompt="nested copy"), name="nb/conceptual/nb-1C-01.md")
+        assert card_service.get_card("nb-1C-01").prompt == "Prompt for nb-1C-01"
+
+    def test_get_card_returns_private_copy(self, cards_dir):
+        card_service.get_card("nb-1C-01").prompt = "mutated"
+        assert card_service.get_card("nb-1C-01").prompt == "Prompt for nb-1C-01"
+
+    def test_card_exists(self, cards_dir):
+        assert card_service.card_exists("nb-2M-01") is True
+        assert card_service.card_exists("nb-9Z-99") is False
+
+    def test_delete_card_by_frontmatter_id(self, cards_dir):
+        path = write_card(cards_dir, make_card("nb-5C-02"), name="other-name.md")
+        assert card_service.delete_card("nb-5C-02") is True
+        assert not path.exists()
+        assert card_service.get_card("nb-5C-02") is None
+
+    def test_delete_missing_card(self, cards_dir):
+        assert card_service.delete_card("nb-9Z-99") is False
+
+
+# ---------------------------------------------------------------------------
+# Lazy bodies
+# ---------------------------------------------------------------------------
+
+
+class TestLazyBodies:
+    def test_index_keeps_headers_only(self, cards_dir):
+        header = card_service.list_headers()[0]
+        assert not hasattr(header, "prompt")
+        assert header.path == str(cards_dir / "nb-1C-01.md")
+
+    def test_headers_listing_reads_no_bodies(self, cards_dir):
+        card_service.list_headers()
+        with patch("app.services.card_index.parse_body_bytes") as parse_body:
+            card_service.list_headers()
+            card_service.card_exists("nb-2M-01")
+        parse_body.assert_not_called()
+
+    def test_body_is_cached_until_file_changes(self, cards_dir):
+        index = CardIndex(cards_dir)
+        index.refresh()
+        header = index.lookup("nb-1C-01")
+        assert index.body(header) == ("Prompt for nb-1C-01", "Solution for nb-1C-01")
+        assert index.body(header) == ("Prompt for nb-1C-01", "Solution for nb-1C-01")
+        assert index.bodies.hits == 1
+
+        path = write_card(cards_dir, make_card("nb-1C-01", prompt="Edited"))
+        bump_mtime(path)
+        assert index.body(index.lookup("nb-1C-01"))[0] == "Edited"
+
+    def test_body_read_refreshes_stale_header(self, cards_dir):
+        index = CardIndex(cards_dir)
+        index.refresh()
+        header = index.lookup("nb-1C-01")
+        write_card(cards_dir, make_card("nb-1C-01", prompt="Edited", tags=["new"]))
+        assert index.body(header)[0] == "Edited"
+        # Header and body come from the same read
+        assert index.lookup("nb-1C-01").tags == ("new",)
+
+    def test_body_cache_respects_byte_budget(self, cards_dir):
+        one = body_size(("Prompt for nb-1C-01", "Solution for nb-1C-01"))
+        index = CardIndex(cards_dir, bodies=BodyCache(one * 2))
+        index.refresh()
+        for header in index.headers():
+            index.body(header)
+        assert index.bodies.size <= one * 2
+        assert len(index.bodies._items) == 2
+
+    def test_headers_are_compact(self, cards_dir):
+        a, b = card_service.list_headers()[:2]
+        assert not hasattr(a, "__dict__")
+        assert a.tags == ("test",)
+        # Categorical strings parsed from different files share one object
+        assert a.deck is b.deck
+        assert a.tags[0] is b.tags[0]
+
+    def test_get_card_returns_full_card(self, cards_dir):
+        card = card_service.get_card("nb-3P-01")
+        assert card.solution == "Solution for nb-3P-01"
+        assert card.model_dump()["tags"] == ["test"]
+
+
+# ---------------------------------------------------------------------------
+# Persistent parse cache
+# ---------------------------------------------------------------------------
+
+
+class TestCardCache:
+    def _warm(self, cards_dir, cache_file):
+        index = CardIndex(cards_dir, cache=CardCache(cache_file))
+        index.refresh()
+        return index
+
+    def test_cold_start_reuses_cached_parse(self, cards_dir, tmp_path):
+        cache_file = tmp_path / "cache" / "cards.sqlite"
+        warm = self._warm(cards_dir, cache_file)
+        cold = CardIndex(cards_dir, cache=CardCache(cache_file))
+        with patch(_PATCH_PARSE, wraps=card_parser.parse_card_text) as parse:
+            cold.refresh()
+        parse.assert_not_called()
+        assert cold.headers() == warm.headers()
+
+    def test_touched_but_unchanged_file_is_not_reparsed(self, cards_dir, tmp_path):
+        cache_file = tmp_path / "cache" / "cards.sqlite"
+        self._warm(cards_dir, cache_file)
+        bump_mtime(cards_dir / "nb-1C-01.md")
+        cold = CardIndex(cards_dir, cache=CardCache(cache_file))
+        with patch(_PATCH_PARSE, wraps=card_parser.parse_card_text) as parse:
+            cold.refresh()
+        parse.assert_not_called()
+
+    def test_edited_file_is_reparsed(self, cards_dir, tmp_path):
+        cache_file = tmp_path / "cache" / "cards.sqlite"
+        self._warm(cards_dir, cache_file)
+        path = write_card(cards_dir, make_card("nb-1C-01", prompt="Edited while down"))
+        bump_mtime(path)
+        cold = CardIndex(cards_dir, cache=CardCache(cache_file))
+        cold.refresh()
+        assert cold.to_card(cold.lookup("nb-1C-01")).prompt == "Edited while down"
+
+    def test_files_deleted_while_down_are_pruned(self, cards_dir, tmp_path):
+        cache_file = tmp_path / "cache" / "cards.sqlite"
+        self._warm(cards_dir, cache_file)
+        (cards_dir / "nb-3P-01.md").unlink()
+        CardIndex(cards_dir, cache=CardCache(cache_file)).refresh()
+        assert "nb-3P-01.md" not in CardCache(cache_file).load(cards_dir)
+
+    def test_corrupt_cache_falls_back_to_parsing(self, cards_dir, tmp_path):
+        cache_file = tmp_path / "cards.sqlite"
+        cache_file.write_bytes(b"not a database" * 100)
+        index = CardIndex(cards_dir, cache=CardCache(cache_file))
+        index.refresh()
+        assert len(index.cards()) == 3
+
+
+# ---------------------------------------------------------------------------
+# Full-text search
+# ---------------------------------------------------------------------------
+
+
+def _search_ids(**filters) -> list[str]:
+    return [h.card_id for h in card_service.find_page(**filters)[0]]
+
+
+class TestCardSearch:
+    @pytest.fixture
+    def search_dir(self, cards_dir):
+        write_card(cards_dir, make_card("nb-2M-02", prompt="Gaussian likelihood for features"))
+        write_card(cards_dir, make_card("nb-1C-02", solution="Bayesian spam filters"))
+        return cards_dir
+
+    def test_matches_substrings(self, search_dir):
+        assert _search_ids(search="bayes") == ["nb-1C-02"]
+        assert _search_ids(search="GAUSS") == ["nb-2M-02"]
+        assert _search_ids(search="like") == ["nb-2M-02"]
+        assert _search_ids(search="ayes") == ["nb-1C-02"]
+        assert _search_ids(search="elihood") == ["nb-2M-02"]
+
+    def test_matches_query_as_one_phrase(self, search_dir):
+        assert _search_ids(search="bayesian spam") == ["nb-1C-02"]
+        assert _search_ids(search="ian spam filt") == ["nb-1C-02"]
+        assert _search_ids(search="spam bayesian") == []
+        assert _search_ids(search="spam gaussian") == []
+
+    def test_matches_card_id_parts(self, search_dir):
+        assert _search_ids(search="nb-2m") == ["nb-2M-01", "nb-2M-02"]
+
+    def test_combines_with_metadata_filters(self, search_dir):
+        assert _search_ids(search="solution", pillar="data") == ["nb-2M-01", "nb-2M-02"]
+
+    def test_punctuation_matches_literally(self, search_dir):
+        write_card(search_dir, make_card("nb-3P-02", prompt="Call f() with x = 2"))
+        assert _search_ids(search="()") == ["nb-3P-02"]
+        assert _search_ids(search="x = ") == ["nb-3P-02"]
+        assert _search_ids(search="F() W") == ["nb-3P-02"]
+        for query in ("--", "->", "==", "x=", "( )"):
+            assert _search_ids(search=query) == []
+
+    def test_empty_query_does_not_filter(self, search_dir):
+        assert len(_search_ids(search="")) == 5
+        assert len(_search_ids(search=" ")) == 5
+        assert _search_ids(search="  ") == []
+
+    def test_reflects_edits_and_deletes(self, search_dir):
+        _search_ids(search="x")
+        path = write_card(search_dir, make_card("nb-3P-01", prompt="Laplace smoothing"))
+        bump_mtime(path)
+        assert _search_ids(search="laplace") == ["nb-3P-01"]
+        assert _search_ids(search="prompt") == ["nb-1C-01", "nb-1C-02", "nb-2M-01"]
+        card_service.delete_card("nb-3P-01")
+        assert _search_ids(search="laplace") == []
+
+    def test_search_terms_survive_parse_cache(self, search_dir, tmp_path):
+        cache_file = tmp_path / "cache" / "cards.sqlite"
+        CardIndex(search_dir, cache=CardCache(cache_file)).refresh()
+        cold = CardIndex(search_dir, cache=CardCache(cache_file))
+        with patch(_PATCH_PARSE, wraps=card_parser.parse_card_text) as parse:
+            cold.refresh()
+        parse.assert_not_called()
+        assert [h.card_id for h in cold.select("gaussian")] == ["nb-2M-02"]
+
+    def test_search_loads_only_matching_bodies(self, search_dir):
+        card_service.list_headers()
+        with patch("app.services.card_index.parse_body_bytes", return_value=("", "")) as parse_body:
+            card_service.card_dicts(card_service.find_page(search="spam")[0])
+        assert parse_body.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# Metadata filters (per-value sets)
+# ---------------------------------------------------------------------------
+
+
+def _select_ids(**filters) -> list[str]:
+    return [h.card_id for h in card_service.select_headers(**filters)]
+
+
+class TestMetadataFilters:
+    @pytest.fixture
+    def facet_dir(self, cards_dir):
+        write_card(cards_dir, make_card("nb-2M-02", topic="Naive-Bayes", concept_node="NB",
+                                     subtopic="smoothing", tags=["Debug", "nb"]))
+        write_card(cards_dir, make_card("nb-1C-02", deck="JobAcademy::Other", concept_node=" nb ",
+                                     tags=["nb"]))
+        return cards_dir
+
+    def test_values_are_normalized_at_index_time(self, facet_dir):
+        assert len(_select_ids(topic="NAIVE-BAYES")) == 5
+        assert _select_ids(concept="Nb") == ["nb-1C-02", "nb-2M-02"]
+        assert _select_ids(tag="DEBUG") == ["nb-2M-02"]
+        assert _select_ids(deck="jobacademy::other") == ["nb-1C-02"]
+
+    def test_combined_filters_intersect(self, facet_dir):
+        assert _select_ids(tag="nb", pillar="use") == ["nb-1C-02"]
+        assert _select_ids(tag="nb", subtopic="Smoothing", layer="math") == ["nb-2M-02"]
+        assert _select_ids(tag="nb", deck="jobacademy::test", pillar="use") == []
+
+    def test_empty_value_selects_unset_field(self, facet_dir):
+        assert _select_ids(concept="") == ["nb-1C-01", "nb-2M-01", "nb-3P-01"]
+        assert _select_ids() == [
+            "nb-1C-01", "nb-1C-02", "nb-2M-01", "nb-2M-02", "nb-3P-01",
+        ]
+
+    def test_sets_follow_edits_and_deletes(self, facet_dir):
+        card_service.select_headers()
+        path = write_card(facet_dir, make_card("nb-2M-02", concept_node="gaussian"))
+        bump_mtime(path)
+        assert _select_ids(concept="nb") == ["nb-1C-02"]
+        assert _select_ids(concept="gaussian") == ["nb-2M-02"]
+        card_service.delete_card("nb-1C-02")
+        assert _select_ids(concept="nb") == []
+        assert _select_ids(deck="jobacademy::other") == []
+
+
+# ---------------------------------------------------------------------------
+# Resident memory
+# ---------------------------------------------------------------------------
+
+
+def _held() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+class TestResidentMemory:
+    _WORDS = (
+        "bayes prior posterior likelihood evidence smoothing laplace gaussian "
+        "multinomial variance token vocabulary spam classifier"
+    ).split()
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        paths = []
+        for i in range(500):
+            words = [self._WORDS[(i * 5 + k * 3) % len(self._WORDS)] for k in range(60)]
+            card = make_card(
+                f"nb-{i % 6 + 1}C-{i:04d}",
+                prompt=" ".join(words[:20]) + "?",
+                solution=" ".join(words),
+                tags=["test", f"t{i % 7}"],
+            )
+            paths.append(write_card(tmp_path, card))
+        # Parsed card ids are memoized; warm the memo so neither side below
+        # is charged for it
+        for path in paths:
+            parse_card_file(path)
+        return paths
+
+    def test_whole_index_is_smaller_than_a_card_list(self, corpus, tmp_path):
+        tracemalloc.start()
+        try:
+            before = _held()
+            cards = [parse_card_file(p) for p in corpus]
+            card_list = _held() - before
+            del cards
+            before = _held()
+            index = CardIndex(tmp_path)
+            index.refresh()
+            index.headers()
+            total = _held() - before
+            index.facets = FacetIndex()
+            facets = total - (_held() - before)
+        finally:
+            tracemalloc.stop()
+        # Facet sets grow with the distinct values, not with cards x fields
+        assert facets / len(corpus) < 600
+        assert total < card_list
+
+    def test_emptied_values_leave_the_facets(self, corpus, tmp_path):
+        index = CardIndex(tmp_path)
+        index.refresh()
+        for path in corpus:
+            if "-1C-" in path.name:
+                path.unlink()
+        index.refresh()
+        assert "1-use case" not in index.facets.values("pillar")
+        assert len(index.facets) == len(index.headers())
+
+
+# ---------------------------------------------------------------------------
+# Fuzzy search
+# ---------------------------------------------------------------------------
+
+
+class TestFuzzySearch:
+    @pytest.fixture
+    def fuzzy_dir(self, cards_dir):
+        write_card(cards_dir, make_card("nb-2M-02", prompt="Bayes rule for the posterior"))
+        write_card(cards_dir, make_card("nb-2M-03", prompt="Poisson counts", subtopic="event-models"))
+        return cards_dir
+
+    def test_typos_need_fuzzy(self, fuzzy_dir):
+        assert _search_ids(search="bayse") == []
+        assert _search_ids(search="bayse", fuzzy=True) == ["nb-2M-02"]
+        assert _search_ids(search="poison", fuzzy=True) == ["nb-2M-03"]
+
+    def test_unrelated_words_stay_below_threshold(self, fuzzy_dir):
+        assert _search_ids(search="gradient", fuzzy=True) == []
+
+    def test_fuzzy_keeps_prefix_matches(self, fuzzy_dir):
+        assert _search_ids(search="poster", fuzzy=True) == ["nb-2M-02"]
+
+    def test_tokens_with_digits_are_not_fuzzy(self, fuzzy_dir):
+        write_card(fuzzy_dir, make_card("nb-2M-04", prompt="Exercise 20461"))
+        assert _search_ids(search="20462", fuzzy=True) == []
+        assert _search_ids(search="2046", fuzzy=True) == ["nb-2M-04"]
+
+    def test_concept_keywords_only_feed_fuzzy_search(self, fuzzy_dir):
+        assert _search_ids(search="event model") == []
+        assert card_service.rank_cards("event", 5) == []
+        assert _search_ids(search="event model", fuzzy=True) == ["nb-2M-03"]
+        assert _search_ids(search="modelz", fuzzy=True) == ["nb-2M-03"]
+        assert [c.card_id for c, _ in card_service.rank_cards("event", 5, fuzzy=True)] == ["nb-2M-03"]
+
+    def test_vocabulary_follows_edits(self, fuzzy_dir):
+        _search_ids(search="x")
+        path = write_card(fuzzy_dir, make_card("nb-2M-03", prompt="Binomial counts"))
+        bump_mtime(path)
+        assert _search_ids(search="poison", fuzzy=True) == []
+        assert _search_ids(search="binomail", fuzzy=True) == ["nb-2M-03"]
+        assert _search_ids(search="event", fuzzy=True) == []
+
+    def test_ranked_fuzzy_search(self, fuzzy_dir):
+        ranked = card_service.rank_cards("bayse", 5, fuzzy=True)
+        assert [c.card_id for c, _ in ranked] == ["nb-2M-02"]
+
+
+# ---------------------------------------------------------------------------
+# BM25 ranking
+# ---------------------------------------------------------------------------
+
+
+class TestRankedSearch:
+    @pytest.fixture
+    def rank_dir(self, cards_dir):
+        write_card(cards_dir, make_card("nb-2M-02", prompt="naive bayes naive bayes naive bayes"))
+        write_card(cards_dir, make_card("nb-2M-03", prompt="naive bayes", solution="gaussian"))
+        write_card(cards_dir, make_card("nb-1C-02", prompt="a naive approach"))
+        return cards_dir
+
+    def _ranked(self, search, limit=10, **filters):
+        return [(c.card_id, s) for c, s in card_service.rank_cards(search, limit, **filters)]
+
+    def test_orders_by_term_frequency(self, rank_dir):
+        ranked = self._ranked("bayes")
+        assert [cid for cid, _ in ranked] == ["nb-2M-02", "nb-2M-03"]
+        assert ranked[0][1] > ranked[1][1] > 0
+
+    def test_rare_terms_weigh_more(self, rank_dir):
+        assert dict(self._ranked("gaussian"))["nb-2M-03"] > dict(self._ranked("naive"))["nb-2M-03"]
+        assert self._ranked("naive")[0][0] == "nb-2M-02"
+
+    def test_ranks_phrases(self, rank_dir):
+        assert [cid for cid, _ in self._ranked("naive bayes")] == ["nb-2M-02", "nb-2M-03"]
+        assert [cid for cid, _ in self._ranked("bayes naive")] == ["nb-2M-02"]
+
+    def test_matches_same_cards_as_unranked_search(self, rank_dir):
+        for query in ("naive", "ayes", "ve ba", "nai bay", "nb-2m", "prompt"):
+            ranked = {cid for cid, _ in self._ranked(query, limit=100)}
+            assert ranked == set(_search_ids(search=query))
+
+    def test_limit_applies_after_filters(self, rank_dir):
+        assert [cid for cid, _ in self._ranked("naive", limit=1, pillar="use")] == ["nb-1C-02"]
+        assert len(self._ranked("prompt", limit=2)) == 2
+
+    def test_ties_keep_path_order(self, cards_dir):
+        ranked = self._ranked("prompt")
+        assert [cid for cid, _ in ranked] == ["nb-1C-01", "nb-2M-01", "nb-3P-01"]
+        assert len({s for _, s in ranked}) == 1
+
+    def test_scores_follow_edits(self, rank_dir):
+        before = dict(self._ranked("gaussian"))
+        path = write_card(rank_dir, make_card("nb-2M-03", prompt="gaussian gaussian gaussian"))
+        bump_mtime(path)
+        assert dict(self._ranked("gaussian"))["nb-2M-03"] > before["nb-2M-03"]
+
+
+# ---------------------------------------------------------------------------
+# SQLite card store
+# ---------------------------------------------------------------------------
+
+_FILTERS = [
+    {},
+    {"pillar": "data"},
+    {"pillar": "ALGO", "layer": "prog"},
+    {"layer": "conceptual"},
+    {"topic": "Naive-Bayes"},
+    {"topic": " naive-bayes "},
+    {"concept": " nb "},
+    {"search": "gaussian"},
+    {"search": "NB-2m"},
+    {"search": "ol"},
+    {"search": "()"},
+    {"search": "gaus LIKELI"},
+    {"search": "spam nb"},
+    {"search": "nb", "concept": "nb"},
+    {"pillar": "1-use", "search": "solution"},
+    {"pillar": "nope"},
+]
+
+
+# Tokenizer edge cases: apostrophes, digits inside words, underscores,
+# non-ASCII letters
+_PARITY_CARDS = [
+    make_card("nb-2M-05", prompt="Bayes' rule: don't drop P(B)", solution="An L2 norm, l2norm and 3rd-order terms"),
+    make_card("nb-2M-06", prompt="x2 = log_prob(x) for the naïve model", solution="Ελληνικά and façade; 2x faster"),
+]
+
+_PARITY_FILTERS = _FILTERS + [
+    {"search": search}
+    for search in (
+        "bayes", "bayes'", "don't", "don", "t", "l2", "l2norm", "3rd", "3", "x2", "2x",
+        "log_prob", "prob", "naïve", "NAÏVE", "ελλ", "façade", "p(b)", "nb-2M-05",
+    )
+] + [{"topic": "naive-bayes", "search": "prior"}, {"concept": "cond", "search": "probability"}]
+
+
+class TestCardStore:
+    @pytest.fixture
+    def fixture_cards(self, tmp_path):
+        cards = tmp_path / "cards"
+        cards.mkdir()
+        for source in [*FIXTURES.glob("nb-*.md"), *BUNDLED_CARDS.glob("*.md")]:
+            shutil.copy(source, cards / source.name)
+        for card in _PARITY_CARDS:
+            write_card(cards, card)
+        index = CardIndex(cards, store=CardStore(tmp_path / "store.sqlite"))
+        index.refresh()
+        return index
+
+    @pytest.mark.parametrize("filters", _PARITY_FILTERS)
+    def test_store_query_matches_memory_on_fixtures(self, fixture_cards, filters):
+        rels = fixture_cards.store.query(**filters)
+        assert rels is not None
+        from_store = {fixture_cards.root / rel for rel in rels}
+        ordinals = fixture_cards.matches(**filters)
+        in_memory = {Path(h.path) for h in fixture_cards.page(ordinals)[0]}
+        assert from_store == in_memory
+
+    @pytest.fixture
+    def store_dir(self, cards_dir, tmp_path_factory, monkeypatch):
+        write_card(cards_dir, make_card("nb-2M-02", prompt="Gaussian likelihood", concept_node="NB"))
+        write_card(cards_dir, make_card("nb-1C-02", solution="Spam filters", concept_node="nb"))
+        store_file = tmp_path_factory.mktemp("store") / "cards.sqlite"
+        monkeypatch.setattr(card_service, "CARD_STORE", "sqlite")
+        monkeypatch.setattr(card_service, "CARD_STORE_FILE", store_file)
+        return cards_dir
+
+    @pytest.mark.parametrize("filters", _FILTERS)
+    def test_matches_in_memory_filters(self, store_dir, filters):
+        card_service.find_page()
+        index = card_service._get_index()
+        from_store = index.find_ordinals(**filters)
+        assert from_store is not None
+        assert index.page(from_store)[0] == index.page(index.matches(**filters))[0]
+
+    def test_only_changed_rows_are_rewritten(self, store_dir):
+        card_service.find_page()
+        index = card_service._get_index()
+        path = write_card(store_dir, make_card("nb-3P-01", solution="Now mentions gaussian"))
+        bump_mtime(path)
+        with patch.object(index.store, "apply", wraps=index.store.apply) as apply:
+            ids = _search_ids(search="gaussian")
+        assert list(apply.call_args.args[1]) == ["nb-3P-01.md"]
+        assert ids == ["nb-2M-02", "nb-3P-01"]
+
+    def test_store_keeps_one_connection(self, store_dir):
+        card_service.find_page()
+        store = card_service._get_index().store
+        with patch("app.services.card_store.sqlite3.connect") as connect:
+            assert store.query(search="gaussian") == ["nb-2M-02.md"]
+            assert store.query(topic="naive-bayes") is not None
+        connect.assert_not_called()
+
+    def test_deleted_card_leaves_store(self, store_dir):
+        card_service.find_page()
+        assert card_service.delete_card("nb-2M-02") is True
+        assert _search_ids(search="gaussian") == []
+
+    def test_restart_reconciles_by_hash(self, store_dir):
+        card_service.find_page()
+        store_file = card_service.CARD_STORE_FILE
+        (store_dir / "nb-3P-01.md").unlink()
+        write_card(store_dir, make_card("nb-1C-01", prompt="edited while down"))
+        cold = CardIndex(store_dir, store=CardStore(store_file))
+        with patch.object(cold.store, "apply", wraps=cold.store.apply) as apply:
+            cold.refresh()
+        upserts, removed = apply.call_args.args[1:]
+        assert list(upserts) == ["nb-1C-01.md"]
+        assert removed == {"nb-3P-01.md"}
+        assert [h.card_id for h in cold.page(cold.find_ordinals(search="edited while"))[0]] == ["nb-1C-01"]
+
+    def test_fuzzy_search_bypasses_store(self, store_dir):
+        assert _search_ids(search="gausian", fuzzy=True) == ["nb-2M-02"]
+
+    def test_tag_query_bypasses_store(self, store_dir):
+        assert len(_search_ids(tags="test")) == 5
+        assert _search_ids(tags="NOT test") == []
+
+    def test_broken_store_falls_back_to_memory(self, store_dir):
+        card_service.CARD_STORE_FILE.write_bytes(b"not a database" * 100)
+        ids = _search_ids(pillar="data")
+        assert ids == ["nb-2M-01", "nb-2M-02"]
+        assert card_service._get_index().store.available is False
+
+
+# ---------------------------------------------------------------------------
+# Background watcher
+# ---------------------------------------------------------------------------
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+_BACKENDS = ["poll"] + (["inotify"] if sys.platform.startswith("linux") else [])
+
+
+class TestCardWatcher:
+    @pytest.fixture(params=_BACKENDS)
+    def watcher(self, request, cards_dir):
+        watcher = CardWatcher(
+            CardIndex(cards_dir), backend=request.param, debounce=0.05, interval=0.05
+        )
+        watcher.start()
+        yield watcher
+        watcher.stop()
+
+    def test_picks_up_new_file(self, watcher, cards_dir):
+        write_card(cards_dir, make_card("nb-6I-02"), name="new/nb-6I-02.md")
+        assert _wait_for(lambda: watcher.index.lookup("nb-6I-02") is not None)
+
+    def test_evicts_deleted_file(self, watcher, cards_dir):
+        (cards_dir / "nb-2M-01.md").unlink()
+        assert _wait_for(lambda: watcher.index.lookup("nb-2M-01") is None)
+
+    def test_store_version_changes_on_edit(self, watcher, cards_dir):
+        before = watcher.index.generation
+        path = write_card(cards_dir, make_card("nb-1C-01", prompt="Synced from Notion"))
+        bump_mtime(path)
+        assert _wait_for(lambda: watcher.index.generation != before)
+        index = watcher.index
+        assert index.to_card(index.lookup("nb-1C-01")).prompt == "Synced from Notion"
+
+    def test_watched_index_skips_tree_walk(self, watcher):
+        with patch.object(watcher.index, "refresh") as refresh:
+            assert watcher.index.lookup("nb-9Z-99") is None
+        refresh.assert_not_called()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify only")
+    def test_inotify_debounces_bursts(self, cards_dir):
+        watcher = CardWatcher(CardIndex(cards_dir), backend="inotify", debounce=0.2)
+        watcher.start()
+        try:
+            with patch.object(watcher.index, "update_paths", wraps=watcher.index.update_paths) as update:
+                for i in range(50):
+                    write_card(cards_dir, make_card(f"nb-5P-{i:02d}"))
+                assert _wait_for(lambda: watcher.index.lookup("nb-5P-49") is not None)
+            assert update.call_count == 1
+            assert len(update.call_args.args[0]) == 50
+        finally:
+            watcher.stop()
+
+
+# ---------------------------------------------------------------------------
+# Parallel cold load
+# ---------------------------------------------------------------------------
+
+
+class TestParallelLoad:
+    @pytest.fixture
+    def big_dir(self, tmp_path):
+        for i in range(40):
+            write_card(tmp_path, make_card(f"nb-{i % 6 + 1}C-{i:02d}"), name=f"d{i % 4}/nb-{i:02d}.md")
+        (tmp_path / "d0" / "broken.md").write_text("no frontmatter")
+        return tmp_path
+
+    @pytest.mark.parametrize("processes", [0, 2])
+    def test_parallel_matches_serial(self, big_dir, processes):
+        serial = CardIndex(big_dir)
+        serial.refresh()
+        parallel = CardIndex(big_dir, workers=4, chunk_size=8, processes=processes)
+        parallel.refresh()
+        assert parallel.cards() == serial.cards()
+        assert len(parallel.cards()) == 40
+
+    def test_headers_from_parser_processes_are_interned(self, big_dir):
+        index = CardIndex(big_dir, workers=4, chunk_size=8, processes=2)
+        index.refresh()
+        headers = index.headers()
+        assert all(h.deck is headers[0].deck for h in headers)
+        assert all(h.tags[0] is headers[0].tags[0] for h in headers)
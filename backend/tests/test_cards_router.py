@@ -0,0 +1,271 @@
+"""Tests for the /api/cards list endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.card import Card
+from app.services import card_service
+from tests.conftest import make_card, write_card
+
+client = TestClient(app)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def cards_dir(cards_dir):
+    """The shared three cards, with distinct prompts and tags to search on."""
+    for card_id, prompt, tags in (
+        ("nb-1C-01", "naive bayes", ["conceptual", "explain"]),
+        ("nb-2M-01", "bayes bayes bayes", ["math", "derive"]),
+        ("nb-3P-01", "gaussian", ["programming", "debug"]),
+    ):
+        write_card(cards_dir, make_card(card_id, prompt=prompt, solution="", tags=tags))
+    return cards_dir
+
+
+# ---------------------------------------------------------------------------
+# Ranked search
+# ---------------------------------------------------------------------------
+
+class TestRankedSearch:
+    def test_bm25_returns_scored_top_k(self, cards_dir):
+        resp = client.get("/api/cards", params={"search": "bayes", "rank": "bm25", "limit": 1})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert [c["card_id"] for c in body] == ["nb-2M-01"]
+        assert body[0]["score"] > 0
+        assert body[0]["prompt"] == "bayes bayes bayes"
+
+    def test_unranked_keeps_file_order_without_scores(self, cards_dir):
+        body = client.get("/api/cards", params={"search": "bayes"}).json()
+        assert [c["card_id"] for c in body] == ["nb-1C-01", "nb-2M-01"]
+        assert "score" not in body[0]
+
+    def test_punctuation_only_search_returns_nothing(self, cards_dir):
+        assert client.get("/api/cards", params={"search": "()"}).json() == []
+
+    def test_fuzzy_ranked_search(self, cards_dir):
+        resp = client.get("/api/cards", params={"search": "gausian", "fuzzy": "true", "rank": "bm25"})
+        assert [c["card_id"] for c in resp.json()] == ["nb-3P-01"]
+
+    def test_rank_requires_search(self, cards_dir):
+        assert client.get("/api/cards", params={"rank": "bm25"}).status_code == 400
+
+    def test_unknown_rank_mode_is_rejected(self, cards_dir):
+        resp = client.get("/api/cards", params={"search": "bayes", "rank": "tfidf"})
+        assert resp.status_code == 422
+
+
+# ---------------------------------------------------------------------------
+# Tag queries
+# ---------------------------------------------------------------------------
+
+class TestTagQuery:
+    def _ids(self, **params) -> list[str]:
+        resp = client.get("/api/cards", params=params)
+        assert resp.status_code == 200
+        return [c["card_id"] for c in resp.json()]
+
+    def test_boolean_tag_query(self, cards_dir):
+        assert self._ids(tags="Explain OR debug") == ["nb-1C-01", "nb-3P-01"]
+        assert self._ids(tags="NOT (math OR debug)") == ["nb-1C-01"]
+
+    def test_combines_with_search_and_ranking(self, cards_dir):
+        assert self._ids(tags="NOT explain", search="bayes") == ["nb-2M-01"]
+        assert self._ids(tags="explain", search="bayes", rank="bm25") == ["nb-1C-01"]
+
+    def test_malformed_query_is_rejected(self, cards_dir):
+        resp = client.get("/api/cards", params={"tags": "debug AND (math"})
+        assert resp.status_code == 400
+        assert "tags" in resp.json()["detail"]
+
+
+# ---------------------------------------------------------------------------
+# Pagination, sorting and projection
+# ---------------------------------------------------------------------------
+
+class TestPaging:
+    @pytest.fixture
+    def paged_dir(self, cards_dir):
+        for i, weight in enumerate((0.9, 0.1, 0.5, 0.1, 0.7)):
+            write_card(cards_dir, make_card(f"lr-{i + 1}C-01", prompt=f"logistic {i}", fire_weight=weight))
+        return cards_dir
+
+    def _pages(self, **params) -> list[list[str]]:
+        pages, cursor = [], None
+        while True:
+            resp = client.get("/api/cards", params={**params, **({"cursor": cursor} if cursor else {})})
+            assert resp.status_code == 200
+            pages.append([c["card_id"] for c in resp.json()])
+            cursor = resp.headers.get("x-next-cursor")
+            if cursor is None:
+                return pages
+
+    def test_cursor_walks_every_card_once(self, paged_dir):
+        pages = self._pages(limit=3)
+        assert [len(p) for p in pages] == [3, 3, 2]
+        everything = client.get("/api/cards").json()
+        assert sum(pages, []) == [c["card_id"] for c in everything]
+
+    def test_sort_by_fire_weight_breaks_ties_by_path(self, paged_dir):
+        pages = self._pages(sort="fire_weight", limit=2, search="logistic")
+        assert sum(pages, []) == ["lr-2C-01", "lr-4C-01", "lr-3C-01", "lr-5C-01", "lr-1C-01"]
+        pages = self._pages(sort="fire_weight", order="desc", limit=2, search="logistic")
+        assert sum(pages, []) == ["lr-1C-01", "lr-5C-01", "lr-3C-01", "lr-2C-01", "lr-4C-01"]
+
+    def test_desc_ties_keep_path_order_across_pages(self, paged_dir):
+        # lr-2C-01 and lr-4C-01 tie at 0.1 and straddle the page boundary
+        pages = self._pages(sort="fire_weight", order="desc", limit=4, search="logistic")
+        assert pages == [["lr-1C-01", "lr-5C-01", "lr-3C-01", "lr-2C-01"], ["lr-4C-01"]]
+        # Unfiltered, the fixture cards also tie with lr-3C-01 at 0.5
+        pages = self._pages(sort="fire_weight", order="desc", limit=3)
+        assert pages == [
+            ["lr-1C-01", "lr-5C-01", "lr-3C-01"],
+            ["nb-1C-01", "nb-2M-01", "nb-3P-01"],
+            ["lr-2C-01", "lr-4C-01"],
+        ]
+
+    def test_path_order_follows_the_direction(self, paged_dir):
+        ascending = sum(self._pages(limit=3), [])
+        assert sum(self._pages(order="desc", limit=3), []) == ascending[::-1]
+
+    def test_cursor_survives_deleting_its_card(self, paged_dir):
+        resp = client.get("/api/cards", params={"sort": "card_id", "limit": 2})
+        assert [c["card_id"] for c in resp.json()] == ["lr-1C-01", "lr-2C-01"]
+        card_service.delete_card("lr-2C-01")
+        resp = client.get(
+            "/api/cards",
+            params={"sort": "card_id", "limit": 2, "cursor": resp.headers["x-next-cursor"]},
+        )
+        assert [c["card_id"] for c in resp.json()] == ["lr-3C-01", "lr-4C-01"]
+
+    def test_fields_projection_skips_bodies(self, paged_dir):
+        from unittest.mock import patch
+
+        with patch("app.services.card_index.parse_body_bytes") as parse_body:
+            body = client.get("/api/cards", params={"fields": "topic,fire_weight", "limit": 1}).json()
+        parse_body.assert_not_called()
+        assert body == [{"card_id": "lr-1C-01", "topic": None, "fire_weight": 0.9}]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"fields": "prompt,nope"},
+            {"cursor": "not-a-cursor"},
+            {"sort": "bogus"},
+            {"search": "bayes", "rank": "bm25", "sort": "card_id"},
+        ],
+    )
+    def test_bad_parameters_are_rejected(self, paged_dir, params):
+        assert client.get("/api/cards", params=params).status_code in (400, 422)
+
+    def test_cursor_is_tied_to_its_ordering(self, paged_dir):
+        cursor = client.get("/api/cards", params={"limit": 1}).headers["x-next-cursor"]
+        resp = client.get("/api/cards", params={"limit": 1, "sort": "topic", "cursor": cursor})
+        assert resp.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# NDJSON export
+# ---------------------------------------------------------------------------
+
+class TestExport:
+    def test_streams_one_card_per_line(self, cards_dir):
+        import json
+
+        resp = client.get("/api/cards/export", params={"format": "ndjson"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = resp.text.splitlines()
+        cards = [json.loads(line) for line in lines]
+        assert [c["card_id"] for c in cards] == ["nb-1C-01", "nb-2M-01", "nb-3P-01"]
+        assert cards[1]["prompt"] == "bayes bayes bayes"
+        assert Card(**cards[0]).tags == ["conceptual", "explain"]
+
+    def test_accepts_list_filters_and_fields(self, cards_dir):
+        resp = client.get(
+            "/api/cards/export", params={"search": "bayes", "tags": "NOT math", "fields": "tags"}
+        )
+        assert resp.text == '{"card_id": "nb-1C-01", "tags": ["conceptual", "explain"]}\n'
+
+    def test_export_does_not_fill_body_cache(self, cards_dir):
+        client.get("/api/cards/export")
+        assert card_service._get_index().bodies.size == 0
+
+    def test_rejects_unknown_format_and_bad_tags(self, cards_dir):
+        assert client.get("/api/cards/export", params={"format": "csv"}).status_code == 422
+        assert client.get("/api/cards/export", params={"tags": "(a"}).status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# Updates and bulk operations
+# ---------------------------------------------------------------------------
+
+class TestUpdate:
+    def test_put_rewrites_the_existing_file(self, cards_dir):
+        count = len(client.get("/api/cards").json())
+        resp = client.put("/api/cards/nb-1C-01", json={"prompt": "edited"})
+        assert resp.status_code == 200
+        assert len(client.get("/api/cards").json()) == count
+        assert client.get("/api/cards/nb-1C-01").json()["prompt"] == "edited"
+        assert sorted(p.name for p in cards_dir.rglob("*.md")) == [
+            "nb-1C-01.md", "nb-2M-01.md", "nb-3P-01.md",
+        ]
+
+
+class TestBulk:
+    def _bulk(self, operations):
+        resp = client.post("/api/cards/bulk", json=operations)
+        assert resp.status_code == 200
+        return resp.json()
+
+    def test_mixed_operations_report_per_item(self, cards_dir):
+        results = self._bulk([
+            {"op": "create", "card_id": "nb-4E-01", "deck": "D", "tags": ["new"],
+             "prompt": "p", "solution": "s"},
+            {"op": "create", "card_id": "nb-1C-01", "deck": "D", "tags": [], "prompt": "", "solution": ""},
+            {"op": "update", "card_id": "nb-2M-01", "fire_weight": 0.9, "tags": ["retagged"]},
+            {"op": "update", "card_id": "nb-9X-99", "deck": "D"},
+            {"op": "delete", "card_id": "nb-3P-01"},
+        ])
+        assert [(r["index"], r["status"]) for r in results] == [
+            (0, 201), (1, 409), (2, 200), (3, 404), (4, 204),
+        ]
+        assert results[1]["error"] and results[0]["error"] is None
+        assert client.get("/api/cards/nb-4E-01").json()["prompt"] == "p"
+        updated = client.get("/api/cards/nb-2M-01").json()
+        assert (updated["fire_weight"], updated["tags"]) == (0.9, ["retagged"])
+        assert updated["prompt"] == "bayes bayes bayes"
+        assert client.get("/api/cards/nb-3P-01").status_code == 404
+
+    def test_later_operations_see_earlier_ones(self, cards_dir):
+        results = self._bulk([
+            {"op": "create", "card_id": "nb-4E-01", "deck": "D", "tags": [], "prompt": "a", "solution": ""},
+            {"op": "update", "card_id": "nb-4E-01", "prompt": "b"},
+            {"op": "delete", "card_id": "nb-1C-01"},
+            {"op": "delete", "card_id": "nb-1C-01"},
+        ])
+        assert [r["status"] for r in results] == [201, 200, 204, 404]
+        assert client.get("/api/cards/nb-4E-01").json()["prompt"] == "b"
+
+    def test_index_is_updated_once_and_no_temp_files_remain(self, cards_dir):
+        from unittest.mock import patch
+
+        client.get("/api/cards")
+        index = card_service._get_index()
+        ops = [{"op": "update", "card_id": cid, "deck": "Bulk"} for cid in ("nb-1C-01", "nb-2M-01", "nb-3P-01")]
+        with patch.object(index, "update_paths", wraps=index.update_paths) as update:
+            self._bulk(ops)
+        update.assert_called_once()
+        assert {c["deck"] for c in client.get("/api/cards").json()} == {"Bulk"}
+        assert sorted(p.name for p in cards_dir.iterdir()) == [
+            "nb-1C-01.md", "nb-2M-01.md", "nb-3P-01.md",
+        ]
+
+    def test_unknown_op_is_rejected(self, cards_dir):
+        resp = client.post("/api/cards/bulk", json=[{"op": "rename", "card_id": "nb-1C-01"}])
+        assert resp.status_code == 422
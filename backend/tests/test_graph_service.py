@@ -3,9 +3,12 @@
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 from app.models.card import Card
 from app.models.graph import GraphEdge, GraphNode, KnowledgeGraph
 from app.parsers.card_parser import card_to_markdown, parse_card_file
+from app.services import card_service
 from app.services.graph_service import (
     get_concept_subtopics,
     get_node_cards,
@@ -15,10 +18,6 @@ from app.services.graph_service import (
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
-# Patch target: list_cards is imported lazily inside service functions,
-# so we patch the source module, not graph_service itself.
-_PATCH_LIST_CARDS = "app.services.card_service.list_cards"
-
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -68,8 +67,18 @@ SAMPLE_GRAPH = KnowledgeGraph(
 )
 
 
-def _mock_list_cards():
-    return SAMPLE_CARDS
+@pytest.fixture
+def sample_vault(tmp_path, monkeypatch):
+    """Point the card store at a temp vault holding SAMPLE_CARDS.
+
+    graph_service reads card headers from the index and only loads bodies
+    for the cards it returns, so the sample goes through real files.
+    """
+    monkeypatch.setattr(card_service, "CARDS_DIR", tmp_path)
+    monkeypatch.setattr(card_service, "CARD_CACHE_FILE", None)
+    for card in SAMPLE_CARDS:
+        (tmp_path / f"{card.card_id}.md").write_text(card_to_markdown(card), encoding="utf-8")
+    return tmp_path
 
 
 # ---------------------------------------------------------------------------
@@ -125,9 +134,9 @@ class TestConceptNodeParsing:
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.usefixtures("sample_vault")
 class TestGetNodeCards:
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_nb_returns_only_nb_tagged_cards(self, _mock):
+    def test_nb_returns_only_nb_tagged_cards(self):
         cards = get_node_cards("NB")
         card_ids = {c.card_id for c in cards}
         assert "nb-3C-01" in card_ids
@@ -139,25 +148,21 @@ class TestGetNodeCards:
         assert "nb-1M-01" not in card_ids
         assert "nb-2C-01" not in card_ids
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_bayes_returns_only_bayes_card(self, _mock):
+    def test_bayes_returns_only_bayes_card(self):
         cards = get_node_cards("BAYES")
         assert len(cards) == 1
         assert cards[0].card_id == "nb-1M-01"
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_cond_returns_only_cond_card(self, _mock):
+    def test_cond_returns_only_cond_card(self):
         cards = get_node_cards("COND")
         assert len(cards) == 1
         assert cards[0].card_id == "nb-2C-01"
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_unknown_node_returns_empty(self, _mock):
+    def test_unknown_node_returns_empty(self):
         cards = get_node_cards("NONEXISTENT")
         assert cards == []
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_untagged_card_falls_back_to_prefix(self, _mock):
+    def test_untagged_card_falls_back_to_prefix(self):
         """An untagged nb-* card should appear under NB via NODE_CARD_MAP."""
         cards = get_node_cards("NB")
         card_ids = {c.card_id for c in cards}
@@ -169,9 +174,9 @@ class TestGetNodeCards:
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.usefixtures("sample_vault")
 class TestGetConceptSubtopics:
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_nb_subtopics(self, _mock):
+    def test_nb_subtopics(self):
         subtopics = get_concept_subtopics("NB")
         sub_map = {s.id: s.card_count for s in subtopics}
         assert sub_map["variants"] == 2
@@ -179,15 +184,13 @@ class TestGetConceptSubtopics:
         # Untagged legacy card has no subtopic → "uncategorized"
         assert sub_map["uncategorized"] == 1
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_bayes_subtopics(self, _mock):
+    def test_bayes_subtopics(self):
         subtopics = get_concept_subtopics("BAYES")
         assert len(subtopics) == 1
         assert subtopics[0].id == "formula"
         assert subtopics[0].card_count == 1
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_empty_node_subtopics(self, _mock):
+    def test_empty_node_subtopics(self):
         subtopics = get_concept_subtopics("PROB")
         assert subtopics == []
 
@@ -197,15 +200,14 @@ class TestGetConceptSubtopics:
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.usefixtures("sample_vault")
 class TestGetSubtopicCards:
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_nb_variants(self, _mock):
+    def test_nb_variants(self):
         cards = get_subtopic_cards("NB", "variants")
         assert len(cards) == 2
         assert {c.card_id for c in cards} == {"nb-3C-01", "nb-3C-02"}
 
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_uncategorized_subtopic(self, _mock):
+    def test_uncategorized_subtopic(self):
         cards = get_subtopic_cards("NB", "uncategorized")
         assert len(cards) == 1
         assert cards[0].card_id == "nb-LEGACY-01"
@@ -216,10 +218,10 @@ class TestGetSubtopicCards:
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.usefixtures("sample_vault")
 class TestGetSubtreeCardDistribution:
     @patch("app.services.graph_service.get_knowledge_graph", return_value=SAMPLE_GRAPH)
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_nb_distribution_includes_all_subtree_nodes(self, _mock_cards, _mock_graph):
+    def test_nb_distribution_includes_all_subtree_nodes(self, _mock_graph):
         dist = get_subtree_card_distribution("NB")
         assert dist.node_id == "NB"
         # 3 NB + 1 BAYES + 1 COND + 1 untagged legacy (via NB prefix) = 6
@@ -237,8 +239,7 @@ class TestGetSubtreeCardDistribution:
         assert breakdown_map["PROB"].is_prerequisite is True
 
     @patch("app.services.graph_service.get_knowledge_graph", return_value=SAMPLE_GRAPH)
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_bayes_distribution(self, _mock_cards, _mock_graph):
+    def test_bayes_distribution(self, _mock_graph):
         dist = get_subtree_card_distribution("BAYES")
         breakdown_map = {b.concept: b for b in dist.breakdown}
         assert dist.total == 1
@@ -246,8 +247,7 @@ class TestGetSubtreeCardDistribution:
         assert breakdown_map["PROB"].count == 0
 
     @patch("app.services.graph_service.get_knowledge_graph", return_value=SAMPLE_GRAPH)
-    @patch(_PATCH_LIST_CARDS, side_effect=_mock_list_cards)
-    def test_nonexistent_node_returns_empty(self, _mock_cards, _mock_graph):
+    def test_nonexistent_node_returns_empty(self, _mock_graph):
         dist = get_subtree_card_distribution("DOESNOTEXIST")
         assert dist.total == 0
         assert dist.breakdown == []
@@ -0,0 +1,217 @@
+"""Tests for conditional GET (ETag / If-None-Match) on read endpoints."""
+
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fastapi import Response
+
+from app.http_cache import ResponseCache, etag_matches, response_cache
+from app.main import app
+from app.services import card_service, fire_service, graph_service, srs_service
+from tests.conftest import bump_mtime, make_card, write_card
+
+FIXTURES = Path(__file__).parent / "fixtures"
+DATA_DOCS = Path(__file__).parent.parent / "data" / "docs"
+
+client = TestClient(app)
+
+
+def _revalidate(url: str, etag: str, **params):
+    return client.get(url, params=params, headers={"If-None-Match": etag})
+
+
+@pytest.fixture
+def docs_dir(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    shutil.copytree(DATA_DOCS, docs)
+    monkeypatch.setattr(fire_service, "DOCS_DIR", docs)
+    monkeypatch.setattr(graph_service, "DOCS_DIR", docs)
+    monkeypatch.setattr(srs_service, "SRS_STATE_FILE", tmp_path / "srs_state.json")
+    return docs
+
+
+# ---------------------------------------------------------------------------
+# If-None-Match parsing
+# ---------------------------------------------------------------------------
+
+
+class TestEtagMatches:
+    def test_exact_list_and_star(self):
+        assert etag_matches('"a"', '"a"')
+        assert etag_matches('"x", "a"', '"a"')
+        assert etag_matches("*", '"a"')
+        assert not etag_matches('"b"', '"a"')
+        assert not etag_matches(None, '"a"')
+
+    def test_weak_validators_compare_equal(self):
+        assert etag_matches('W/"a"', '"a"')
+
+
+# ---------------------------------------------------------------------------
+# Cards
+# ---------------------------------------------------------------------------
+
+
+class TestCardsConditional:
+    def test_list_sends_etag_and_cache_control(self, cards_dir):
+        resp = client.get("/api/cards")
+        assert resp.status_code == 200
+        assert resp.headers["etag"].startswith('"')
+        assert resp.headers["cache-control"] == "no-cache"
+
+    def test_match_is_304_without_building_the_response(self, cards_dir):
+        etag = client.get("/api/cards", params={"limit": 1}).headers["etag"]
+        with patch.object(card_service, "find_page", side_effect=AssertionError("ran")):
+            resp = _revalidate("/api/cards", etag, limit=1)
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["etag"] == etag
+
+    def test_etag_depends_on_query_and_store_version(self, cards_dir):
+        etag = client.get("/api/cards").headers["etag"]
+        assert client.get("/api/cards", params={"search": "q"}).headers["etag"] != etag
+        bump_mtime(write_card(cards_dir, make_card("nb-2M-01", prompt="edited")))
+        resp = _revalidate("/api/cards", etag)
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
+
+    def test_single_card_etag_follows_only_that_card(self, cards_dir):
+        etag = client.get("/api/cards/nb-1C-01").headers["etag"]
+        bump_mtime(write_card(cards_dir, make_card("nb-2M-01", prompt="edited")))
+        assert _revalidate("/api/cards/nb-1C-01", etag).status_code == 304
+        bump_mtime(write_card(cards_dir, make_card("nb-1C-01", prompt="edited")))
+        resp = _revalidate("/api/cards/nb-1C-01", etag)
+        assert resp.status_code == 200
+        assert resp.json()["prompt"] == "edited"
+
+    def test_renamed_card_file_is_a_new_version(self, cards_dir):
+        etag = client.get("/api/cards/nb-1C-01").headers["etag"]
+        (cards_dir / "nb-1C-01.md").rename(cards_dir / "renamed.md")
+        resp = _revalidate("/api/cards/nb-1C-01", etag)
+        assert resp.status_code == 200
+        assert resp.json()["filename"] == "renamed.md"
+
+    def test_missing_card_still_404s(self, cards_dir):
+        resp = client.get("/api/cards/nb-9X-99")
+        assert resp.status_code == 404
+        assert "etag" not in resp.headers
+
+    def test_export_is_conditional(self, cards_dir):
+        etag = client.get("/api/cards/export").headers["etag"]
+        assert _revalidate("/api/cards/export", etag).status_code == 304
+
+    def test_index_is_walked_once_per_request(self, cards_dir):
+        client.get("/api/cards")
+        index = card_service._get_index()
+        with patch.object(index, "refresh", wraps=index.refresh) as refresh:
+            client.get("/api/cards", params={"search": "q"})
+        refresh.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Graph and FIRe
+# ---------------------------------------------------------------------------
+
+
+class TestSourceFilesConditional:
+    def test_fire_routes_revalidate_until_file_changes(self, docs_dir):
+        for url in ("/api/fire/relationships", "/api/fire/heatmap"):
+            resp = client.get(url)
+            assert resp.status_code == 200
+            assert _revalidate(url, resp.headers["etag"]).status_code == 304
+        etag = client.get("/api/fire/heatmap").headers["etag"]
+        hierarchy = docs_dir / "nb-cards-fire-hierarchy.md"
+        shutil.copy(FIXTURES / "sample-fire.md", hierarchy)
+        bump_mtime(hierarchy)
+        resp = _revalidate("/api/fire/heatmap", etag)
+        assert resp.status_code == 200
+        assert resp.json() == fire_service.get_heatmap_data()
+
+    def test_graph_revalidates_on_cards_and_mermaid(self, docs_dir, cards_dir):
+        etag = client.get("/api/graph").headers["etag"]
+        assert _revalidate("/api/graph", etag).status_code == 304
+        bump_mtime(write_card(cards_dir, make_card("nb-4C-01")))
+        etag2 = _revalidate("/api/graph", etag).headers["etag"]
+        assert etag2 != etag
+        bump_mtime(docs_dir / "jobacademy-ml-marketing.mermaid")
+        assert _revalidate("/api/graph", etag2).status_code == 200
+
+    def test_simulate_is_not_conditional(self, docs_dir):
+        resp = client.post("/api/fire/simulate", json={"card_id": "nb-1C-01", "passed": True})
+        assert resp.status_code == 200
+        assert "etag" not in resp.headers
+
+
+# ---------------------------------------------------------------------------
+# Encoded response cache
+# ---------------------------------------------------------------------------
+
+
+class TestResponseCache:
+    def test_lru_evicts_by_total_bytes(self):
+        cache = ResponseCache(max_bytes=100)
+        cache.put("a", Response(b"x" * 40))
+        cache.put("b", Response(b"y" * 40))
+        assert cache.get("a").body == b"x" * 40  # "a" is now most recent
+        cache.put("c", Response(b"z" * 40))
+        assert cache.get("b") is None
+        assert len(cache) == 2 and cache.size <= 100
+        cache.put("huge", Response(b"!" * 200))
+        assert cache.get("huge") is None
+        assert cache.stats()["hits"] == 1
+
+    def test_hit_keeps_media_type_and_extra_headers(self):
+        cache = ResponseCache(max_bytes=1000)
+        cache.put("k", Response(b"[]", media_type="application/json", headers={"X-Next-Cursor": "c"}))
+        hit = cache.get("k")
+        assert hit.media_type == "application/json"
+        assert hit.headers["x-next-cursor"] == "c"
+        assert hit.headers["content-length"] == "2"
+
+    def test_repeat_request_is_served_from_bytes(self, cards_dir):
+        response_cache.clear()
+        first = client.get("/api/cards", params={"limit": 1})
+        with patch.object(card_service, "find_page", side_effect=AssertionError("ran")):
+            second = client.get("/api/cards", params={"limit": 1})
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+        assert second.headers["etag"] == first.headers["etag"]
+
+    def test_card_change_is_a_miss(self, cards_dir):
+        response_cache.clear()
+        client.get("/api/cards")
+        bump_mtime(write_card(cards_dir, make_card("nb-2M-01", prompt="edited")))
+        resp = client.get("/api/cards")
+        assert "edited" in [c["prompt"] for c in resp.json()]
+        assert response_cache.stats()["misses"] == 2
+
+    def test_errors_are_not_cached(self, cards_dir):
+        response_cache.clear()
+        for _ in range(2):
+            assert client.get("/api/cards", params={"tags": "a AND"}).status_code == 400
+        assert len(response_cache) == 0
+
+    def test_graph_and_heatmap_hits_skip_the_services(self, docs_dir, cards_dir):
+        response_cache.clear()
+        graph = client.get("/api/graph").json()
+        heatmap = client.get("/api/fire/heatmap").json()
+        with (
+            patch.object(graph_service, "get_knowledge_graph", side_effect=AssertionError),
+            patch.object(fire_service, "get_heatmap_data", side_effect=AssertionError),
+        ):
+            assert client.get("/api/graph").json() == graph
+            assert client.get("/api/fire/heatmap").json() == heatmap
+
+    def test_stats_endpoint(self, cards_dir):
+        response_cache.clear()
+        client.get("/api/cards")
+        client.get("/api/cards")
+        stats = client.get("/api/health/response-cache").json()
+        assert stats["entries"] == 1
+        assert stats["bytes"] > 0
+        assert stats["hits"] >= 1 and stats["misses"] >= 1
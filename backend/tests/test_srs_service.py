@@ -0,0 +1,363 @@
+"""Tests for the server-side SRS engine and its journaled state."""
+
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import srs_service
+from app.services.srs_columns import SrsColumns
+from app.services.srs_journal import SrsJournal
+from app.services.srs_queue import DueQueue
+from app.services.srs_store import SrsStore
+
+
+def _entry(interval: float = 1, next_due: str = "2000-01-01T00:00:00+00:00") -> dict:
+    return {
+        "ease_factor": 2.5,
+        "interval": interval,
+        "review_count": 1,
+        "next_due": next_due,
+        "last_reviewed": "",
+    }
+
+
+def _journal_lines(journal: SrsJournal) -> list[str]:
+    if not journal.journal_path.exists():
+        return []
+    return journal.journal_path.read_text(encoding="utf-8").splitlines()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def state_file(request, tmp_path, monkeypatch):
+    path = tmp_path / "srs_state.json"
+    monkeypatch.setattr(srs_service, "SRS_STATE_FILE", path)
+    monkeypatch.setattr(srs_service, "SRS_DB_FILE", tmp_path / "srs_state.sqlite")
+    monkeypatch.setattr(srs_service, "SRS_BACKEND", request.param)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Journal
+# ---------------------------------------------------------------------------
+
+
+class TestJournal:
+    def test_apply_appends_without_rewriting_snapshot(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json")
+        journal.apply("a", lambda e: _entry(), "2024-01-01")
+        journal.apply("b", lambda e: _entry(), "2024-01-01")
+        assert not journal.path.exists()
+        assert len(_journal_lines(journal)) == 2
+        assert journal.get("a") == _entry()
+        assert journal.reviewed_count("2024-01-01") == 2
+
+    def test_update_sees_current_entry(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json")
+        journal.apply("a", lambda e: _entry(interval=1), "2024-01-01")
+        seen = []
+        journal.apply("a", lambda e: seen.append(e) or _entry(interval=6), "2024-01-02")
+        assert seen == [_entry(interval=1)]
+        assert journal.get("a")["interval"] == 6
+
+    def test_reload_replays_journal_over_snapshot(self, tmp_path):
+        path = tmp_path / "srs_state.json"
+        legacy = {"cards": {"a": _entry(interval=3)}, "daily_log": {"2024-01-01": ["a"]}}
+        path.write_text(json.dumps(legacy, indent=2), encoding="utf-8")
+        journal = SrsJournal(path)
+        journal.apply("b", lambda e: _entry(interval=6), "2024-01-01")
+        journal.apply("a", lambda e: _entry(interval=9), "2024-01-02")
+
+        reloaded = SrsJournal(path)
+        assert reloaded.entries() == {"a": _entry(interval=9), "b": _entry(interval=6)}
+        assert reloaded.reviewed_count("2024-01-01") == 2
+        assert reloaded.reviewed_count("2024-01-02") == 1
+
+    def test_torn_last_record_is_skipped(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json")
+        journal.apply("a", lambda e: _entry(), "2024-01-01")
+        with open(journal.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"id": "b", "e": {"ease')
+        assert SrsJournal(journal.path).entries() == {"a": _entry()}
+
+    def test_threshold_compacts_into_snapshot(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json", compact_every=3)
+        for i in range(3):
+            journal.apply(f"c{i}", lambda e: _entry(), "2024-01-01")
+        journal.wait()
+        snapshot = json.loads(journal.path.read_text(encoding="utf-8"))
+        assert set(snapshot["cards"]) == {"c0", "c1", "c2"}
+        assert snapshot["daily_log"] == {"2024-01-01": ["c0", "c1", "c2"]}
+        assert _journal_lines(journal) == []
+        journal.apply("c3", lambda e: _entry(), "2024-01-02")
+        assert set(SrsJournal(journal.path).entries()) == {"c0", "c1", "c2", "c3"}
+
+    def test_interrupted_compaction_is_recovered(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json")
+        journal.apply("a", lambda e: _entry(interval=1), "2024-01-01")
+        # Crash after setting the journal aside, before the snapshot is written
+        journal.journal_path.rename(journal._compacting_path())
+        journal.apply("a", lambda e: _entry(interval=6), "2024-01-02")
+
+        reloaded = SrsJournal(journal.path)
+        assert reloaded.get("a")["interval"] == 6
+        assert not reloaded._compacting_path().exists()
+        assert json.loads(reloaded.path.read_text(encoding="utf-8"))["cards"]["a"]["interval"] == 6
+
+    def test_version_changes_on_apply(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json")
+        before = journal.version
+        journal.apply("a", lambda e: _entry(), "2024-01-01")
+        assert journal.version != before
+
+
+# ---------------------------------------------------------------------------
+# Write-behind
+# ---------------------------------------------------------------------------
+
+
+class TestWriteBehind:
+    def test_lines_are_written_in_batches(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json", flush_every=3)
+        journal.apply("a", lambda e: _entry(), "d")
+        journal.apply("b", lambda e: _entry(), "d")
+        assert _journal_lines(journal) == []
+        assert journal.get("b") == _entry()  # applied in memory already
+        journal.apply("c", lambda e: _entry(), "d")
+        assert len(_journal_lines(journal)) == 3
+        journal.apply("d", lambda e: _entry(), "d")
+        journal.close()
+        assert len(_journal_lines(journal)) == 4
+
+    def test_flusher_writes_on_an_interval(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json", flush_every=100, flush_interval=0.02, fsync=True)
+        journal.apply("a", lambda e: _entry(), "d")
+        deadline = time.monotonic() + 5
+        while not _journal_lines(journal) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(_journal_lines(journal)) == 1
+        journal.close()
+
+    def test_compaction_includes_pending_answers(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json", compact_every=4, flush_every=10)
+        for i in range(6):
+            journal.apply(f"c{i}", lambda e: _entry(), "d")
+        journal.close()
+        assert set(SrsJournal(journal.path).entries()) == {f"c{i}" for i in range(6)}
+
+    def test_failed_write_leaves_state_unchanged(self, tmp_path):
+        journal = SrsJournal(tmp_path / "srs_state.json")
+        journal.journal_path.mkdir()  # appending to it fails
+        with pytest.raises(OSError):
+            journal.apply("a", lambda e: _entry(), "d")
+        assert journal.get("a") is None
+        assert journal.reviewed_count("d") == 0
+
+    def test_concurrent_answers_are_not_lost(self, state_file, monkeypatch):
+        monkeypatch.setattr(srs_service, "SRS_FLUSH_BATCH", 7)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: srs_service.answer_card(f"c{i % 4}", 1), range(200)))
+        srs_service.close()
+        state = srs_service._get_state()
+        assert sum(state.get(f"c{i}")["review_count"] for i in range(4)) == 200
+
+    def test_shutdown_flushes(self):
+        with patch.object(srs_service, "close") as close:
+            with TestClient(app):
+                pass
+        close.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Due queue
+# ---------------------------------------------------------------------------
+
+
+class TestDueQueue:
+    def test_due_is_earliest_first_and_stops_at_now(self):
+        queue = DueQueue()
+        for cid, due in [("c", 30.0), ("a", 10.0), ("late", 99.0), ("b", 20.0)]:
+            queue.push(cid, due)
+        assert queue.due(30.0) == [(10.0, "a"), (20.0, "b"), (30.0, "c")]
+        assert queue.due(5.0) == []
+
+    def test_rescheduled_items_are_skipped(self):
+        queue = DueQueue()
+        queue.push("a", 10.0)
+        queue.push("a", 50.0)
+        assert queue.due(20.0) == []
+        queue.push("a", 10.0)  # back to an earlier time: one result, not two
+        assert queue.due(60.0) == [(10.0, "a")]
+        queue.discard("a")
+        assert queue.due(60.0) == []
+
+    def test_matches_a_scan_under_churn(self):
+        rng = random.Random(0)
+        queue, current = DueQueue(), {}
+        for _ in range(5000):
+            cid = f"c{rng.randrange(300)}"
+            current[cid] = float(rng.randrange(1000))
+            queue.push(cid, current[cid])
+        assert len(queue._heap) <= 2 * len(queue) + 64
+        for now in (-1.0, 0.0, 250.0, 999.0):
+            assert queue.due(now) == sorted((d, c) for c, d in current.items() if d <= now)
+
+
+# ---------------------------------------------------------------------------
+# Columns
+# ---------------------------------------------------------------------------
+
+
+class TestColumns:
+    def test_stats_match_a_loop(self):
+        rng = random.Random(1)
+        cols, rows = SrsColumns(), {}
+        for i in range(2000):
+            cid = f"c{rng.randrange(1500)}"
+            rows[cid] = (float(rng.randrange(100)), float(rng.randrange(60)))
+            cols.set(cid, rows[cid][0], rows[cid][1], 2.5, 1)
+        corpus = {f"c{i}" for i in range(0, 1500, 2)}
+        expected = [(d, iv) for cid, (d, iv) in rows.items() if cid in corpus]
+        assert cols.stats(50.0, corpus, 21) == (
+            len(expected),
+            sum(d <= 50.0 for d, _ in expected),
+            sum(iv >= 21 for _, iv in expected),
+        )
+
+    def test_mask_is_extended_for_new_rows(self):
+        cols = SrsColumns()
+        corpus = {"a", "b"}
+        cols.set("a", 0.0, 1, 2.5, 1)
+        assert cols.stats(1.0, corpus, 21) == (1, 1, 0)
+        cols.set("z", 0.0, 30, 2.5, 3)  # not a current card
+        cols.set("b", 5.0, 30, 2.5, 3)
+        assert cols.stats(1.0, corpus, 21) == (2, 1, 1)
+        assert cols.mask(corpus).tolist() == [True, False, True]
+
+    def test_interval_histogram(self):
+        cols = SrsColumns()
+        for cid, iv in [("a", 0.5), ("b", 6), ("c", 21), ("d", 400)]:
+            cols.set(cid, 0.0, iv, 2.5, 1)
+        edges = srs_service.INTERVAL_EDGES
+        assert cols.interval_histogram({"a", "b", "c", "d"}, edges).tolist() == [1, 1, 0, 1, 1]
+
+
+# ---------------------------------------------------------------------------
+# SQLite store
+# ---------------------------------------------------------------------------
+
+
+class TestSqliteStore:
+    def test_entries_round_trip(self, tmp_path):
+        store = SrsStore(tmp_path / "srs.sqlite")
+        store.apply("a", lambda e: _entry(interval=6), "2024-01-01")
+        assert store.get("a") == _entry(interval=6)
+        assert store.reviewed_count("2024-01-01") == 1
+        assert store.get("missing") is None
+
+    def test_due_is_an_indexed_range(self, tmp_path):
+        store = SrsStore(tmp_path / "srs.sqlite")
+        now = datetime.now(timezone.utc)
+        store.apply("past", lambda e: _entry(next_due=(now - timedelta(days=1)).isoformat()), "d")
+        store.apply("future", lambda e: _entry(next_due=(now + timedelta(days=1)).isoformat()), "d")
+        assert list(store.due(now)) == ["past"]
+        plan = store._conn().execute(
+            "EXPLAIN QUERY PLAN SELECT card_id FROM cards WHERE next_due <= ?", (now.timestamp(),)
+        ).fetchall()
+        assert "cards_next_due" in str(plan)
+
+    def test_workers_sharing_the_file_lose_no_reviews(self, tmp_path):
+        path = tmp_path / "srs.sqlite"
+        workers = [SrsStore(path), SrsStore(path)]
+
+        def review(i: int) -> None:
+            workers[i % 2].apply(
+                "a", lambda e: {**(e or _entry()), "review_count": (e or {"review_count": 0})["review_count"] + 1}, "d"
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(review, range(40)))
+        assert workers[0].get("a")["review_count"] == 40
+        assert workers[0].version == workers[1].version == 40
+
+    def test_imports_json_state_once(self, tmp_path):
+        legacy = tmp_path / "srs_state.json"
+        journal = SrsJournal(legacy)
+        journal.apply("a", lambda e: _entry(interval=3), "2024-01-01")
+        store = SrsStore(tmp_path / "srs.sqlite", legacy_path=legacy)
+        assert store.get("a") == _entry(interval=3)
+        assert store.reviewed_count("2024-01-01") == 1
+        store.apply("a", lambda e: _entry(interval=9), "2024-01-02")
+        reopened = SrsStore(tmp_path / "srs.sqlite", legacy_path=legacy)
+        assert reopened.get("a")["interval"] == 9
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+
+class TestAnswerCard:
+    def test_sm2_progression(self, state_file):
+        srs_service.answer_card("nb-1C-01", 3)
+        srs_service.answer_card("nb-1C-01", 3)
+        entry = srs_service._get_state().get("nb-1C-01")
+        assert entry["interval"] == 6
+        assert entry["review_count"] == 2
+        srs_service.answer_card("nb-1C-01", 1)
+        entry = srs_service._get_state().get("nb-1C-01")
+        assert entry["interval"] == 0
+        assert entry["ease_factor"] == 2.3
+
+    def test_answers_survive_close(self, state_file):
+        srs_service.answer_card("nb-1C-01", 4)
+        srs_service.close()
+        assert srs_service._get_state().get("nb-1C-01")["review_count"] == 1
+
+
+class TestDueAndStats:
+    def test_answered_card_leaves_the_due_list(self, state_file, cards_dir):
+        assert {c["card_id"] for c in srs_service.get_due_cards()} == {"nb-1C-01", "nb-2M-01", "nb-3P-01"}
+        srs_service.answer_card("nb-2M-01", 3)
+        due = srs_service.get_due_cards()
+        assert [c["card_id"] for c in due] == ["nb-1C-01", "nb-3P-01"]
+        assert due[0]["front"] == "Prompt for nb-1C-01"
+
+    def test_due_order_new_first_then_interval(self, state_file, cards_dir, monkeypatch):
+        clock = [datetime.now(timezone.utc) - timedelta(days=30)]
+        monkeypatch.setattr(srs_service, "_now", lambda: clock[0])
+        srs_service.answer_card("nb-1C-01", 3)  # interval 1
+        srs_service.answer_card("nb-3P-01", 3)
+        srs_service.answer_card("nb-3P-01", 3)  # interval 6
+        clock[0] = datetime.now(timezone.utc)
+        due = srs_service.get_due_cards()
+        assert [(c["card_id"], c["interval"]) for c in due] == [
+            ("nb-2M-01", 0),
+            ("nb-1C-01", 1),
+            ("nb-3P-01", 6),
+        ]
+
+    def test_interval_histogram(self, state_file, cards_dir):
+        srs_service.answer_card("nb-2M-01", 3)
+        histogram = srs_service.get_interval_histogram()
+        assert [b["count"] for b in histogram] == [2, 1, 0, 0, 0]
+        assert histogram[0] == {"min": 0.0, "max": 1.0, "count": 2}
+        assert histogram[-1]["max"] is None
+
+    def test_basic_stats(self, state_file, cards_dir):
+        srs_service.answer_card("nb-2M-01", 3)
+        stats = srs_service.get_basic_stats()
+        assert stats == {
+            "due_today": 2,
+            "total_notes": 3,
+            "reviewed_today": 1,
+            "mastery_pct": 0,
+            "mastered_count": 0,
+        }
@@ -0,0 +1,66 @@
+"""Tests for tag_query — parsing and set evaluation of boolean tag queries."""
+
+import pytest
+
+from app.services.tag_query import TagQueryError, compile_tag_query, evaluate
+
+# tag -> ordinals of the cards carrying it
+_TAGS = {
+    "programming": {1, 2, 3, 4},
+    "debug": {1, 5},
+    "build": {2, 3},
+    "extend": {3},
+}
+_ALL = {1, 2, 3, 4, 5, 6}
+
+
+def _match(query: str) -> set[int]:
+    return evaluate(
+        compile_tag_query(query),
+        lambda tag: _TAGS.get(tag, set()),
+        lambda: set(_ALL),
+    )
+
+
+class TestParse:
+    def test_precedence(self):
+        assert compile_tag_query("a OR b AND NOT c") == (
+            "or", (("tag", "a"), ("and", (("tag", "b"), ("not", ("tag", "c"))))),
+        )
+
+    def test_parentheses_and_implicit_and(self):
+        assert compile_tag_query("(a or b) c") == (
+            "and", (("or", (("tag", "a"), ("tag", "b"))), ("tag", "c")),
+        )
+
+    def test_tags_are_lowercased(self):
+        assert compile_tag_query("Predict-Output") == ("tag", "predict-output")
+
+    @pytest.mark.parametrize("query", ["", "   ", "a AND", "(a", "a)", "NOT", "OR a", "()"])
+    def test_malformed_queries_raise(self, query):
+        with pytest.raises(TagQueryError):
+            compile_tag_query(query)
+
+
+class TestEvaluate:
+    def test_single_tag(self):
+        assert _match("debug") == {1, 5}
+
+    def test_example_query(self):
+        assert _match("programming AND (debug OR build) AND NOT extend") == {1, 2}
+
+    def test_not_alone_uses_universe(self):
+        assert _match("NOT programming") == {5, 6}
+
+    def test_double_negation(self):
+        assert _match("NOT NOT debug") == {1, 5}
+
+    def test_unknown_tag_matches_nothing(self):
+        assert _match("nope") == set()
+        assert _match("debug OR nope") == {1, 5}
+
+    def test_does_not_mutate_tag_sets(self):
+        _match("programming AND NOT debug")
+        _match("build OR extend")
+        assert _TAGS["programming"] == {1, 2, 3, 4}
+        assert _TAGS["build"] == {2, 3}